@@ -0,0 +1 @@
+"""Benchmarks for python-pdf-ocr-converter (not part of the installed package)."""
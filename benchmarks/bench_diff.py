@@ -0,0 +1,112 @@
+"""Benchmark: diff engines on large synthetic OCR pages.
+
+Each page pair is a dense "raw OCR" page and a "corrected" version with
+character-level fixes on most lines plus a few merged / split lines, which
+is what turns into long replaced blocks for the line matcher. Times are
+reported for the previous implementation (`difflib.ndiff`, filtered) and
+for every `diffing.DIFF_MODES` engine; the "ndiff" engine is also checked
+to give identical output.
+
+Usage:
+    python -m benchmarks.bench_diff --lines 400 --pages 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import random
+import time
+from typing import Callable, List, Optional, Tuple
+
+from pdf_ocr_converter.diffing import DIFF_MODES, changed_lines
+
+_WORDS = (
+    "the of and to in that was he for it with as his on be at by this had not are but from "
+    "or have an they which one you were her all she there would their we him been has when "
+    "who will more no if out so said what up its about into than them can only other new"
+).split()
+
+
+def _noisy(rng: random.Random, line: str, edits: int) -> str:
+    chars = list(line)
+    for _ in range(edits):
+        k = rng.randrange(len(chars)) if chars else 0
+        op = rng.random()
+        if op < 0.3 and chars:
+            del chars[k]
+        elif op < 0.6:
+            chars.insert(k, rng.choice("abcdeilmnort.,'"))
+        elif chars:
+            chars[k] = rng.choice("ABCl1|0O")
+    return "".join(chars)
+
+
+def synthetic_page_pair(seed: int, lines: int, changed: float = 0.7) -> Tuple[str, str]:
+    """Return `(raw, corrected)` texts of `lines` lines each (approximately)."""
+
+    rng = random.Random(seed)
+    corrected = [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(10, 16))) for _ in range(lines)]
+    raw: List[str] = []
+    i = 0
+    while i < len(corrected):
+        r = rng.random()
+        if r < 0.03 and i + 1 < len(corrected):
+            raw.append(_noisy(rng, corrected[i] + " " + corrected[i + 1], 3))  # merged lines
+            i += 2
+            continue
+        if r < 0.06:
+            words = corrected[i].split()
+            cut = len(words) // 2
+            raw.extend([" ".join(words[:cut]), " ".join(words[cut:])])  # split line
+        elif r < 0.06 + changed:
+            raw.append(_noisy(rng, corrected[i], rng.randint(1, 5)))
+        else:
+            raw.append(corrected[i])
+        i += 1
+    return "\n".join(raw), "\n".join(corrected)
+
+
+def _old_changed_lines(raw: str, corrected: str) -> List[str]:
+    return [
+        line
+        for line in difflib.ndiff(raw.splitlines(), corrected.splitlines())
+        if line.startswith("+ ") or line.startswith("- ")
+    ]
+
+
+def _time(fn: Callable[[], List[str]]) -> Tuple[float, List[str]]:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(lines: int, pages: int) -> None:
+    pairs = [synthetic_page_pair(seed, lines) for seed in range(pages)]
+    totals = {"difflib.ndiff": 0.0, **{mode: 0.0 for mode in DIFF_MODES}}
+    for raw, corrected in pairs:
+        seconds, expected = _time(lambda: _old_changed_lines(raw, corrected))
+        totals["difflib.ndiff"] += seconds
+        for mode in DIFF_MODES:
+            seconds, result = _time(lambda: changed_lines(raw, corrected, mode=mode))
+            totals[mode] += seconds
+            if mode == "ndiff" and result != expected:
+                raise SystemExit("ndiff engine output differs from difflib.ndiff!")
+
+    baseline = totals["difflib.ndiff"]
+    for name, seconds in totals.items():
+        print(f"{name:>13}: {seconds / pages * 1000:8.1f} ms/page  ({baseline / seconds:5.1f}x)")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=400, help="Lines per page (default: 400).")
+    parser.add_argument("--pages", type=int, default=3, help="Page pairs to diff (default: 3).")
+    args = parser.parse_args(argv)
+
+    run(args.lines, args.pages)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
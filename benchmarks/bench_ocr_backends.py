@@ -0,0 +1,82 @@
+"""Benchmark: per-page overhead of the OCR backends.
+
+Renders a few pages of the bundled `Poem1.pdf` once, then OCRs them with each
+available backend (see `pdf_ocr_converter.ocr_backends`). Two numbers are
+reported per backend:
+
+- overhead: mean time to OCR a tiny blank image, i.e. the fixed cost paid
+  per page (process start-up, temp files, language-data loading),
+- page: mean time per real page, including recognition.
+
+The first call (engine creation) is timed separately as warm-up.
+
+Usage:
+    python -m benchmarks.bench_ocr_backends --pages 10 --dpi 300
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import time
+from typing import List, Optional
+
+from PIL import Image
+
+from pdf_ocr_converter.core import count_pdf_pages, iter_page_range_images
+from pdf_ocr_converter.ocr_backends import OCR_BACKENDS, get_backend
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _mean_seconds(backend, images: List[object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for image in images:
+            backend.image_to_string(image)
+    return (time.perf_counter() - start) / (repeat * len(images))
+
+
+def run(pdf_path: Path, pages: int, dpi: int, repeat: int, lang: Optional[str]) -> None:
+    pages = min(pages, count_pdf_pages(pdf_path))
+    images = [
+        image
+        for _, image in iter_page_range_images(
+            pdf_path, first_page=1, last_page=pages, dpi=dpi, poppler_path=None
+        )
+    ]
+    blank = [Image.new("L", (32, 32), color=255)]
+
+    for name in OCR_BACKENDS:
+        start = time.perf_counter()
+        try:
+            backend = get_backend(name, lang=lang)
+            backend.image_to_string(blank[0])
+        except RuntimeError as exc:
+            print(f"{name:>10}: skipped ({exc})")
+            continue
+        warmup = time.perf_counter() - start
+
+        overhead = _mean_seconds(backend, blank, repeat * 5)
+        per_page = _mean_seconds(backend, images, repeat)
+        print(
+            f"{name:>10}: warm-up {warmup * 1000:.0f} ms, overhead {overhead * 1000:.1f} ms/page, "
+            f"page {per_page * 1000:.0f} ms/page ({len(images)} pages x {repeat})"
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", type=Path, default=REPO_ROOT / "Poem1.pdf", help="PDF to OCR (default: Poem1.pdf).")
+    parser.add_argument("--pages", type=int, default=10, help="Pages to OCR (default: 10).")
+    parser.add_argument("--dpi", type=int, default=300, help="Rendering DPI (default: 300).")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the pages (default: 3).")
+    parser.add_argument("--lang", default=None, help="Tesseract language(s), e.g. 'eng' or 'eng+deu'.")
+    args = parser.parse_args(argv)
+
+    run(args.pdf, args.pages, args.dpi, args.repeat, args.lang)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""Benchmark: OCR time and accuracy with and without image preprocessing.
+
+Pages:
+- `Poem1.pdf` rendered cleanly; the reference text is the OCR of the clean
+  render without preprocessing, so this measures whether preprocessing
+  costs accuracy on good input,
+- synthetic scans: known text drawn on tinted, noisy paper, rotated a few
+  degrees and framed by a dark scanner border; the reference is the drawn
+  text.
+
+For each page, OCR time (including preprocessing) and word accuracy
+(`difflib` ratio over words) are reported for the raw and preprocessed
+image.
+
+Usage:
+    python -m benchmarks.bench_preprocess --dpi 300 --scans 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+from pathlib import Path
+import random
+import time
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from pdf_ocr_converter.core import iter_page_range_images, ocr_image
+from pdf_ocr_converter.preprocess import preprocess_image
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+_WORDS = (
+    "the quick brown fox jumps over lazy dog while seven wizards quietly judge "
+    "boxing matches and pack my box with five dozen liquor jugs"
+).split()
+
+
+def word_accuracy(text: str, reference: str) -> float:
+    return difflib.SequenceMatcher(None, text.split(), reference.split(), autojunk=False).ratio()
+
+
+def synthetic_scan(seed: int, dpi: int) -> Tuple[Image.Image, str]:
+    """Return a degraded page image and the text drawn on it."""
+
+    rng = random.Random(seed)
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    page = Image.new("RGB", (width, height), (232, 224, 198))
+    # Noise: a speckled grayscale layer blended into the tinted paper.
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    page = Image.blend(page, noise, 0.15)
+
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", dpi // 7)
+    except OSError:
+        font = ImageFont.load_default()
+    draw = ImageDraw.Draw(page)
+    lines = []
+    line_height = dpi // 4
+    for y in range(dpi, height - dpi, line_height):
+        line = " ".join(rng.choice(_WORDS) for _ in range(9))
+        draw.text((dpi, y), line, fill=(35, 30, 40), font=font)
+        lines.append(line)
+
+    page = page.filter(ImageFilter.GaussianBlur(0.6))
+    page = page.rotate(rng.uniform(-3, 3), expand=True, fillcolor=(30, 30, 30), resample=Image.BICUBIC)
+    return page, "\n".join(lines)
+
+
+def _time_ocr(image: Image.Image, preprocess: bool, lang: Optional[str]) -> Tuple[str, float]:
+    start = time.perf_counter()
+    if preprocess:
+        image = preprocess_image(image)
+    text = ocr_image(image, lang=lang)
+    return text, time.perf_counter() - start
+
+
+def run(dpi: int, scans: int, lang: Optional[str]) -> None:
+    pages: List[Tuple[str, Image.Image, Optional[str]]] = []
+    for page_number, image in iter_page_range_images(
+        REPO_ROOT / "Poem1.pdf", first_page=1, last_page=1, dpi=dpi, poppler_path=None
+    ):
+        pages.append((f"Poem1 p{page_number}", image, None))
+    for seed in range(scans):
+        image, text = synthetic_scan(seed, dpi)
+        pages.append((f"scan {seed}", image, text))
+
+    totals = {False: [0.0, 0.0], True: [0.0, 0.0]}
+    for name, image, reference in pages:
+        raw_text, raw_seconds = _time_ocr(image, False, lang)
+        if reference is None:
+            reference = raw_text
+        row = [f"{name:>10}:"]
+        for preprocess, (text, seconds) in (
+            (False, (raw_text, raw_seconds)),
+            (True, _time_ocr(image, True, lang)),
+        ):
+            accuracy = word_accuracy(text, reference)
+            totals[preprocess][0] += seconds
+            totals[preprocess][1] += accuracy
+            label = "preprocessed" if preprocess else "raw"
+            row.append(f"{label} {seconds:.2f}s acc {accuracy:.3f}")
+        print("  ".join(row))
+
+    for preprocess, (seconds, accuracy) in totals.items():
+        label = "preprocessed" if preprocess else "raw"
+        print(f"{label:>12}: {seconds / len(pages):.2f}s/page, mean accuracy {accuracy / len(pages):.3f}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dpi", type=int, default=300, help="Rendering DPI (default: 300).")
+    parser.add_argument("--scans", type=int, default=3, help="Synthetic scans to generate (default: 3).")
+    parser.add_argument("--lang", default=None, help="Tesseract language(s), e.g. 'eng'.")
+    args = parser.parse_args(argv)
+
+    run(args.dpi, args.scans, args.lang)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+"""Benchmark: per-page rendering vs chunked single-pass rendering.
+
+Builds a multi-hundred-page PDF by repeating the bundled `Poem1.pdf` and
+renders it with both `iter_page_images` (one poppler call per page) and
+`iter_page_range_images` (one poppler call per chunk). Each engine runs in a
+fresh process so its peak RSS can be reported independently.
+
+Usage:
+    python -m benchmarks.bench_rendering --pages 300 --dpi 150
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+from pathlib import Path
+import resource
+import tempfile
+import time
+from typing import Optional
+
+import PyPDF2
+
+from pdf_ocr_converter.core import iter_page_images, iter_page_range_images
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def build_repeated_pdf(source: Path, pages: int, out_path: Path) -> Path:
+    """Write a PDF with `pages` pages by cycling through the pages of `source`."""
+
+    reader = PyPDF2.PdfReader(str(source))
+    writer = PyPDF2.PdfWriter()
+    for i in range(pages):
+        writer.add_page(reader.pages[i % len(reader.pages)])
+    with out_path.open("wb") as f:
+        writer.write(f)
+    return out_path
+
+
+def _run_engine(engine: str, pdf_path: Path, pages: int, dpi: int, chunk_size: int, queue) -> None:
+    start = time.perf_counter()
+    rendered = 0
+    if engine == "per-page":
+        for page_number in range(1, pages + 1):
+            for image in iter_page_images(pdf_path, page_number=page_number, dpi=dpi, poppler_path=None):
+                image.close()
+                rendered += 1
+    else:
+        for _, image in iter_page_range_images(
+            pdf_path, first_page=1, last_page=pages, dpi=dpi, poppler_path=None, chunk_size=chunk_size
+        ):
+            image.close()
+            rendered += 1
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux (bytes on macOS); report it as-is.
+    queue.put((engine, rendered, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def run(pdf_path: Path, pages: int, dpi: int, chunk_size: int) -> None:
+    queue = multiprocessing.Queue()
+    for engine in ("per-page", "chunked"):
+        proc = multiprocessing.Process(
+            target=_run_engine, args=(engine, pdf_path, pages, dpi, chunk_size, queue)
+        )
+        proc.start()
+        proc.join()
+        name, rendered, elapsed, maxrss = queue.get()
+        print(
+            f"{name:>9}: {rendered} pages in {elapsed:.2f}s "
+            f"({rendered / elapsed:.1f} pages/s), peak RSS {maxrss} KiB"
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", type=Path, default=None, help="PDF to render (default: repeated Poem1.pdf).")
+    parser.add_argument("--pages", type=int, default=300, help="Pages to render (default: 300).")
+    parser.add_argument("--dpi", type=int, default=150, help="Rendering DPI (default: 150).")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Pages per poppler call (default: 16).")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = args.pdf or build_repeated_pdf(REPO_ROOT / "Poem1.pdf", args.pages, Path(tmp) / "bench.pdf")
+        run(pdf_path, args.pages, args.dpi, args.chunk_size)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
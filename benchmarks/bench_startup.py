@@ -0,0 +1,102 @@
+"""Benchmark: CLI startup time and which heavy libraries it imports.
+
+Each measurement runs in a fresh interpreter:
+
+- import time of the CLI and the core modules, parsed from
+  `python -X importtime` (median of `--repeat` runs, interpreter start-up
+  and `site` excluded), with the slowest imports they pull in,
+- wall time of `pdf-ocr-converter --help` (best of `--repeat` runs),
+- which of the heavy third-party libraries got loaded; the CLI should
+  import none of them until a stage needs them.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5 --top 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+MODULES = ("pdf_ocr_converter.cli", "pdf_ocr_converter.core", "pdf_ocr_converter.async_correction")
+HEAVY_MODULES = ("PyPDF2", "pdf2image", "pytesseract", "PIL", "numpy", "openai", "tesserocr", "asyncio")
+
+
+def _python(args: List[str]) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return subprocess.run(
+        [sys.executable, *args], cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def import_times(code: str) -> List[Tuple[str, int, int]]:
+    """Run `code` under `-X importtime`; return `(module, self_us, cumulative_us)` per import."""
+
+    times = []
+    for line in _python(["-X", "importtime", "-c", code]).stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def measure_import(module: str, repeat: int, baseline: Set[str]) -> Tuple[float, Dict[str, int]]:
+    """Return the median import time of `module` in ms and the cumulative µs of what it imported."""
+
+    totals = []
+    imported: Dict[str, int] = {}
+    for _ in range(repeat):
+        times = [t for t in import_times(f"import {module}") if t[0] not in baseline]
+        totals.append(sum(self_us for _, self_us, _ in times) / 1000)
+        imported = {name: cumulative for name, _, cumulative in times}
+    return statistics.median(totals), imported
+
+
+def loaded_heavy_modules(module: str) -> List[str]:
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    return _python(["-c", code]).stdout.split()
+
+
+def help_seconds(repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _python(["-m", "pdf_ocr_converter.cli", "--help"])
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (default: 5).")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports listed per module (default: 8).")
+    args = parser.parse_args(argv)
+
+    baseline = {name for name, _, _ in import_times("pass")}
+    for module in MODULES:
+        total_ms, imported = measure_import(module, args.repeat, baseline)
+        # Only top-level packages, so a slow package is not listed with all its submodules.
+        slowest = sorted(
+            ((cumulative, name) for name, cumulative in imported.items() if "." not in name),
+            reverse=True,
+        )[: args.top]
+        heavy = loaded_heavy_modules(module)
+        print(f"{module}: {total_ms:.1f} ms, heavy libraries loaded: {', '.join(heavy) or 'none'}")
+        print("    slowest: " + ", ".join(f"{name} {cumulative / 1000:.1f} ms" for cumulative, name in slowest))
+
+    print(f"pdf-ocr-converter --help: {help_seconds(args.repeat) * 1000:.0f} ms (best of {args.repeat})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
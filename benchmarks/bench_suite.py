@@ -0,0 +1,302 @@
+"""Benchmark suite: CLI throughput, per-stage latency and peak memory on synthetic corpora.
+
+Each scenario pairs a synthetic corpus (see `synthetic_pdf.CorpusSpec`)
+with a CLI `--mode` and runs the real CLI in a fresh process with
+`--metrics-out`, so the numbers include everything a user would see:
+
+- pages per second (pages / conversion wall time),
+- per-stage p50 / p95 / max wall time (from the metrics report),
+- peak RSS of the CLI process (pool workers are separate processes and
+  not included).
+
+Corpora: "text" (text layer on every page), "scan" (image-only, degraded)
+and "mixed" (half and half); `--pages`, `--words` and `--noise` reshape
+all of them. Modes that correct text are pointed at a local stub
+completions endpoint (echoes the text upper-cased after
+`--correction-latency` ms) through `--correction-concurrency` /
+`--api-base`, so no network access or API key is needed. Extra CLI
+options (e.g. `--workers 4`) go after `--`.
+
+Results can be stored as a baseline and later runs compared against it;
+a scenario regresses when its throughput drops, or its peak memory grows,
+by more than `--tolerance`. Per-stage p95 changes are reported alongside.
+
+Usage:
+    python -m benchmarks.bench_suite --save-baseline benchmarks/baselines/local.json
+    python -m benchmarks.bench_suite --compare benchmarks/baselines/local.json -- --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+from pathlib import Path
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+CORPORA = {
+    "text": CorpusSpec(image_fraction=0.0, noise=0.0),
+    "scan": CorpusSpec(image_fraction=1.0, noise=0.5),
+    "mixed": CorpusSpec(image_fraction=0.5, noise=0.3),
+}
+MODES = ("raw", "corrected", "diff", "all")
+
+BASELINE_VERSION = 1
+
+
+def _make_stub_server(latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            text = body["prompt"].rsplit("\n\n", 1)[-1]
+            time.sleep(latency)
+            payload = json.dumps({"choices": [{"text": text.upper()}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+
+
+def run_scenario(
+    pdf_path: Path,
+    mode: str,
+    *,
+    pages: int,
+    api_base: str,
+    cli_args: Sequence[str] = (),
+) -> dict:
+    """Run the CLI once on `pdf_path` and return the scenario's measurements."""
+
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as tmp:
+        metrics_path = Path(tmp) / "metrics.json"
+        command = [
+            sys.executable,
+            "-m",
+            "pdf_ocr_converter.cli",
+            str(pdf_path),
+            "--mode",
+            mode,
+            "--text-layer",
+            "auto",
+            "--no-progress",
+            "--metrics-out",
+            str(metrics_path),
+        ]
+        if mode != "raw":
+            command += ["--correction-concurrency", "4", "--api-base", api_base]
+        command += list(cli_args)
+
+        env = dict(os.environ, OPENAI_API_KEY="benchmark")
+        # Outputs go to `tmp`; the CLI runs from the repo root (for `-m`).
+        for option, name in (
+            ("--raw-out", "raw.txt"),
+            ("--corrected-out", "corrected.txt"),
+            ("--diff-out", "diff.txt"),
+            ("--journal", "journal.jsonl"),
+        ):
+            command += [option, str(Path(tmp) / name)]
+        start = time.perf_counter()
+        proc = subprocess.run(
+            command, env=env, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        process_s = time.perf_counter() - start
+        if proc.returncode != 0:
+            raise SystemExit(f"CLI failed on {pdf_path.name} (--mode {mode}):\n{proc.stderr}")
+        report = json.loads(metrics_path.read_text(encoding="utf-8"))
+
+    run = report["run"]
+    return {
+        "pages": pages,
+        "wall_s": run["wall_s"],
+        "process_s": process_s,
+        "pages_per_s": pages / run["wall_s"],
+        "max_rss_kb": run["max_rss_kb"],
+        "stages": {
+            stage: {key: summary[f"wall_s_{key}"] for key in ("p50", "p95", "max")}
+            for stage, summary in report["stages"].items()
+        },
+    }
+
+
+def run_suite(
+    corpora: Dict[str, CorpusSpec],
+    modes: Sequence[str],
+    *,
+    repeat: int = 1,
+    correction_latency: float = 0.05,
+    cli_args: Sequence[str] = (),
+) -> Dict[str, dict]:
+    """Run every corpus x mode scenario, keeping the fastest of `repeat` runs."""
+
+    server = _make_stub_server(correction_latency)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    results: Dict[str, dict] = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-corpus-") as tmp:
+            for corpus_name, spec in corpora.items():
+                pdf_path = write_pdf(spec, Path(tmp) / f"{corpus_name}.pdf")
+                for mode in modes:
+                    name = f"{corpus_name}/{mode}"
+                    runs = [
+                        run_scenario(pdf_path, mode, pages=spec.pages, api_base=api_base, cli_args=cli_args)
+                        for _ in range(repeat)
+                    ]
+                    results[name] = max(runs, key=lambda r: r["pages_per_s"])
+                    results[name]["corpus"] = dataclasses.asdict(spec)
+                    _print_result(name, results[name])
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def _print_result(name: str, result: dict) -> None:
+    stages = ", ".join(
+        f"{stage} p50 {values['p50'] * 1000:.1f} / p95 {values['p95'] * 1000:.1f} ms"
+        for stage, values in sorted(result["stages"].items())
+        if stage not in ("count_pages",)
+    )
+    print(
+        f"{name:>16}: {result['pages_per_s']:7.2f} pages/s  peak RSS {result['max_rss_kb']} KiB\n"
+        f"{'':>18}{stages}"
+    )
+
+
+def environment() -> dict:
+    """Describe the machine a baseline was measured on."""
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save_baseline(path: Path, results: Dict[str, dict], cli_args: Sequence[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    baseline = {
+        "version": BASELINE_VERSION,
+        "environment": environment(),
+        "cli_args": list(cli_args),
+        "scenarios": results,
+    }
+    path.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+
+
+def compare(baseline: dict, results: Dict[str, dict], tolerance: float) -> List[str]:
+    """Print a comparison against `baseline` and return the regressed scenario names."""
+
+    if baseline.get("version") != BASELINE_VERSION:
+        raise SystemExit(f"Unsupported baseline version: {baseline.get('version')!r}")
+    if baseline["environment"] != environment():
+        print(f"Note: baseline was measured on {baseline['environment']}.")
+
+    regressed = []
+    for name, result in results.items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name:>16}: no baseline")
+            continue
+        if base["corpus"] != result["corpus"]:
+            print(f"{name:>16}: corpus differs from the baseline, skipped")
+            continue
+
+        speed = result["pages_per_s"] / base["pages_per_s"]
+        memory = result["max_rss_kb"] / base["max_rss_kb"] if base["max_rss_kb"] else 1.0
+        notes = []
+        if speed < 1 - tolerance:
+            notes.append("THROUGHPUT REGRESSION")
+        if memory > 1 + tolerance:
+            notes.append("MEMORY REGRESSION")
+        if notes:
+            regressed.append(name)
+        print(f"{name:>16}: {speed:5.2f}x pages/s, {memory:5.2f}x peak RSS" + "".join(f"  {n}" for n in notes))
+
+        changes = []
+        for stage, values in sorted(result["stages"].items()):
+            base_p95 = base["stages"].get(stage, {}).get("p95")
+            if base_p95:
+                changes.append(f"{stage} {values['p95'] / base_p95:.2f}x")
+        if changes:
+            print(f"{'':>18}p95: {', '.join(changes)}")
+    return regressed
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    cli_args: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, cli_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpora", nargs="+", choices=sorted(CORPORA), default=sorted(CORPORA))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=["raw", "all"])
+    parser.add_argument("--pages", type=int, default=None, help="Override the page count of every corpus.")
+    parser.add_argument("--words", type=int, default=None, help="Override the words per page of every corpus.")
+    parser.add_argument("--noise", type=float, default=None, help="Override the noise (0-1) of every corpus.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the fastest counts (default: 1).")
+    parser.add_argument(
+        "--correction-latency",
+        type=float,
+        default=50.0,
+        help="Stub correction endpoint latency in ms (default: 50).",
+    )
+    parser.add_argument("--save-baseline", type=Path, default=None, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", type=Path, default=None, help="Compare against this baseline JSON file.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative throughput drop / memory growth before failing (default: 0.2).",
+    )
+    args = parser.parse_args(argv)
+
+    overrides = {
+        field: value
+        for field, value in (("pages", args.pages), ("words_per_page", args.words), ("noise", args.noise))
+        if value is not None
+    }
+    corpora = {name: dataclasses.replace(CORPORA[name], **overrides) for name in args.corpora}
+    results = run_suite(
+        corpora,
+        args.modes,
+        repeat=args.repeat,
+        correction_latency=args.correction_latency / 1000,
+        cli_args=cli_args,
+    )
+
+    if args.save_baseline is not None:
+        save_baseline(args.save_baseline, results, cli_args)
+        print(f"Baseline written to {args.save_baseline}")
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if baseline.get("cli_args", []) != cli_args:
+            print(f"Note: baseline was run with CLI options {baseline.get('cli_args')}.")
+        if compare(baseline, results, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
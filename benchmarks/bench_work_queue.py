@@ -0,0 +1,86 @@
+"""Benchmark: queue-mode throughput as workers are added.
+
+Queues a synthetic corpus (see `synthetic_pdf.CorpusSpec`) in a fresh job
+table, starts N `pdf-ocr-converter queue work --until-empty` processes and
+reports pages per second until the table is drained, for each N in
+`--workers`. With OCR dominating, pages/s should grow close to linearly
+until the cores run out; the speed-up column compares against the first N.
+
+Extra `queue add` options (e.g. `--text-layer auto`) go after `--`.
+
+Usage:
+    python -m benchmarks.bench_work_queue --pages 64 --workers 1 2 4 -- --dpi 150
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional, Sequence
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _cli(args: Sequence[str]) -> List[str]:
+    return [sys.executable, "-m", "pdf_ocr_converter.cli", "queue", *args]
+
+
+def drain_seconds(pdf_path: Path, workers: int, pages_per_item: int, add_args: Sequence[str], tmp: Path) -> float:
+    """Queue `pdf_path` and return the wall time `workers` processes take to convert it."""
+
+    db = tmp / f"jobs-{workers}.sqlite3"
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    subprocess.run(
+        _cli(["add", str(db), str(pdf_path), "--pages-per-item", str(pages_per_item), *add_args]),
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    start = time.perf_counter()
+    procs = [
+        subprocess.Popen(
+            _cli(["work", str(db), "--until-empty", "--poll-interval", "0.2", "--worker-id", f"bench-{n}"]),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for n in range(workers)
+    ]
+    for proc in procs:
+        if proc.wait() != 0:
+            raise RuntimeError(f"queue worker exited with {proc.returncode}")
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=48, help="Pages in the synthetic corpus (default: 48).")
+    parser.add_argument("--words", type=int, default=250, help="Words per page (default: 250).")
+    parser.add_argument("--image-fraction", type=float, default=1.0, help="Share of scanned pages (default: 1).")
+    parser.add_argument("--pages-per-item", type=int, default=4, help="Pages per work item (default: 4).")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to run.")
+    args, add_args = parser.parse_known_args(argv)
+    add_args = [arg for arg in add_args if arg != "--"]
+
+    with tempfile.TemporaryDirectory(prefix="bench-queue-") as tmp:
+        spec = CorpusSpec(pages=args.pages, words_per_page=args.words, image_fraction=args.image_fraction)
+        pdf_path = write_pdf(spec, Path(tmp) / f"{spec.name}.pdf")
+        base = None
+        print(f"{'workers':>8} {'seconds':>9} {'pages/s':>9} {'speed-up':>9}")
+        for workers in args.workers:
+            seconds = drain_seconds(pdf_path, workers, args.pages_per_item, add_args, Path(tmp))
+            rate = args.pages / seconds
+            base = base or rate
+            print(f"{workers:>8} {seconds:>9.2f} {rate:>9.2f} {rate / base:>8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
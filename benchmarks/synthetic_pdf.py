@@ -0,0 +1,239 @@
+"""Offline generator of synthetic PDF corpora for benchmarks.
+
+A corpus is described by a `CorpusSpec`: page count, words per page, noise
+level and the share of image-only pages. Pages are generated from a seeded
+random word list, so the same spec always produces the same file:
+
+- text-layer pages draw their text with the standard Helvetica font, so
+  the PDF carries a real text layer (and renders as clean text);
+- image-only pages embed a JPEG "scan" of the same kind of text, drawn
+  with PIL onto tinted paper and degraded according to `noise` (grain,
+  blur, a few degrees of skew and a dark scanner border).
+
+The PDF is written by hand (a few objects per page), so no extra
+dependency is needed.
+
+Usage:
+    python -m benchmarks.synthetic_pdf out.pdf --pages 100 --words 300 --noise 0.5 --image-fraction 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import io
+import math
+from pathlib import Path
+import random
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# Letter size in PDF points, and the text block inside 1 inch margins.
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+_MARGIN = 72
+_WORDS_PER_LINE = 12
+
+_WORDS = (
+    "the of and to in that was he for it with as his on be at by this had not are but from "
+    "or have an they which one you were her all she there would their we him been has when "
+    "who will more no if out so said what up its about into than them can only other new "
+    "quick brown fox jumps over lazy dog while seven wizards quietly judge boxing matches"
+).split()
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Shape of a synthetic PDF.
+
+    `noise` (0-1) controls how degraded image-only pages are;
+    `image_fraction` (0-1) is the share of pages without a text layer;
+    `dpi` is the resolution of the embedded page images.
+    """
+
+    pages: int = 20
+    words_per_page: int = 250
+    noise: float = 0.3
+    image_fraction: float = 0.5
+    seed: int = 0
+    dpi: int = 150
+
+    @property
+    def name(self) -> str:
+        return (
+            f"p{self.pages}-w{self.words_per_page}-n{self.noise:g}"
+            f"-i{self.image_fraction:g}-s{self.seed}"
+        )
+
+
+def page_lines(rng: random.Random, words: int) -> List[str]:
+    """Return `words` random words as lines of text."""
+
+    chosen = [rng.choice(_WORDS) for _ in range(words)]
+    return [" ".join(chosen[i:i + _WORDS_PER_LINE]) for i in range(0, len(chosen), _WORDS_PER_LINE)]
+
+
+def image_pages(spec: CorpusSpec) -> List[bool]:
+    """Return, per page, whether it is image-only (spread evenly over the document)."""
+
+    count = round(spec.pages * spec.image_fraction)
+    # Bresenham-style spreading: page i is an image page when the running
+    # quota crosses an integer.
+    return [
+        math.floor((i + 1) * count / spec.pages) > math.floor(i * count / spec.pages)
+        for i in range(spec.pages)
+    ]
+
+
+def _layout(line_count: int) -> Tuple[float, float]:
+    """Return `(font_size, leading)` in points that fit `line_count` lines on a page."""
+
+    leading = min(14.0, (PAGE_HEIGHT - 2 * _MARGIN) / max(1, line_count))
+    return leading * 0.8, leading
+
+
+def _text_content(lines: List[str]) -> bytes:
+    font_size, leading = _layout(len(lines))
+    ops = [f"BT /F1 {font_size:.2f} Tf {leading:.2f} TL {_MARGIN} {PAGE_HEIGHT - _MARGIN} Td"]
+    for line in lines:
+        escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        ops.append(f"({escaped}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def scanned_page(lines: List[str], spec: CorpusSpec, rng: random.Random) -> Image.Image:
+    """Draw `lines` the way `_text_content` lays them out, as a degraded grayscale scan."""
+
+    scale = spec.dpi / 72
+    width, height = round(PAGE_WIDTH * scale), round(PAGE_HEIGHT * scale)
+    paper = 255 - round(30 * spec.noise)
+    page = Image.new("L", (width, height), paper)
+
+    font_size, leading = _layout(len(lines))
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", max(1, round(font_size * scale)))
+    except OSError:
+        font = ImageFont.load_default()
+    draw = ImageDraw.Draw(page)
+    for i, line in enumerate(lines):
+        draw.text((_MARGIN * scale, (_MARGIN + i * leading) * scale), line, fill=30, font=font)
+
+    if spec.noise > 0:
+        # Seeded (unlike Image.effect_noise), so files are reproducible.
+        grain = Image.frombytes("L", (width, height), rng.randbytes(width * height))
+        page = Image.blend(page, grain, 0.25 * spec.noise)
+        page = page.filter(ImageFilter.GaussianBlur(0.8 * spec.noise))
+        angle = rng.uniform(-3, 3) * spec.noise
+        page = page.rotate(angle, resample=Image.BICUBIC, fillcolor=40)
+    return page
+
+
+class _PdfWriter:
+    """Just enough of PDF 1.4 to write text and JPEG image pages."""
+
+    def __init__(self) -> None:
+        self.objects: List[bytes] = []
+
+    def add(self, body: bytes) -> int:
+        self.objects.append(body)
+        return len(self.objects)
+
+    def reserve(self) -> int:
+        return self.add(b"")
+
+    def set(self, number: int, body: bytes) -> None:
+        self.objects[number - 1] = body
+
+    @staticmethod
+    def stream(header: str, data: bytes) -> bytes:
+        return f"<< {header} /Length {len(data)} >>\nstream\n".encode("latin-1") + data + b"\nendstream"
+
+    def write(self, path: Path, root: int) -> None:
+        out = io.BytesIO()
+        out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self.objects, start=1):
+            offsets.append(out.tell())
+            out.write(f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+        xref = out.tell()
+        out.write(f"xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+        for offset in offsets:
+            out.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+        out.write(
+            f"trailer\n<< /Size {len(self.objects) + 1} /Root {root} 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n".encode("latin-1")
+        )
+        path.write_bytes(out.getvalue())
+
+
+def write_pdf(spec: CorpusSpec, path: Path) -> Path:
+    """Write the PDF described by `spec` to `path` and return `path`."""
+
+    if spec.pages < 1 or spec.words_per_page < 1:
+        raise ValueError("pages and words_per_page must be >= 1.")
+    if not 0 <= spec.noise <= 1 or not 0 <= spec.image_fraction <= 1:
+        raise ValueError("noise and image_fraction must be between 0 and 1.")
+
+    rng = random.Random(spec.seed)
+    pdf = _PdfWriter()
+    catalog = pdf.reserve()
+    pages_obj = pdf.reserve()
+    font = pdf.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    kids = []
+    for is_image in image_pages(spec):
+        lines = page_lines(rng, spec.words_per_page)
+        if is_image:
+            image = scanned_page(lines, spec, rng)
+            jpeg = io.BytesIO()
+            image.save(jpeg, format="JPEG", quality=75)
+            xobject = pdf.add(
+                pdf.stream(
+                    f"/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+                    "/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /DCTDecode",
+                    jpeg.getvalue(),
+                )
+            )
+            content = pdf.add(pdf.stream("", f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q".encode()))
+            resources = f"<< /XObject << /Im1 {xobject} 0 R >> >>"
+        else:
+            content = pdf.add(pdf.stream("", _text_content(lines)))
+            resources = f"<< /Font << /F1 {font} 0 R >> >>"
+        kids.append(
+            pdf.add(
+                f"<< /Type /Page /Parent {pages_obj} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources {resources} /Contents {content} 0 R >>".encode("latin-1")
+            )
+        )
+
+    pdf.set(catalog, f"<< /Type /Catalog /Pages {pages_obj} 0 R >>".encode("latin-1"))
+    pdf.set(
+        pages_obj,
+        f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>".encode("latin-1"),
+    )
+    pdf.write(path, catalog)
+    return path
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", type=Path, help="PDF file to write.")
+    parser.add_argument("--pages", type=int, default=20, help="Page count (default: 20).")
+    parser.add_argument("--words", type=int, default=250, help="Words per page (default: 250).")
+    parser.add_argument("--noise", type=float, default=0.3, help="Scan degradation, 0-1 (default: 0.3).")
+    parser.add_argument(
+        "--image-fraction", type=float, default=0.5, help="Share of image-only pages, 0-1 (default: 0.5)."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+    parser.add_argument("--dpi", type=int, default=150, help="Resolution of page images (default: 150).")
+    args = parser.parse_args(argv)
+
+    spec = CorpusSpec(args.pages, args.words, args.noise, args.image_fraction, args.seed, args.dpi)
+    write_pdf(spec, args.output)
+    print(f"Wrote {args.output} ({spec.name}).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
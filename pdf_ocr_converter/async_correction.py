@@ -0,0 +1,361 @@
+"""Concurrent (asyncio) OCR correction stage.
+
+`openai_corrector.correct_text_via_openai` is a blocking call, so running it
+inline in the page loop means OCR waits for the API and vice versa. This
+module keeps several completion requests in flight while OCR continues,
+with:
+
+- a bound on concurrent requests,
+- token-bucket limits on requests per minute and tokens per minute,
+- retries with exponential backoff and jitter on 429 / 5xx / network errors,
+- results delivered in input (page) order.
+
+Requests go straight to the REST `/completions` endpoint via the stdlib, so
+the stage can be pointed at a local stub server with `api_base`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import json
+import logging
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, Tuple, TypeVar
+import urllib.error
+import urllib.request
+
+from pdf_ocr_converter.openai_corrector import (
+    PROMPT_TEMPLATE,
+    CorrectionCache,
+    OpenAICorrectOptions,
+    build_prompt,
+    estimate_tokens,
+    split_truncated,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE = "https://api.openai.com/v1"
+
+K = TypeVar("K")
+
+
+class CompletionError(Exception):
+    """A failed completion request."""
+
+    def __init__(self, message: str, *, status: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        """Throttling, server errors and network errors (no status) are retried."""
+
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, *, capacity: Optional[float] = None) -> None:
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be > 0.")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until `amount` tokens are available, then take them.
+
+        Requests larger than the bucket are clamped to its capacity so they
+        can still proceed (after waiting for a full bucket).
+        """
+
+        amount = min(amount, self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    max_retries: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Return the sleep before retry number `attempt` (0-based)."""
+
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            return max(retry_after, backoff)
+        return backoff
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the seconds to wait from a Retry-After header, or None if absent / malformed.
+
+    RFC 9110 allows delay seconds or an HTTP-date.
+    """
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def post_completion(api_base: str, api_key: str, payload: dict, *, timeout: float = 120.0) -> dict:
+    """POST a completion request and return the decoded JSON response.
+
+    Raises:
+        CompletionError: on HTTP or network failure.
+    """
+
+    request = urllib.request.Request(
+        api_base.rstrip("/") + "/completions",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+    except urllib.error.HTTPError as exc:
+        retry_after = exc.headers.get("Retry-After") if exc.headers is not None else None
+        raise CompletionError(
+            f"Completion request failed with HTTP {exc.code}",
+            status=exc.code,
+            retry_after=parse_retry_after(retry_after),
+        ) from exc
+    except (urllib.error.URLError, OSError) as exc:
+        raise CompletionError(f"Completion request failed: {exc}") from exc
+
+
+class AsyncCorrector:
+    """Correct texts concurrently under request/token rate limits."""
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        options: Optional[OpenAICorrectOptions] = None,
+        api_base: str = DEFAULT_API_BASE,
+        max_in_flight: int = 4,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        retry: RetryPolicy = RetryPolicy(),
+        timeout: float = 120.0,
+        cache: Optional[CorrectionCache] = None,
+    ) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be >= 1.")
+
+        self.api_key = api_key
+        self.options = options or OpenAICorrectOptions()
+        self.api_base = api_base
+        self.max_in_flight = max_in_flight
+        self.retry = retry
+        self.timeout = timeout
+        self.cache = cache
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _ensure_setup(self) -> None:
+        # asyncio primitives are created lazily, inside the running loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    async def correct(self, text: str, *, template: str = PROMPT_TEMPLATE) -> str:
+        """Correct one text, retrying throttled / failed requests.
+
+        A correction cut off at `max_tokens` (finish_reason "length") is
+        redone in halves, or the text is kept uncorrected if it cannot be
+        split (see `split_truncated`).
+        """
+
+        if self.cache is not None:
+            cached = self.cache.get(text, self.options, template)
+            if cached is not None:
+                return cached
+
+        if not self.api_key:
+            raise ValueError("OpenAI API key is required for correction.")
+
+        self._ensure_setup()
+        prompt = build_prompt(text, template)
+        payload = {
+            "model": self.options.engine,
+            "prompt": prompt,
+            "max_tokens": self.options.max_tokens,
+            "temperature": self.options.temperature,
+            "n": 1,
+        }
+        # Rate limits count the requested completion budget, not just the prompt.
+        cost = estimate_tokens(prompt) + self.options.max_tokens
+
+        attempt = 0
+        while True:
+            if self.request_bucket is not None:
+                await self.request_bucket.acquire(1)
+            if self.token_bucket is not None:
+                await self.token_bucket.acquire(cost)
+
+            async with self._semaphore:
+                try:
+                    response = await asyncio.to_thread(
+                        post_completion, self.api_base, self.api_key, payload, timeout=self.timeout
+                    )
+                    choice = response["choices"][0]
+                    corrected = choice["text"].strip()
+                    truncated = choice.get("finish_reason") == "length"
+                    break
+                except CompletionError as exc:
+                    if not exc.retryable or attempt >= self.retry.max_retries:
+                        raise
+                    delay = self.retry.delay(attempt, exc.retry_after)
+                    logger.debug("%s; retrying in %.2fs (attempt %d)", exc, delay, attempt + 1)
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+        if truncated:
+            parts = split_truncated(text, template)
+            if parts is None:
+                logger.warning("Correction was cut off at max_tokens; keeping the uncorrected text.")
+                return text
+            return "".join([await self.correct(part, template=template) + joiner for part, joiner in parts])
+
+        if self.cache is not None:
+            self.cache.put(text, self.options, corrected, template)
+        return corrected
+
+    async def correct_stream(
+        self,
+        items: AsyncIterator[Tuple[K, Any]],
+        *,
+        correct: Optional[Callable[[Any], Awaitable[Any]]] = None,
+    ) -> AsyncIterator[Tuple[K, Any]]:
+        """Correct `(key, text)` items concurrently, yielding `(key, corrected)` in input order.
+
+        Items are pulled from `items` while earlier requests are in flight; at
+        most `2 * max_in_flight` items are buffered ahead of the consumer.
+        `correct` replaces `self.correct` for items that are not plain texts
+        (e.g. planned multi-page requests).
+
+        When the stream ends early (error, cancellation, `aclose`), the
+        producer is cancelled and awaited, requests not yet delivered are
+        cancelled and `items` is closed, so nothing keeps pulling pages.
+        """
+
+        if correct is None:
+            correct = self.correct
+
+        self._ensure_setup()
+        pending: asyncio.Queue = asyncio.Queue(maxsize=2 * self.max_in_flight)
+        end = object()
+
+        async def _produce() -> None:
+            async for key, text in items:
+                await pending.put((key, asyncio.ensure_future(correct(text))))
+            await pending.put(end)
+
+        producer = asyncio.ensure_future(_produce())
+        try:
+            while True:
+                if producer.done():
+                    producer.result()  # re-raise a producer failure (e.g. an OCR error)
+                    item = await pending.get()
+                else:
+                    # Wait on the producer too, so its failure is not stuck behind an empty queue.
+                    getter = asyncio.ensure_future(pending.get())
+                    done, _ = await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter not in done:
+                        getter.cancel()
+                        continue
+                    item = getter.result()
+
+                if item is end:
+                    break
+                key, task = item
+                yield key, await task
+        finally:
+            producer.cancel()
+            # Let the producer unwind first: it may be inside `items`, which
+            # cannot be closed while it runs.
+            await asyncio.wait({producer})
+            if not producer.cancelled():
+                producer.exception()  # already raised above, or superseded by the exit reason
+            tasks = []
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not end:
+                    item[1].cancel()
+                    tasks.append(item[1])
+            if tasks:
+                await asyncio.wait(tasks)
+                for task in tasks:
+                    if not task.cancelled():
+                        task.exception()
+            aclose = getattr(items, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+async def aiter_in_thread(iterable: Iterable[K]) -> AsyncIterator[K]:
+    """Iterate a blocking iterable without blocking the event loop.
+
+    Each `next()` runs on a worker thread, one at a time, so a generator is
+    never advanced concurrently. When iteration stops early the iterator is
+    closed, also on a worker thread (closing may block, e.g. while pool
+    chunks are cancelled). A `next()` that is running when the consumer is
+    cancelled cannot be interrupted; the iterator is closed once it returns.
+    """
+
+    iterator = iter(iterable)
+    end = object()
+    step: Optional[asyncio.Future] = None
+    try:
+        while True:
+            step = asyncio.ensure_future(asyncio.to_thread(next, iterator, end))
+            # Shielded, so a cancelled consumer leaves the call running and
+            # waits for it below rather than abandoning it.
+            item = await asyncio.shield(step)
+            step = None
+            if item is end:
+                return
+            yield item
+    finally:
+        if step is not None:
+            await asyncio.wait({step})
+            if not step.cancelled():
+                step.exception()  # the consumer is already unwinding
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await asyncio.to_thread(close)
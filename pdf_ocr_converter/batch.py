@@ -0,0 +1,125 @@
+"""Batch conversion of many PDFs on one shared worker pool.
+
+Converting an inbox one file per process pays interpreter start-up for every
+file and leaves cores idle while each document's last pages finish. Batch
+mode instead runs several documents at once, all feeding the same OCR
+process pool, starting with the smallest documents so they finish first.
+A failure in one document is recorded and the batch carries on.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+import glob
+import logging
+from pathlib import Path
+import time
+from typing import Callable, List, Optional, Sequence
+
+from pdf_ocr_converter.core import create_ocr_pool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DocumentOutcome:
+    """Result of converting one document in a batch."""
+
+    path: Path
+    # File size in bytes; None if the file could not be read.
+    size: Optional[int]
+    seconds: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def expand_inputs(inputs: Sequence[str]) -> List[Path]:
+    """Expand files, directories (searched recursively) and glob patterns into PDF paths.
+
+    Duplicates are dropped; order follows the inputs.
+    """
+
+    paths: List[Path] = []
+    for entry in inputs:
+        path = Path(entry)
+        if path.is_dir():
+            paths.extend(sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() == ".pdf"))
+        elif glob.has_magic(entry):
+            paths.extend(sorted(Path(p) for p in glob.glob(entry, recursive=True) if Path(p).is_file()))
+        else:
+            paths.append(path)
+
+    seen = set()
+    unique = []
+    for path in paths:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def run_batch(
+    pdf_paths: Sequence[Path],
+    convert_document: Callable[[Path, Optional[Executor]], None],
+    *,
+    workers: int = 1,
+    tesseract_cmd: Optional[Path] = None,
+    concurrent_documents: int = 4,
+) -> List[DocumentOutcome]:
+    """Convert every document, returning one outcome per input (smallest first).
+
+    `convert_document(path, executor)` does the per-document work; with
+    `workers > 1` every call receives the same shared OCR pool.
+    """
+
+    sizes = {}
+    outcomes: List[DocumentOutcome] = []
+    for path in pdf_paths:
+        # File size stands in for page count: a stat per file, where counting
+        # pages would run pdfinfo on every input before any work starts.
+        try:
+            sizes[path] = path.stat().st_size
+        except OSError as exc:  # missing / unreadable: report and keep going
+            logger.error("Skipping %s: %s", path, exc)
+            outcomes.append(DocumentOutcome(path, None, 0.0, error=str(exc)))
+
+    # Small documents first: they finish (and free their outputs) early, and
+    # large documents at the end keep the pool busy instead of leaving a tail.
+    ordered = sorted(sizes, key=lambda p: sizes[p])
+
+    pool = create_ocr_pool(workers, tesseract_cmd=tesseract_cmd) if workers > 1 else None
+
+    def _run(path: Path) -> DocumentOutcome:
+        start = time.perf_counter()
+        try:
+            convert_document(path, pool)
+        except Exception as exc:
+            logger.exception("Failed to convert %s", path)
+            return DocumentOutcome(path, sizes[path], time.perf_counter() - start, error=str(exc) or repr(exc))
+        return DocumentOutcome(path, sizes[path], time.perf_counter() - start)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrent_documents)) as documents:
+            futures = [documents.submit(_run, path) for path in ordered]
+            for done, future in enumerate(as_completed(futures), start=1):
+                outcome = future.result()
+                outcomes.append(outcome)
+                logger.info(
+                    "[%d/%d] %s %s (%d bytes, %.1fs)",
+                    done,
+                    len(ordered),
+                    "done" if outcome.ok else "FAILED",
+                    outcome.path,
+                    outcome.size,
+                    outcome.seconds,
+                )
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return outcomes
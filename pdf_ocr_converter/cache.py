@@ -0,0 +1,145 @@
+"""Persistent, size-bounded key/value cache backed by SQLite.
+
+SQLite is part of the Python stdlib and already handles locking between
+processes, so several converter processes (or pool workers) can share one
+cache file safely. Within a process, a `DiskCache` may be used from any
+thread; calls are serialized on an internal lock.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Optional, Union
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Must match the `timeout` passed to `sqlite3.connect`.
+CONNECT_TIMEOUT = 30.0
+
+
+def make_key(*parts: Union[str, bytes, int, float, None]) -> str:
+    """Return a stable hex digest for the given key parts.
+
+    Parts are length-prefixed so that e.g. ("ab", "c") and ("a", "bc") do not
+    collide.
+    """
+
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else repr(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def enable_wal(conn: sqlite3.Connection, *, timeout: float = CONNECT_TIMEOUT) -> None:
+    """Switch `conn`'s database to WAL mode, waiting out other processes doing the same.
+
+    Changing the journal mode can fail with "database is locked" without
+    going through the busy timeout, e.g. when several processes open a new
+    database at once, so it is retried here.
+    """
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            return
+        except sqlite3.OperationalError as exc:
+            if "locked" not in str(exc) or time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+
+
+class DiskCache:
+    """A string cache with least-recently-used eviction above `max_bytes`."""
+
+    def __init__(self, path: Path, *, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be >= 0.")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Autocommit mode; writes use explicit `BEGIN IMMEDIATE` transactions.
+        self._conn = sqlite3.connect(
+            str(path), timeout=CONNECT_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        enable_wal(self._conn)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for `key` (and mark it as recently used)."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """Store `value` under `key`, evicting old entries if over the size cap."""
+
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, size, time.time()),
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC")
+        victims = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def total_bytes(self) -> int:
+        """Return the total size of all cached values, in bytes."""
+
+        with self._lock:
+            return self._total_bytes()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "DiskCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
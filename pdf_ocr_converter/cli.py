@@ -1,42 +1,96 @@
-"""Command-line interface for the OCR converter."""
+"""Command-line interface for the OCR converter.
+
+Stages that only some runs need (the asyncio correction stage, profiling,
+.env loading) are imported where they are used, and `core` defers its
+PDF / OCR imports the same way, so `--help`, argument errors and e.g.
+`--mode raw` runs do not pay for libraries they never use.
+"""
 
 from __future__ import annotations
 
 import argparse
+import contextlib
+from collections import Counter
+from concurrent.futures import Executor
+import dataclasses
+import glob
 import logging
 import os
 from pathlib import Path
-from typing import Optional
-
-from dotenv import load_dotenv
+import sys
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Tuple
 
-from pdf_ocr_converter.core import ConvertOptions, iter_ocr_pages
-from pdf_ocr_converter.diffing import changed_lines, write_page_block
-from pdf_ocr_converter.openai_corrector import correct_text_via_openai
-from pdf_ocr_converter.progress import print_progress_bar
+from pdf_ocr_converter import metrics
+from pdf_ocr_converter.batch import expand_inputs, run_batch
+from pdf_ocr_converter.correction_planner import (
+    CorrectionRequest,
+    PageAssembler,
+    correct_request,
+    correct_request_async,
+    plan_requests,
+)
+from pdf_ocr_converter.core import ConvertOptions, PageResult, iter_page_results
+from pdf_ocr_converter.diffing import DIFF_MODES, changed_lines, format_page_header, write_page_block
+from pdf_ocr_converter.document import PdfDocument
+from pdf_ocr_converter.journal import Journal, JournalMismatchError, PageRecord
+from pdf_ocr_converter.jsonl_output import JsonlWriter, page_entry
+from pdf_ocr_converter.ocr_backends import OCR_BACKENDS
+from pdf_ocr_converter.page_filter import DuplicateIndex
+from pdf_ocr_converter.openai_corrector import CorrectionCache, correct_text_via_openai
+from pdf_ocr_converter.pipeline import Stage, run_stages
+from pdf_ocr_converter.progress import configure_logging, print_progress_bar
+from pdf_ocr_converter.search_index import DocumentIndexer, SearchIndex
+from pdf_ocr_converter.textlayer import TEXT_LAYER_MODES
+from pdf_ocr_converter.tiling import DEFAULT_TILE_THRESHOLD
 from pdf_ocr_converter.ui import select_pdf_file_via_dialog
 
-logger = logging.getLogger(__name__)
+if TYPE_CHECKING:
+    from pdf_ocr_converter.async_correction import AsyncCorrector
 
-
-def _configure_logging(verbose: bool) -> None:
-    logging.basicConfig(
-        level=logging.DEBUG if verbose else logging.INFO,
-        format="%(levelname)s %(name)s: %(message)s",
-    )
+logger = logging.getLogger(__name__)
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="pdf-ocr-converter",
         description="Convert a PDF to text using OCR (optionally correct via OpenAI, optionally diff).",
+        epilog=(
+            "Run 'pdf-ocr-converter serve --help' for the local conversion service and "
+            "'pdf-ocr-converter queue --help' for multi-worker queue mode. Pages indexed with --index "
+            "are searched with 'pdf-ocr-converter search INDEX QUERY'."
+        ),
     )
     parser.add_argument(
         "input",
-        nargs="?",
-        help="Path to a PDF file. If omitted, a file dialog is shown.",
+        nargs="*",
+        help=(
+            "Path to a PDF file. If omitted, a file dialog is shown. Several files, "
+            "directories or glob patterns run in batch mode (see --output-dir)."
+        ),
     )
     parser.add_argument("--dpi", type=int, default=300, help="DPI for PDF rendering (default: 300).")
+    parser.add_argument(
+        "--adaptive-dpi",
+        type=int,
+        default=None,
+        metavar="LOW_DPI",
+        help=(
+            "OCR each page at LOW_DPI first and re-render it at --dpi only when tesseract's "
+            "confidence is low (see --min-confidence / --min-words). Disabled by default."
+        ),
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=80.0,
+        help="Adaptive DPI: escalate pages whose mean word confidence (0-100) is below this (default: 80).",
+    )
+    parser.add_argument(
+        "--min-words",
+        type=int,
+        default=5,
+        help="Adaptive DPI: escalate pages with fewer recognized words than this (default: 5).",
+    )
     parser.add_argument("--first-page", type=int, default=1, help="First page to process (1-indexed).")
     parser.add_argument("--last-page", type=int, default=None, help="Last page to process (1-indexed).")
     parser.add_argument(
@@ -55,7 +109,108 @@ def build_parser() -> argparse.ArgumentParser:
         "--ocr-lang",
         type=str,
         default=None,
-        help="Tesseract language code (e.g. 'eng').",
+        help=(
+            "Tesseract language code (e.g. 'eng'). 'auto' detects each page's script and rotation "
+            "first and OCRs the upright page with that script's language only; 'auto:eng+deu+rus' "
+            "chooses among the given languages."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for page rendering + OCR (default: 1).",
+    )
+    parser.add_argument(
+        "--render-chunk-size",
+        type=int,
+        default=16,
+        help="Pages rendered per poppler invocation (default: 16).",
+    )
+    parser.add_argument(
+        "--ocr-threads",
+        type=int,
+        default=1,
+        help="Without --workers: OCR threads fed by the in-process render stage (default: 1).",
+    )
+    parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=4,
+        help="Pages buffered between pipeline stages (render, OCR, correction) (default: 4).",
+    )
+    parser.add_argument(
+        "--max-image-mb",
+        type=int,
+        default=256,
+        help="Ceiling on rendered page images waiting for OCR, in MiB (default: 256).",
+    )
+    parser.add_argument(
+        "--text-layer",
+        choices=TEXT_LAYER_MODES,
+        default="never",
+        help=(
+            "Use the PDF's embedded text instead of OCR: 'auto' OCRs only pages whose "
+            "text layer is missing or looks broken, 'only' never OCRs (default: never)."
+        ),
+    )
+    parser.add_argument(
+        "--preprocess",
+        action="store_true",
+        help=(
+            "Clean up page images before OCR: grayscale, adaptive binarization, deskew and "
+            "margin/border cropping (requires numpy)."
+        ),
+    )
+    parser.add_argument(
+        "--skip-blank",
+        action="store_true",
+        help="Do not OCR rendered pages without ink (blank separator pages); they get empty text.",
+    )
+    parser.add_argument(
+        "--skip-duplicates",
+        action="store_true",
+        help=(
+            "Do not OCR rendered pages that are near-duplicates of a page already OCR'd in the same "
+            "document (or batch); they reuse that page's text."
+        ),
+    )
+    parser.add_argument(
+        "--tile-threshold-mp",
+        type=float,
+        default=DEFAULT_TILE_THRESHOLD / 1_000_000,
+        help=(
+            "OCR page images larger than this many megapixels in overlapping horizontal strips, in "
+            "parallel (0 disables) (default: %(default)g)."
+        ),
+    )
+    parser.add_argument(
+        "--tile-threads",
+        type=int,
+        default=None,
+        help="Threads OCR'ing the strips of a large page (default: CPU count / pages OCR'd at once).",
+    )
+    parser.add_argument(
+        "--ocr-backend",
+        choices=OCR_BACKENDS,
+        default="subprocess",
+        help=(
+            "OCR engine: 'subprocess' runs one tesseract process per page (pytesseract); "
+            "'tesserocr' keeps a warm in-process engine per worker (requires the tesserocr "
+            "package) (default: subprocess)."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Folder for persistent OCR and correction result caches (disabled if omitted).",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=256,
+        help="Size cap per cache in MiB; least recently used entries are evicted (default: 256).",
     )
     parser.add_argument(
         "--mode",
@@ -63,9 +218,102 @@ def build_parser() -> argparse.ArgumentParser:
         default="raw",
         help="Output mode.",
     )
+    parser.add_argument(
+        "--diff-mode",
+        choices=DIFF_MODES,
+        default="ndiff",
+        help=(
+            "Diff output: 'ndiff' (same lines as difflib.ndiff), 'lines' (line-level only, fastest "
+            "on long noisy pages) or 'words' (changed word runs) (default: ndiff)."
+        ),
+    )
+    parser.add_argument(
+        "--correction-concurrency",
+        type=int,
+        default=1,
+        help=(
+            "Correction requests kept in flight. Above 1, corrections run on an asyncio stage "
+            "that overlaps with OCR (default: 1, inline blocking calls)."
+        ),
+    )
+    parser.add_argument(
+        "--batch-correction",
+        action="store_true",
+        help=(
+            "Plan correction requests by token budget: split dense pages at paragraph "
+            "boundaries and pack small pages into one request."
+        ),
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Correction request limit per minute (concurrent stage only).",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=None,
+        help="Correction token limit per minute, prompt + max_tokens (concurrent stage only).",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Retries on HTTP 429 / 5xx for the concurrent correction stage (default: 5).",
+    )
+    parser.add_argument(
+        "--api-base",
+        default=None,
+        help=(
+            "Completion API base URL for the concurrent correction stage "
+            "(default: $OPENAI_API_BASE, else https://api.openai.com/v1)."
+        ),
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="output",
+        help="Batch mode: folder receiving one sub-folder of outputs per document (default: output).",
+    )
+    parser.add_argument(
+        "--concurrent-documents",
+        type=int,
+        default=4,
+        help="Batch mode: documents converted at once on the shared worker pool (default: 4).",
+    )
     parser.add_argument("--raw-out", default="output_raw.txt", help="Raw text output file.")
     parser.add_argument("--corrected-out", default="output_corrected.txt", help="Corrected text output file.")
     parser.add_argument("--diff-out", default="output_diff.txt", help="Diff output file.")
+    parser.add_argument(
+        "--format",
+        choices=("text", "jsonl"),
+        default="text",
+        help=(
+            "'text' writes the raw / corrected / diff files; 'jsonl' writes one JSON object per page "
+            "(outputs, text source, DPI, stage timings) to --jsonl-out plus a binary page-offset "
+            "index (default: text)."
+        ),
+    )
+    parser.add_argument("--jsonl-out", default="output.jsonl", help="JSON-lines output file (--format jsonl).")
+    parser.add_argument(
+        "--index",
+        default=None,
+        metavar="INDEX_DB",
+        help=(
+            "Add each page's raw text to this full-text search index as it completes, replacing "
+            "the document's earlier rows for the converted pages (see 'pdf-ocr-converter search')."
+        ),
+    )
+    parser.add_argument(
+        "--journal",
+        default="output_journal.jsonl",
+        help="Checkpoint journal of completed pages, deleted after a successful run.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run from its journal instead of starting over.",
+    )
     parser.add_argument(
         "--no-progress",
         action="store_true",
@@ -76,9 +324,31 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Enable debug logs.",
     )
+    parser.add_argument(
+        "--metrics-out",
+        default=None,
+        metavar="REPORT_JSON",
+        help=(
+            "Write per-page, per-stage wall time, CPU time and bytes (count, render, OCR, "
+            "correction, diff, write) plus p50/p95/max summaries to this JSON file."
+        ),
+    )
+    parser.add_argument(
+        "--profile-out",
+        default=None,
+        metavar="PROFILE",
+        help=(
+            "Profile the whole run with cProfile and dump the stats to this file (all threads of "
+            "this process, not --workers pool processes; inspect with `python -m pstats PROFILE`)."
+        ),
+    )
     return parser
 
 
+def _is_batch_input(input_arg: str) -> bool:
+    return Path(input_arg).is_dir() or glob.has_magic(input_arg)
+
+
 def _resolve_input_path(input_arg: Optional[str]) -> Path:
     if input_arg:
         return Path(input_arg)
@@ -89,66 +359,466 @@ def _resolve_input_path(input_arg: Optional[str]) -> Path:
     return selected
 
 
-def main(argv: Optional[list[str]] = None) -> int:
-    parser = build_parser()
-    args = parser.parse_args(argv)
+def _run_info(pdf_path: Path, args: argparse.Namespace) -> dict:
+    """Describe a run for the journal; a resume must match it exactly."""
 
-    _configure_logging(args.verbose)
-    load_dotenv()  # allow OPENAI_API_KEY from a local .env
+    stat = pdf_path.stat()
+    return {
+        "input": str(pdf_path.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "mode": args.mode,
+        "dpi": args.dpi,
+        "adaptive_dpi": args.adaptive_dpi,
+        "first_page": args.first_page,
+        "last_page": args.last_page,
+        "ocr_lang": args.ocr_lang,
+        "text_layer": args.text_layer,
+        "preprocess": args.preprocess,
+        "diff_mode": args.diff_mode,
+        "skip_blank": args.skip_blank,
+        "skip_duplicates": args.skip_duplicates,
+        "tile_threshold_mp": args.tile_threshold_mp,
+    }
 
-    pdf_path = _resolve_input_path(args.input)
-    if not pdf_path.exists():
-        raise SystemExit(f"Input PDF does not exist: {pdf_path}")
 
-    options = ConvertOptions(
+def _write_page_record(record: PageRecord, raw_fp, corrected_fp, diff_fp) -> None:
+    """Append one page's blocks to whichever output files are open."""
+
+    header = "\n" + format_page_header(record.page_number) + "\n"
+    if raw_fp is not None and record.raw is not None:
+        raw_fp.write(header)
+        raw_fp.write(record.raw)
+    if corrected_fp is not None and record.corrected is not None:
+        corrected_fp.write(header)
+        corrected_fp.write(record.corrected)
+    if diff_fp is not None and record.diff is not None:
+        write_page_block(diff_fp, record.page_number, record.diff)
+
+
+async def _correct_concurrently(
+    results: Iterable[PageResult],
+    corrector: AsyncCorrector,
+    finish_page: Callable[[PageResult, Optional[str]], None],
+    *,
+    batch: bool = False,
+) -> None:
+    """Overlap OCR with correction requests, finishing pages in order."""
+
+    from pdf_ocr_converter.async_correction import aiter_in_thread
+
+    if not batch:
+        async def _correct_page(result: PageResult) -> str:
+            with metrics.timed("correct", result.page_number, nbytes=metrics.text_nbytes(result.text), cpu=False):
+                return await corrector.correct(result.text)
+
+        pages = aiter_in_thread(results)
+        try:
+            items = ((result, result) async for result in pages)
+            async for result, corrected_text in corrector.correct_stream(items, correct=_correct_page):
+                finish_page(result, corrected_text)
+        finally:
+            # Closing `items` does not reach the thread-backed iterator.
+            await pages.aclose()
+        return
+
+    async def _correct_planned(request: CorrectionRequest) -> List[str]:
+        first_page, pages = _request_pages(request)
+        with metrics.timed("correct", first_page, nbytes=metrics.text_nbytes(request.text), pages=pages, cpu=False):
+            return await correct_request_async(
+                request, lambda text, template: corrector.correct(text, template=template)
+            )
+
+    # Planning pulls pages from OCR, so it runs on the worker thread too.
+    requests = aiter_in_thread(plan_requests((result, result.text) for result in results))
+    assembler = PageAssembler()
+    try:
+        items = ((request, request) async for request in requests)
+        async for request, corrected_parts in corrector.correct_stream(items, correct=_correct_planned):
+            for result, corrected_text in assembler.add(request, corrected_parts):
+                finish_page(result, corrected_text)
+    finally:
+        await requests.aclose()
+
+
+def _request_pages(request: CorrectionRequest) -> Tuple[int, int]:
+    """Return the first page number and the page count of a planned request."""
+
+    page_numbers = {segment.key.page_number for segment in request.segments}
+    return min(page_numbers), len(page_numbers)
+
+
+def _describe_skipped(result: PageResult, pdf_path: Path) -> str:
+    if result.duplicate_of is None:
+        return f"{result.page_number} ({result.source})"
+    original = result.duplicate_of
+    if original.document == str(pdf_path):
+        return f"{result.page_number} (duplicate of page {original.page_number})"
+    return f"{result.page_number} (duplicate of {Path(original.document).name} page {original.page_number})"
+
+
+def _convert_options(args: argparse.Namespace) -> ConvertOptions:
+    return ConvertOptions(
         dpi=args.dpi,
         first_page=args.first_page,
         last_page=args.last_page,
         poppler_path=Path(args.poppler_path) if args.poppler_path else None,
         tesseract_cmd=Path(args.tesseract_cmd) if args.tesseract_cmd else None,
         ocr_lang=args.ocr_lang,
+        workers=args.workers,
+        render_chunk_size=args.render_chunk_size,
+        text_layer=args.text_layer,
+        cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        ocr_backend=args.ocr_backend,
+        adaptive_dpi=args.adaptive_dpi,
+        min_confidence=args.min_confidence,
+        min_words=args.min_words,
+        preprocess=args.preprocess,
+        ocr_threads=args.ocr_threads,
+        queue_depth=args.queue_depth,
+        max_image_bytes=args.max_image_mb * 1024 * 1024,
+        skip_blank=args.skip_blank,
+        skip_duplicates=args.skip_duplicates,
+        tile_threshold=round(args.tile_threshold_mp * 1_000_000),
+        tile_threads=args.tile_threads,
     )
 
+
+def _convert_document(
+    pdf_path: Path,
+    args: argparse.Namespace,
+    *,
+    raw_out: Path,
+    corrected_out: Path,
+    diff_out: Path,
+    jsonl_out: Path,
+    journal_path: Path,
+    executor: Optional[Executor] = None,
+    duplicates: Optional[DuplicateIndex] = None,
+    show_progress: bool = True,
+    page_timings: bool = True,
+    search_index: Optional[SearchIndex] = None,
+) -> None:
+    """Convert one PDF and write its output files (per `args.mode` and `args.format`).
+
+    `executor`, `duplicates` and `search_index` are shared across the
+    documents of a batch.
+    `page_timings` adds each page's stage timings to JSON-lines output; it
+    must be off while several documents share the metrics recorder, whose
+    records are keyed by page number only.
+    """
+
+    options = _convert_options(args)
+
     want_raw = args.mode in ("raw", "all")
     want_corrected = args.mode in ("corrected", "all")
     want_diff = args.mode in ("diff", "all")
 
+    journal = Journal(journal_path, _run_info(pdf_path, args), resume=args.resume)
+
     # Open outputs only as needed.
-    raw_fp = open(args.raw_out, "w", encoding="utf-8") if want_raw else None
-    corrected_fp = open(args.corrected_out, "w", encoding="utf-8") if want_corrected else None
-    diff_fp = open(args.diff_out, "w", encoding="utf-8") if want_diff else None
+    jsonl = JsonlWriter(jsonl_out) if args.format == "jsonl" else None
+    text_output = jsonl is None
+    raw_fp = open(raw_out, "w", encoding="utf-8") if want_raw and text_output else None
+    corrected_fp = open(corrected_out, "w", encoding="utf-8") if want_corrected and text_output else None
+    diff_fp = open(diff_out, "w", encoding="utf-8") if want_diff and text_output else None
+    correction_cache: Optional[CorrectionCache] = None
+    document: Optional[PdfDocument] = None
+    indexer: Optional[DocumentIndexer] = None
 
     try:
+        # Parsed once for the page count (on resume) and the conversion.
+        document = PdfDocument(pdf_path)
+
+        # Pages completed by an earlier run are replayed from the journal, so
+        # the output files end up byte-identical to an uninterrupted run.
+        for record in journal.records:
+            _write_page_record(record, raw_fp, corrected_fp, diff_fp)
+            if jsonl is not None:
+                jsonl.write(page_entry(record))
+
+        pages_done = len(journal.records)
+        finished = False
+        if journal.next_page is not None:
+            logger.info("Resuming after page %d (%d pages already done).", journal.next_page - 1, pages_done)
+            finished = journal.next_page > (options.last_page or document.page_count)
+            options = dataclasses.replace(options, first_page=journal.next_page)
+
+        if search_index is not None:
+            # Only the pages converted now are replaced; replayed pages are
+            # re-added from the journal when it kept their text.
+            indexer = search_index.document(pdf_path, first_page=options.first_page, last_page=options.last_page)
+            for record in journal.records:
+                text = record.raw if record.raw is not None else record.corrected
+                if text is not None:
+                    indexer.add(record.page_number, text)
+
         def _progress(i: int, total: int) -> None:
-            if not args.no_progress:
-                print_progress_bar(i, total)
+            if show_progress:
+                print_progress_bar(pages_done + i, pages_done + total)
 
         api_key = os.getenv("OPENAI_API_KEY", "")
+        want_correction = want_corrected or want_diff
+        if want_correction and options.cache_dir is not None:
+            correction_cache = CorrectionCache(
+                options.cache_dir / "corrections.sqlite3", max_bytes=options.cache_max_bytes
+            )
+
+        pages_by_dpi: Counter = Counter()
+        skipped: List[str] = []
+
+        def _finish_page(result: PageResult, corrected_text: Optional[str]) -> None:
+            page_number, raw_text = result.page_number, result.text
+            logger.debug("Page %d: text from %s (dpi %s)", page_number, result.source, result.dpi)
+            if result.dpi is not None and result.source != "duplicate":
+                pages_by_dpi[result.dpi] += 1
+            if result.source in ("blank", "duplicate"):
+                skipped.append(_describe_skipped(result, pdf_path))
+                metrics.current().skip(
+                    str(pdf_path),
+                    page_number,
+                    result.source,
+                    duplicate_of=dataclasses.asdict(result.duplicate_of) if result.duplicate_of else None,
+                )
+
+            diff = None
+            if want_diff:
+                nbytes = metrics.text_nbytes(raw_text) + metrics.text_nbytes(corrected_text)
+                with metrics.timed("diff", page_number, nbytes=nbytes):
+                    diff = changed_lines(raw_text, corrected_text, mode=args.diff_mode)
 
-        for page_number, raw_text in iter_ocr_pages(pdf_path, options, progress_cb=_progress):
-            if want_raw and raw_fp is not None:
-                raw_fp.write(f"\n*********** PAGE {page_number} ***********\n")
-                raw_fp.write(raw_text)
+            record = PageRecord(
+                page_number,
+                raw=raw_text if want_raw else None,
+                corrected=corrected_text if want_corrected else None,
+                diff=diff,
+            )
+            with metrics.timed("write", page_number) as span:
+                journal.record(record)
+                _write_page_record(record, raw_fp, corrected_fp, diff_fp)
+                if indexer is not None:
+                    indexer.add(page_number, raw_text)
+                if jsonl is not None:
+                    jsonl.write(
+                        page_entry(
+                            record,
+                            source=result.source,
+                            dpi=result.dpi,
+                            duplicate_of=dataclasses.asdict(result.duplicate_of) if result.duplicate_of else None,
+                            timings=metrics.current().page_times(page_number) if page_timings else None,
+                        )
+                    )
+                span.nbytes = sum(
+                    metrics.text_nbytes(text) for text in (record.raw, record.corrected)
+                ) + sum(metrics.text_nbytes(line) + 1 for line in record.diff or ())
 
-            corrected_text = None
-            if want_corrected or want_diff:
-                corrected_text = correct_text_via_openai(raw_text, api_key=api_key)
+        results = () if finished else iter_page_results(
+            document, options, progress_cb=_progress, executor=executor, duplicates=duplicates
+        )
+        if want_correction and args.correction_concurrency > 1:
+            import asyncio
 
-            if want_corrected and corrected_fp is not None and corrected_text is not None:
-                corrected_fp.write(f"\n*********** PAGE {page_number} ***********\n")
-                corrected_fp.write(corrected_text)
+            from pdf_ocr_converter.async_correction import DEFAULT_API_BASE, AsyncCorrector, RetryPolicy
 
-            if want_diff and diff_fp is not None and corrected_text is not None:
-                lines = changed_lines(raw_text, corrected_text)
-                write_page_block(diff_fp, page_number, lines)
+            corrector = AsyncCorrector(
+                api_key,
+                api_base=args.api_base or os.getenv("OPENAI_API_BASE", DEFAULT_API_BASE),
+                max_in_flight=args.correction_concurrency,
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                retry=RetryPolicy(max_retries=args.max_retries),
+                cache=correction_cache,
+            )
+            asyncio.run(
+                _correct_concurrently(results, corrector, _finish_page, batch=args.batch_correction)
+            )
+        elif want_correction and args.batch_correction:
+            def _correct(text: str, template: str) -> str:
+                return correct_text_via_openai(
+                    text, api_key=api_key, cache=correction_cache, template=template
+                )
 
-        if not args.no_progress:
+            assembler = PageAssembler()
+            for request in plan_requests((result, result.text) for result in results):
+                first_page, pages = _request_pages(request)
+                with metrics.timed("correct", first_page, nbytes=metrics.text_nbytes(request.text), pages=pages):
+                    corrected_parts = correct_request(request, _correct)
+                for result, corrected_text in assembler.add(request, corrected_parts):
+                    _finish_page(result, corrected_text)
+        elif want_correction:
+            # Correct on a pipeline stage, so OCR of the next pages overlaps
+            # the API call; writing stays on this thread, in page order.
+            def _correct_page(result: PageResult):
+                with metrics.timed("correct", result.page_number, nbytes=metrics.text_nbytes(result.text)):
+                    corrected_text = correct_text_via_openai(result.text, api_key=api_key, cache=correction_cache)
+                return result, corrected_text
+
+            stages = [Stage("correct", _correct_page, queue_depth=args.queue_depth)]
+            for result, corrected_text in run_stages(results, stages):
+                _finish_page(result, corrected_text)
+        else:
+            for result in results:
+                _finish_page(result, None)
+
+        if show_progress:
             print()  # newline after progress bar
-        return 0
+        if skipped:
+            logger.info("Skipped OCR for %d pages: %s.", len(skipped), ", ".join(skipped))
+        if options.adaptive_dpi is not None:
+            logger.info(
+                "Adaptive DPI: %s.",
+                ", ".join(f"{count} pages at {dpi} DPI" for dpi, count in sorted(pages_by_dpi.items())) or "no OCR pages",
+            )
+        if correction_cache is not None:
+            stats = correction_cache.stats
+            logger.info(
+                "Correction cache: %d hits, %d misses, ~%d tokens saved.",
+                stats.hits,
+                stats.misses,
+                stats.tokens_saved,
+            )
+    except BaseException:
+        journal.close()
+        raise
     finally:
-        for fp in (raw_fp, corrected_fp, diff_fp):
+        for fp in (raw_fp, corrected_fp, diff_fp, jsonl):
             if fp is not None:
                 fp.close()
+        if correction_cache is not None:
+            correction_cache.close()
+        if document is not None:
+            document.close()
+        if indexer is not None:
+            indexer.close()
+
+    journal.discard()
+
+
+def _run_batch(inputs: list[str], args: argparse.Namespace) -> int:
+    pdf_paths = expand_inputs(inputs)
+    if not pdf_paths:
+        raise SystemExit("No PDF files matched the given inputs.")
+
+    output_dir = Path(args.output_dir)
+    # One folder per document, holding the usual output file names; documents
+    # sharing a file name (from different folders) get numbered folders.
+    doc_dirs: dict[Path, Path] = {}
+    used: set[str] = set()
+    for pdf_path in pdf_paths:
+        name, n = pdf_path.stem, 1
+        while name in used:
+            n += 1
+            name = f"{pdf_path.stem}-{n}"
+        used.add(name)
+        doc_dirs[pdf_path] = output_dir / name
+
+    # One index for the whole batch, so repeated sheets are found across documents.
+    duplicates = DuplicateIndex() if args.skip_duplicates else None
+
+    def _convert(pdf_path: Path, executor: Optional[Executor]) -> None:
+        doc_dir = doc_dirs[pdf_path]
+        doc_dir.mkdir(parents=True, exist_ok=True)
+        _convert_document(
+            pdf_path,
+            args,
+            raw_out=doc_dir / Path(args.raw_out).name,
+            corrected_out=doc_dir / Path(args.corrected_out).name,
+            diff_out=doc_dir / Path(args.diff_out).name,
+            jsonl_out=doc_dir / Path(args.jsonl_out).name,
+            journal_path=doc_dir / Path(args.journal).name,
+            executor=executor,
+            duplicates=duplicates,
+            show_progress=False,
+            page_timings=args.concurrent_documents <= 1,
+            search_index=search_index,
+        )
+
+    search_index = SearchIndex(Path(args.index)) if args.index else None
+    try:
+        outcomes = run_batch(
+            pdf_paths,
+            _convert,
+            # No OCR pool when pages come from the text layer only.
+            workers=1 if args.text_layer == "only" else args.workers,
+            tesseract_cmd=Path(args.tesseract_cmd) if args.tesseract_cmd else None,
+            concurrent_documents=args.concurrent_documents,
+        )
+    finally:
+        if search_index is not None:
+            search_index.close()
+    failed = [outcome for outcome in outcomes if not outcome.ok]
+    logger.info("Batch finished: %d converted, %d failed.", len(outcomes) - len(failed), len(failed))
+    for outcome in failed:
+        logger.error("  %s: %s", outcome.path, outcome.error)
+    return 1 if failed else 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["serve"]:
+        from pdf_ocr_converter import server
+
+        return server.main(argv[1:])
+    if argv[:1] == ["queue"]:
+        from pdf_ocr_converter import work_queue
+
+        return work_queue.main(argv[1:])
+    if argv[:1] == ["search"]:
+        from pdf_ocr_converter import search_index
+
+        return search_index.main(argv[1:])
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    configure_logging(args.verbose)
+    from dotenv import load_dotenv
+
+    load_dotenv()  # allow OPENAI_API_KEY from a local .env
+
+    # JSON-lines output takes its per-page timings from the recorder.
+    recorder = metrics.MetricsRecorder() if args.metrics_out or args.format == "jsonl" else None
+    profiler = metrics.profile(Path(args.profile_out)) if args.profile_out else contextlib.nullcontext()
+    try:
+        with profiler, metrics.use(recorder):
+            return _run(args)
+    finally:
+        if args.profile_out:
+            logger.info("Profile written to %s", args.profile_out)
+        if args.metrics_out:
+            recorder.write_report(Path(args.metrics_out), inputs=args.input, mode=args.mode, workers=args.workers)
+            logger.info("Metrics written to %s", args.metrics_out)
+
+
+def _run(args: argparse.Namespace) -> int:
+    if len(args.input) > 1 or (args.input and _is_batch_input(args.input[0])):
+        return _run_batch(args.input, args)
+
+    pdf_path = _resolve_input_path(args.input[0] if args.input else None)
+    if not pdf_path.exists():
+        raise SystemExit(f"Input PDF does not exist: {pdf_path}")
+
+    search_index = SearchIndex(Path(args.index)) if args.index else None
+    try:
+        _convert_document(
+            pdf_path,
+            args,
+            raw_out=Path(args.raw_out),
+            corrected_out=Path(args.corrected_out),
+            diff_out=Path(args.diff_out),
+            jsonl_out=Path(args.jsonl_out),
+            journal_path=Path(args.journal),
+            show_progress=not args.no_progress,
+            search_index=search_index,
+        )
+    except JournalMismatchError as exc:
+        raise SystemExit(str(exc))
+    finally:
+        if search_index is not None:
+            search_index.close()
+    return 0
 
 
 if __name__ == "__main__":
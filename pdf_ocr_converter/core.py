@@ -2,21 +2,53 @@
 
 This module intentionally does not introduce new third-party dependencies; it
 reuses the libraries already present in `requirements.txt`.
+
+PyPDF2, pdf2image, Pillow and the OCR engines are imported inside the
+functions that use them, so importing this module is cheap and a run only
+loads the stages it needs (e.g. `text_layer="only"` never loads tesseract
+bindings or the renderer).
 """
 
 from __future__ import annotations
 
+from collections import Counter, deque
+from concurrent.futures import Executor
+import dataclasses
 from dataclasses import dataclass
+import hashlib
+import importlib
+import json
 import logging
+import os
 from pathlib import Path
-from typing import Callable, Iterator, Optional, Sequence, Tuple
+import tempfile
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from pdf_ocr_converter import metrics
+from pdf_ocr_converter.cache import DEFAULT_MAX_BYTES, DiskCache, make_key
+from pdf_ocr_converter.document import PageInfo, PdfDocument
+from pdf_ocr_converter.language import LanguageChooser, PageLanguage, auto_candidates, detect_orientation, upright
+from pdf_ocr_converter.ocr_backends import backend_class, get_backend, set_tesseract_cmd
+from pdf_ocr_converter.page_filter import (
+    DEFAULT_BLANK_MAX_INK,
+    DEFAULT_DUPLICATE_MAX_DIFFERENCE,
+    DuplicateIndex,
+    PageFingerprint,
+    PageRef,
+    fingerprint,
+    is_blank,
+)
+from pdf_ocr_converter.pipeline import MemoryBudget, Stage, run_stages
+from pdf_ocr_converter.textlayer import TEXT_LAYER_MODES, extract_page_text, is_usable_text
+from pdf_ocr_converter.tiling import DEFAULT_TILE_THRESHOLD, ocr_tiled
 
-import PyPDF2
-from pdf2image import convert_from_path
-import pytesseract
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_IMAGE_BYTES = 256 * 1024 * 1024
+
 
 @dataclass(frozen=True)
 class ConvertOptions:
@@ -28,14 +60,194 @@ class ConvertOptions:
     poppler_path: Optional[Path] = None
     tesseract_cmd: Optional[Path] = None
     ocr_lang: Optional[str] = None
+    workers: int = 1
+    render_chunk_size: int = 16
+    text_layer: str = "never"
+    cache_dir: Optional[Path] = None
+    cache_max_bytes: int = DEFAULT_MAX_BYTES
+    ocr_backend: str = "subprocess"
+    # Adaptive DPI: OCR at `adaptive_dpi` first and re-render at `dpi` only
+    # when the words' mean confidence or the word count is below threshold.
+    adaptive_dpi: Optional[int] = None
+    min_confidence: float = 80.0
+    min_words: int = 5
+    # Clean up page images (grayscale, binarize, deskew, crop) before OCR;
+    # requires NumPy.
+    preprocess: bool = False
+    # Staged (single-process) pipeline: OCR threads, queue depth between
+    # render and OCR, and the ceiling on rendered page images in flight.
+    ocr_threads: int = 1
+    queue_depth: int = 4
+    max_image_bytes: int = DEFAULT_MAX_IMAGE_BYTES
+    # Skip OCR for rendered pages that are blank (ink coverage) or
+    # near-duplicates of pages already OCR'd (see `page_filter`).
+    skip_blank: bool = False
+    skip_duplicates: bool = False
+    blank_max_ink: float = DEFAULT_BLANK_MAX_INK
+    duplicate_max_difference: float = DEFAULT_DUPLICATE_MAX_DIFFERENCE
+    # OCR page images above `tile_threshold` pixels (0: never) in
+    # overlapping strips on `tile_threads` threads (default: the CPU count
+    # divided by the number of pages OCR'd at once); see `tiling`.
+    tile_threshold: int = DEFAULT_TILE_THRESHOLD
+    tile_threads: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class PageResult:
+    """Text for one page plus how it was produced.
+
+    `source` is "ocr" when the page was rendered and OCR'd, "text-layer" when
+    the PDF's embedded text was used instead, or "cache" when the OCR text
+    came from the on-disk OCR cache. Pages skipped before OCR are "blank"
+    (empty text) or "duplicate" (the text of the page in `duplicate_of`).
+    `dpi` is the resolution the OCR text was produced at (None for
+    text-layer pages).
+    """
+
+    page_number: int
+    text: str
+    source: str = "ocr"
+    dpi: Optional[int] = None
+    duplicate_of: Optional[PageRef] = None
 
 
 def count_pdf_pages(pdf_path: Path) -> int:
-    """Return the number of pages in a PDF."""
+    """Return the number of pages in a PDF.
+
+    To count pages and then convert, open a `PdfDocument` once and pass it
+    to `iter_page_results` instead.
+    """
+
+    with PdfDocument(pdf_path) as document:
+        return document.page_count
+
+
+# Page keys that can change a page's pixels; `/Contents` is hashed decoded.
+_RENDERED_PAGE_KEYS = ("/Resources", "/Annots", "/Group", "/UserUnit")
+# Back-references to parents; following them would hash the whole file.
+_SKIPPED_KEYS = frozenset(("/Parent", "/P"))
+
+
+def page_fingerprint(page) -> str:
+    """Return a digest of the parts of a PyPDF2 page that determine its pixels.
+
+    This covers the (decoded) content stream, the crop box poppler renders,
+    the rotation, and the complete object graph of the page's resources and
+    annotations: every font (dictionary, encoding, widths and embedded font
+    program), image, form XObject, graphics state, pattern, shading and
+    colour space, with streams hashed as raw (still encoded) data. Two pages
+    therefore hash equal only when all of their rendering inputs are equal,
+    regardless of which file they come from. It is much cheaper than
+    rendering: no stream is decoded except the content.
+    """
+
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+
+    digest = hashlib.sha256()
+    # Shared objects (fonts, images) are hashed once; later uses hash a back
+    # reference by order of first visit, which is stable across files.
+    seen: Dict[Tuple[int, int], int] = {}
+
+    def _feed(obj) -> None:
+        if isinstance(obj, IndirectObject):
+            ref = (obj.idnum, obj.generation)
+            if ref in seen:
+                digest.update(f"@{seen[ref]};".encode("utf-8"))
+                return
+            seen[ref] = len(seen)
+            obj = obj.get_object()
+        if isinstance(obj, DictionaryObject):
+            digest.update(b"<<")
+            for key in sorted(obj):
+                if key in _SKIPPED_KEYS or (isinstance(obj, StreamObject) and key == "/Length"):
+                    continue
+                digest.update(key.encode("utf-8"))
+                _feed(obj.raw_get(key))
+            digest.update(b">>")
+            if isinstance(obj, StreamObject):
+                data = getattr(obj, "_data", b"") or b""
+                digest.update(f"stream{len(data)};".encode("utf-8"))
+                digest.update(data)
+        elif isinstance(obj, ArrayObject):
+            digest.update(b"[")
+            for item in obj:
+                _feed(item)
+            digest.update(b"]")
+        else:
+            digest.update(repr(obj).encode("utf-8"))
+            digest.update(b";")
+
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    digest.update(repr([float(v) for v in page.cropbox]).encode("utf-8"))
+    digest.update(repr(page.get("/Rotate", 0)).encode("utf-8"))
+    for key in _RENDERED_PAGE_KEYS:
+        digest.update(key.encode("utf-8"))
+        # Resources may be inherited from the page tree.
+        node = page
+        while node is not None and key not in node:
+            node = node.get("/Parent")
+            node = node.get_object() if node is not None else None
+        if node is not None:
+            _feed(node.raw_get(key))
+    return digest.hexdigest()
+
+
+def _ocr_cache_key(
+    document: PdfDocument, page_number: int, options: ConvertOptions, tesseract_version: str
+) -> str:
+    """Return the OCR cache key for a page under the given options."""
+
+    page = document.page(page_number)
+    tiling = _tiling_key(document.page_info(page_number), options)
+
+    if options.adaptive_dpi is not None:
+        # Adaptive entries store JSON with the DPI that was chosen.
+        return make_key(
+            "ocr-adaptive-v2",
+            page_fingerprint(page),
+            options.adaptive_dpi,
+            options.dpi,
+            options.min_confidence,
+            options.min_words,
+            options.ocr_lang,
+            tesseract_version,
+            *_preprocess_key(options),
+            *tiling,
+        )
+    return make_key(
+        "ocr-v2",
+        page_fingerprint(page),
+        options.dpi,
+        options.ocr_lang,
+        tesseract_version,
+        *_preprocess_key(options),
+        *tiling,
+    )
+
 
-    with pdf_path.open("rb") as f:
-        reader = PyPDF2.PdfReader(f)
-        return len(reader.pages)
+def _preprocess_key(options: ConvertOptions) -> Tuple[str, ...]:
+    # Only added when enabled, so existing cache entries stay valid.
+    return ("preprocess-v1",) if options.preprocess else ()
+
+
+def _tiling_key(info: PageInfo, options: ConvertOptions) -> Tuple[str, ...]:
+    # Only added for pages large enough to be tiled at full DPI, so existing
+    # cache entries stay valid.
+    pixels = info.pixels(options.dpi)
+    return ("tiled-v1",) if options.tile_threshold and pixels > options.tile_threshold else ()
+
+
+def _prepare_image(image, options: ConvertOptions, page_number: int):
+    """Apply the optional preprocessing stage to a rendered page."""
+
+    if not options.preprocess:
+        return image
+    from pdf_ocr_converter.preprocess import preprocess_image
+
+    with metrics.timed("preprocess", page_number, nbytes=image_nbytes(image)):
+        return preprocess_image(image)
 
 
 def iter_page_images(
@@ -47,6 +259,8 @@ def iter_page_images(
 ) -> Sequence[object]:
     """Render a single PDF page as one (or more) images via pdf2image."""
 
+    from pdf2image import convert_from_path
+
     kwargs = {}
     if poppler_path is not None:
         kwargs["poppler_path"] = str(poppler_path)
@@ -61,51 +275,852 @@ def iter_page_images(
     )
 
 
-def ocr_image(image, *, lang: Optional[str] = None) -> str:
-    """Perform OCR on one image and return extracted text."""
+def _open_rendered(path: str):
+    """Open a page image written by poppler, lazily, without Pillow's decompression-bomb check.
 
-    if lang:
-        return pytesseract.image_to_string(image, lang=lang)
-    return pytesseract.image_to_string(image)
+    The check (a warning above `Image.MAX_IMAGE_PIXELS`, 89.5 megapixels by
+    default, an error above twice that) guards against untrusted image
+    files. A render's size follows from the page size and DPI, and pages
+    that large are what tiling is for; `memory` bounds what is loaded.
+    """
 
+    from PIL import Image, PpmImagePlugin
 
-def iter_ocr_pages(
+    if path.endswith((".ppm", ".pgm", ".pbm")):
+        return PpmImagePlugin.PpmImageFile(path)
+    return Image.open(path)
+
+
+def iter_page_range_images(
     pdf_path: Path,
+    *,
+    first_page: int,
+    last_page: int,
+    dpi: int,
+    poppler_path: Optional[Path],
+    chunk_size: int = 16,
+    memory: Optional[MemoryBudget] = None,
+) -> Iterator[Tuple[int, object]]:
+    """Yield `(page_number, image)` for a page range, rendering in chunks.
+
+    Unlike `iter_page_images`, which costs one poppler process (and one full
+    PDF parse) per page, each chunk of `chunk_size` pages is rendered by a
+    single poppler invocation. Pages are written to a temporary folder and
+    loaded one at a time, so memory is bounded by a single page image rather
+    than by the chunk or document size.
+
+    With `memory`, each image's size is acquired from the budget before its
+    pixels are loaded; the consumer must `release(image_nbytes(image))`.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1.")
+
+    from pdf2image import convert_from_path
+
+    kwargs = {}
+    if poppler_path is not None:
+        kwargs["poppler_path"] = str(poppler_path)
+
+    with tempfile.TemporaryDirectory(prefix="pdf-ocr-") as output_folder:
+        for chunk_first in range(first_page, last_page + 1, chunk_size):
+            chunk_last = min(chunk_first + chunk_size - 1, last_page)
+            with metrics.timed("render", chunk_first, pages=chunk_last - chunk_first + 1) as span:
+                paths = convert_from_path(
+                    str(pdf_path),
+                    dpi=dpi,
+                    first_page=chunk_first,
+                    last_page=chunk_last,
+                    output_folder=output_folder,
+                    paths_only=True,
+                    **kwargs,
+                )
+                span.nbytes = sum(os.path.getsize(path) for path in paths)
+            if len(paths) != chunk_last - chunk_first + 1:
+                # Pages would silently go missing from the output.
+                raise RuntimeError(
+                    f"poppler rendered {len(paths)} images for pages {chunk_first}-{chunk_last} of {pdf_path}."
+                )
+
+            # pdftoppm zero-pads page numbers, so the sorted paths are in page order.
+            for page_number, path in zip(range(chunk_first, chunk_last + 1), paths):
+                # Opening only reads the header, so the size is known before
+                # the pixels are loaded.
+                image = _open_rendered(path)
+                if memory is not None:
+                    try:
+                        memory.acquire(image_nbytes(image))
+                    except BaseException:
+                        image.close()
+                        raise
+                with metrics.timed("load", page_number, nbytes=image_nbytes(image)):
+                    image.load()  # also closes the file
+                os.remove(path)
+                yield page_number, image
+
+
+def image_nbytes(image) -> int:
+    """Return the (uncompressed) memory footprint of a PIL image."""
+
+    return image.width * image.height * len(image.getbands())
+
+
+def ocr_image(image, *, lang: Optional[str] = None, backend: str = "subprocess") -> str:
+    """Perform OCR on one image and return extracted text.
+
+    `backend` names an engine from `ocr_backends.OCR_BACKENDS`; engines are
+    created once per thread and reused.
+    """
+
+    return get_backend(backend, lang=lang).image_to_string(image)
+
+
+def _tile_threads(options: ConvertOptions) -> int:
+    if options.tile_threads is not None:
+        return options.tile_threads
+    return max(1, (os.cpu_count() or 1) // max(options.workers, options.ocr_threads))
+
+
+def _ocr_strips(image, options: ConvertOptions, dpi: int) -> Tuple[str, List[float]]:
+    """OCR an oversized page in strips overlapping by one inch (see `tiling`)."""
+
+    def _lines(strip):
+        # Each strip thread uses its own engine.
+        return get_backend(options.ocr_backend, lang=options.ocr_lang).lines(strip)
+
+    return ocr_tiled(image, _lines, overlap=dpi, threads=_tile_threads(options))
+
+
+def _is_oversized(image, options: ConvertOptions) -> bool:
+    return bool(options.tile_threshold) and image.width * image.height > options.tile_threshold
+
+
+def _ocr_text(image, options: ConvertOptions, page_number: int, dpi: int) -> str:
+    """OCR a prepared page image rendered at `dpi`, tiling it when oversized."""
+
+    with metrics.timed("ocr", page_number, nbytes=image_nbytes(image)):
+        if _is_oversized(image, options):
+            return _ocr_strips(image, options, dpi)[0]
+        return ocr_image(image, lang=options.ocr_lang, backend=options.ocr_backend)
+
+
+def _recognize(image, options: ConvertOptions, page_number: int, dpi: int) -> Tuple[str, List[float]]:
+    """Like `_ocr_text`, but also return the word confidences."""
+
+    with metrics.timed("ocr", page_number, nbytes=image_nbytes(image)):
+        if _is_oversized(image, options):
+            return _ocr_strips(image, options, dpi)
+        return get_backend(options.ocr_backend, lang=options.ocr_lang).recognize(image)
+
+
+def _detect_language(
+    image, options: ConvertOptions, page_number: int, languages: Optional[LanguageChooser]
+) -> Optional[PageLanguage]:
+    """Pick a prepared page's languages and rotation with OSD (`ocr_lang="auto"`)."""
+
+    if languages is None:
+        return None
+    with metrics.timed("osd", page_number, nbytes=image_nbytes(image)):
+        language = languages.choose(detect_orientation(image, backend=options.ocr_backend))
+    logger.debug("Page %d: OCR with %s, rotated %d degrees", page_number, language.lang, language.rotate)
+    return language
+
+
+def _apply_language(image, options: ConvertOptions, language: Optional[PageLanguage]):
+    """Return the page image turned upright and the options to OCR it with."""
+
+    if language is None:
+        return image, options
+    return upright(image, language.rotate), dataclasses.replace(options, ocr_lang=language.lang)
+
+
+def is_confident(confidences: Sequence[float], *, min_confidence: float, min_words: int) -> bool:
+    """Return True if OCR word confidences are good enough to keep the text."""
+
+    if len(confidences) < min_words:
+        return False
+    return not confidences or sum(confidences) / len(confidences) >= min_confidence
+
+
+def _page_runs(page_numbers: Sequence[int]) -> Iterator[Tuple[int, int]]:
+    """Yield inclusive `(first, last)` runs of consecutive page numbers."""
+
+    run_first = run_last = None
+    for page_number in page_numbers:
+        if run_last is not None and page_number == run_last + 1:
+            run_last = page_number
+            continue
+        if run_first is not None:
+            yield run_first, run_last
+        run_first = run_last = page_number
+    if run_first is not None:
+        yield run_first, run_last
+
+
+def _skip_page(
+    pdf_path: Path,
+    page_number: int,
+    image,
+    options: ConvertOptions,
+    duplicates: Optional[DuplicateIndex],
+    dpi: int,
+) -> Optional[PageResult]:
+    """Return the result of a rendered page that needs no OCR, or None.
+
+    Blank pages get empty text; near-duplicates of an indexed page get a
+    "duplicate" result whose text is filled in by `iter_page_results`.
+    Pages that do need OCR are added to `duplicates`.
+    """
+
+    if not options.skip_blank and duplicates is None:
+        return None
+    with metrics.timed("classify", page_number, nbytes=image_nbytes(image)):
+        if options.skip_blank and is_blank(image, max_ink=options.blank_max_ink):
+            return PageResult(page_number, "", source="blank", dpi=dpi)
+        if duplicates is not None:
+            fp = fingerprint(image)
+            original = duplicates.find(fp, str(pdf_path))
+            if original is not None:
+                return PageResult(page_number, "", source="duplicate", duplicate_of=original)
+            duplicates.add(PageRef(str(pdf_path), page_number), fp)
+    return None
+
+
+def _ocr_page_range(
+    pdf_path: Path,
+    first_page: int,
+    last_page: int,
+    options: ConvertOptions,
+    duplicates: Optional[DuplicateIndex] = None,
+    languages: Optional[LanguageChooser] = None,
+) -> Iterator[PageResult]:
+    """Render and OCR a contiguous page range, skipping pages per `_skip_page`."""
+
+    if options.adaptive_dpi is not None:
+        yield from _ocr_page_range_adaptive(pdf_path, first_page, last_page, options, duplicates, languages)
+        return
+
+    for page_number, image in iter_page_range_images(
+        pdf_path,
+        first_page=first_page,
+        last_page=last_page,
+        dpi=options.dpi,
+        poppler_path=options.poppler_path,
+        chunk_size=options.render_chunk_size,
+    ):
+        skipped = _skip_page(pdf_path, page_number, image, options, duplicates, options.dpi)
+        if skipped is not None:
+            yield skipped
+            continue
+        prepared = _prepare_image(image, options, page_number)
+        language = _detect_language(prepared, options, page_number, languages)
+        prepared, page_options = _apply_language(prepared, options, language)
+        text = _ocr_text(prepared, page_options, page_number, options.dpi)
+        yield PageResult(page_number, text, source="ocr", dpi=options.dpi)
+
+
+def _ocr_page_range_adaptive(
+    pdf_path: Path,
+    first_page: int,
+    last_page: int,
+    options: ConvertOptions,
+    duplicates: Optional[DuplicateIndex] = None,
+    languages: Optional[LanguageChooser] = None,
+) -> Iterator[PageResult]:
+    """Render and OCR a page range at `adaptive_dpi`, escalating weak pages to `dpi`.
+
+    Works chunk by chunk: the whole chunk is OCR'd at the low DPI, then the
+    pages that failed the confidence check are re-rendered at full DPI (one
+    poppler call per run of consecutive pages) before the chunk is yielded.
+    Escalated pages keep the languages and rotation detected on the first pass.
+    """
+
+    chunk_size = options.render_chunk_size
+    for chunk_first in range(first_page, last_page + 1, chunk_size):
+        chunk_last = min(chunk_first + chunk_size - 1, last_page)
+        texts: Dict[int, Tuple[str, int]] = {}
+        skipped: Dict[int, PageResult] = {}
+        escalate: List[int] = []
+        page_languages: Dict[int, Optional[PageLanguage]] = {}
+
+        for page_number, image in iter_page_range_images(
+            pdf_path,
+            first_page=chunk_first,
+            last_page=chunk_last,
+            dpi=options.adaptive_dpi,
+            poppler_path=options.poppler_path,
+            chunk_size=chunk_size,
+        ):
+            result = _skip_page(pdf_path, page_number, image, options, duplicates, options.adaptive_dpi)
+            if result is not None:
+                skipped[page_number] = result
+                continue
+            prepared = _prepare_image(image, options, page_number)
+            language = page_languages[page_number] = _detect_language(prepared, options, page_number, languages)
+            prepared, page_options = _apply_language(prepared, options, language)
+            text, confidences = _recognize(prepared, page_options, page_number, options.adaptive_dpi)
+            if is_confident(
+                confidences, min_confidence=options.min_confidence, min_words=options.min_words
+            ):
+                texts[page_number] = (text, options.adaptive_dpi)
+            else:
+                escalate.append(page_number)
+
+        for run_first, run_last in _page_runs(escalate):
+            for page_number, image in iter_page_range_images(
+                pdf_path,
+                first_page=run_first,
+                last_page=run_last,
+                dpi=options.dpi,
+                poppler_path=options.poppler_path,
+                chunk_size=chunk_size,
+            ):
+                prepared = _prepare_image(image, options, page_number)
+                prepared, page_options = _apply_language(prepared, options, page_languages[page_number])
+                texts[page_number] = (_ocr_text(prepared, page_options, page_number, options.dpi), options.dpi)
+
+        for page_number in range(chunk_first, chunk_last + 1):
+            if page_number in skipped:
+                yield skipped[page_number]
+                continue
+            text, dpi = texts[page_number]
+            yield PageResult(page_number, text, source="ocr", dpi=dpi)
+
+
+class _ChunkOutput(NamedTuple):
+    results: List[PageResult]
+    # Stage timings (with `collect_metrics`).
+    records: List[metrics.StageRecord]
+    # Fingerprints of the chunk's OCR'd pages (with `options.skip_duplicates`).
+    fingerprints: List[Tuple[PageRef, PageFingerprint]]
+    # Pages detected per language (with `ocr_lang="auto"`).
+    languages: Dict[str, int]
+
+
+def _ocr_chunk(
+    pdf_path: Path,
+    first_page: int,
+    last_page: int,
+    options: ConvertOptions,
+    collect_metrics: bool = False,
+    known: Optional[List[Tuple[PageRef, PageFingerprint]]] = None,
+    known_languages: Optional[Dict[str, int]] = None,
+) -> _ChunkOutput:
+    """Pool task: OCR a page range and return its results as a list.
+
+    With `collect_metrics`, the worker's stage timings (plus a "pool_task"
+    record for the whole task) are returned too, for the parent process to
+    add to its recorder. `known` is a `DuplicateIndex.snapshot` of pages the
+    chunk's pages may duplicate, `known_languages` a `LanguageChooser.snapshot`
+    of the document's languages so far.
+    """
+
+    duplicates = None
+    if known is not None:
+        duplicates = DuplicateIndex(max_difference=options.duplicate_max_difference, known=known)
+    languages = None
+    if known_languages is not None:
+        languages = LanguageChooser(auto_candidates(options.ocr_lang), known=known_languages)
+
+    recorder = metrics.MetricsRecorder() if collect_metrics else None
+    with metrics.use(recorder):
+        results = list(_ocr_page_range(pdf_path, first_page, last_page, options, duplicates, languages))
+    records: List[metrics.StageRecord] = []
+    if recorder is not None:
+        recorder.add(recorder.elapsed_record("pool_task", first_page, pages=last_page - first_page + 1))
+        records = recorder.records
+    fingerprints = []
+    if duplicates is not None:
+        known_refs = {ref for ref, _ in known}
+        fingerprints = [(ref, fp) for ref, fp in duplicates.entries() if ref not in known_refs]
+    detected = dict(Counter(languages.snapshot()) - Counter(known_languages)) if languages is not None else {}
+    return _ChunkOutput(results, records, fingerprints, detected)
+
+
+def _init_worker(tesseract_cmd: Optional[str]) -> None:
+    """Process-pool initializer for OCR workers."""
+
+    # Tesseract parallelises internally with OpenMP and by default uses every
+    # core. With N worker processes that oversubscribes the CPU, so each
+    # worker's tesseract child is limited to a single thread.
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    if tesseract_cmd is not None:
+        set_tesseract_cmd(tesseract_cmd)
+
+
+# A unit of work for the scheduler: either an already-resolved page (e.g. from
+# the text layer) or an inclusive `(first_page, last_page)` range to OCR.
+_Job = Union[PageResult, Tuple[int, int]]
+
+
+def _encode_cached(result: PageResult, options: ConvertOptions) -> str:
+    if options.adaptive_dpi is None:
+        return result.text
+    return json.dumps({"text": result.text, "dpi": result.dpi})
+
+
+def _decode_cached(page_number: int, value: str, options: ConvertOptions) -> PageResult:
+    if options.adaptive_dpi is None:
+        return PageResult(page_number, value, source="cache", dpi=options.dpi)
+    entry = json.loads(value)
+    return PageResult(page_number, entry["text"], source="cache", dpi=entry["dpi"])
+
+
+def _resolve_without_ocr(
+    document: PdfDocument,
+    page_number: int,
+    options: ConvertOptions,
+    cache: Optional[DiskCache],
+    cache_keys: Dict[int, str],
+    tesseract_version: Optional[str],
+) -> Optional[PageResult]:
+    """Return a page's result if it is available without rendering + OCR."""
+
+    if options.text_layer != "never":
+        text = extract_page_text(document.page(page_number))
+        if options.text_layer == "only" or is_usable_text(text):
+            return PageResult(page_number, text, source="text-layer")
+
+    if cache is not None:
+        key = _ocr_cache_key(document, page_number, options, tesseract_version)
+        value = cache.get(key)
+        if value is not None:
+            return _decode_cached(page_number, value, options)
+        cache_keys[page_number] = key
+
+    return None
+
+
+def _iter_jobs(
+    document: PdfDocument,
+    options: ConvertOptions,
+    first_page: int,
+    last_page: int,
+    chunk_size: int,
+    *,
+    cache: Optional[DiskCache] = None,
+    cache_keys: Optional[Dict[int, str]] = None,
+    tesseract_version: Optional[str] = None,
+) -> Iterator[_Job]:
+    """Split the page range into resolved pages and OCR ranges, in page order.
+
+    For pages that do need OCR, their cache key is recorded in `cache_keys`
+    so the result can be stored once it comes back.
+    """
+
+    run_first = None
+    for page_number in range(first_page, last_page + 1):
+        resolved = _resolve_without_ocr(
+            document,
+            page_number,
+            options,
+            cache,
+            cache_keys if cache_keys is not None else {},
+            tesseract_version,
+        )
+        if resolved is not None:
+            if run_first is not None:
+                yield (run_first, page_number - 1)
+                run_first = None
+            yield resolved
+            continue
+
+        if run_first is None:
+            run_first = page_number
+        elif page_number - run_first + 1 > chunk_size:
+            yield (run_first, page_number - 1)
+            run_first = page_number
+
+    if run_first is not None:
+        yield (run_first, last_page)
+
+
+def _ocr_rendered(
+    pdf_path: Path,
+    page_number: int,
+    image,
+    options: ConvertOptions,
+    memory: MemoryBudget,
+    languages: Optional[LanguageChooser] = None,
+) -> PageResult:
+    """OCR one page rendered by the staged pipeline, releasing its budget.
+
+    In adaptive mode a page that fails the confidence check is re-rendered
+    on its own at full DPI. That image is not charged to `memory` (its
+    first-pass image is released first), so each OCR thread holds at most
+    one page image outside the budget and escalation cannot deadlock.
+    """
+
+    try:
+        prepared = _prepare_image(image, options, page_number)
+        language = _detect_language(prepared, options, page_number, languages)
+        prepared, page_options = _apply_language(prepared, options, language)
+        if options.adaptive_dpi is None:
+            text = _ocr_text(prepared, page_options, page_number, options.dpi)
+            return PageResult(page_number, text, source="ocr", dpi=options.dpi)
+
+        text, confidences = _recognize(prepared, page_options, page_number, options.adaptive_dpi)
+    finally:
+        memory.release(image_nbytes(image))
+        image.close()
+
+    if is_confident(confidences, min_confidence=options.min_confidence, min_words=options.min_words):
+        return PageResult(page_number, text, source="ocr", dpi=options.adaptive_dpi)
+
+    for _, full_image in iter_page_range_images(
+        pdf_path,
+        first_page=page_number,
+        last_page=page_number,
+        dpi=options.dpi,
+        poppler_path=options.poppler_path,
+        chunk_size=1,
+    ):
+        with full_image:
+            prepared = _prepare_image(full_image, options, page_number)
+            prepared, page_options = _apply_language(prepared, options, language)
+            text = _ocr_text(prepared, page_options, page_number, options.dpi)
+    return PageResult(page_number, text, source="ocr", dpi=options.dpi)
+
+
+def _iter_staged_results(
+    pdf_path: Path,
+    options: ConvertOptions,
+    jobs: Iterator[_Job],
+    duplicates: Optional[DuplicateIndex] = None,
+    languages: Optional[LanguageChooser] = None,
+) -> Iterator[PageResult]:
+    """Run jobs in-process as a render -> OCR pipeline (see `pipeline`).
+
+    The render stage (the pipeline source, one poppler call per chunk) runs
+    ahead of OCR by at most `options.queue_depth` pages and blocks while the
+    rendered images waiting for OCR exceed `options.max_image_bytes`; OCR
+    runs on `options.ocr_threads` threads. Results come out in page order.
+    Blank / duplicate pages are detected on the render thread, in page
+    order, and never reach the OCR stage.
+    """
+
+    memory = MemoryBudget(options.max_image_bytes)
+    render_dpi = options.adaptive_dpi or options.dpi
+
+    def _render() -> Iterator[Union[PageResult, Tuple[int, object]]]:
+        for job in jobs:
+            if isinstance(job, PageResult):
+                yield job
+                continue
+            for page_number, image in iter_page_range_images(
+                pdf_path,
+                first_page=job[0],
+                last_page=job[1],
+                dpi=render_dpi,
+                poppler_path=options.poppler_path,
+                chunk_size=options.render_chunk_size,
+                memory=memory,
+            ):
+                skipped = _skip_page(pdf_path, page_number, image, options, duplicates, render_dpi)
+                if skipped is None:
+                    yield page_number, image
+                    continue
+                memory.release(image_nbytes(image))
+                image.close()
+                yield skipped
+
+    def _ocr(item: Union[PageResult, Tuple[int, object]]) -> PageResult:
+        if isinstance(item, PageResult):
+            return item
+        page_number, image = item
+        return _ocr_rendered(pdf_path, page_number, image, options, memory, languages)
+
+    stages = [Stage("ocr", _ocr, workers=options.ocr_threads, queue_depth=options.queue_depth)]
+    return run_stages(_render(), stages, memory=memory)
+
+
+def create_ocr_pool(workers: int, *, tesseract_cmd: Optional[Path] = None) -> ProcessPoolExecutor:
+    """Create a process pool for render + OCR work.
+
+    The pool can be passed to `iter_page_results` for several documents at
+    once. Workers are started via forkserver/spawn rather than fork, because
+    the pool may be created while other threads (correction stage, batch
+    mode) are running.
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(str(tesseract_cmd) if tesseract_cmd is not None else None,),
+    )
+
+
+def _warm_worker(ocr_backend: str, ocr_lang: Optional[str]) -> int:
+    """Pool task: import the render / OCR stack and start this worker's OCR engine."""
+
+    for module in ("pdf2image", "PIL.Image", "PyPDF2"):
+        importlib.import_module(module)
+    backend_class(ocr_backend).version()
+    if auto_candidates(ocr_lang) is None:
+        from PIL import Image
+
+        # Engines load their language data on first use; "auto" pages pick theirs later.
+        get_backend(ocr_backend, lang=ocr_lang).image_to_string(Image.new("L", (32, 32), 255))
+    return os.getpid()
+
+
+def warm_ocr_pool(
+    pool: Executor,
+    workers: int,
+    *,
+    ocr_backend: str = "subprocess",
+    ocr_lang: Optional[str] = None,
+) -> int:
+    """Start the workers of `pool` and load their OCR stack ahead of the first job.
+
+    Worker processes import their dependencies lazily, so without this the
+    first pages of a long-running service pay for it. Returns the number of
+    workers that ran a warm-up task.
+    """
+
+    futures = [pool.submit(_warm_worker, ocr_backend, ocr_lang) for _ in range(workers)]
+    return len({future.result() for future in futures})
+
+
+def _iter_pool_results(
+    pdf_path: Path,
+    options: ConvertOptions,
+    jobs: Iterator[_Job],
+    executor: Optional[Executor] = None,
+    duplicates: Optional[DuplicateIndex] = None,
+    languages: Optional[LanguageChooser] = None,
+) -> Iterator[PageResult]:
+    """Run OCR jobs on a process pool, yielding results in page order.
+
+    At most `2 * workers` OCR chunks are in flight and `4 * workers` jobs
+    (chunks or pages resolved without OCR) wait in order, so a slow chunk
+    holds back the output but never lets the pool, or the text-layer /
+    cache lookups, race ahead of the consumer. A pool passed as `executor`
+    is shared and left running.
+
+    Each chunk is checked for duplicates against the pages indexed when it
+    was submitted (plus its own earlier pages); chunks in flight at the
+    same time do not see each other's pages.
+    """
+
+    pool = executor or create_ocr_pool(options.workers, tesseract_cmd=options.tesseract_cmd)
+    recorder = metrics.current()
+    pending = deque()
+    in_flight = 0
+    try:
+
+        def _fill() -> None:
+            nonlocal in_flight
+            while in_flight < 2 * options.workers and len(pending) < 4 * options.workers:
+                job = next(jobs, None)
+                if job is None:
+                    return
+                if isinstance(job, PageResult):
+                    pending.append(job)
+                else:
+                    known = duplicates.snapshot() if duplicates is not None else None
+                    known_languages = languages.snapshot() if languages is not None else None
+                    pending.append(
+                        pool.submit(
+                            _ocr_chunk, pdf_path, job[0], job[1], options, recorder.enabled, known, known_languages
+                        )
+                    )
+                    in_flight += 1
+
+        _fill()
+        while pending:
+            item = pending.popleft()
+            if isinstance(item, PageResult):
+                _fill()
+                yield item
+                continue
+
+            results, records, fingerprints, detected = item.result()
+            recorder.extend(records)
+            for ref, fp in fingerprints:
+                duplicates.add(ref, fp)
+            if languages is not None:
+                languages.merge(detected)
+            in_flight -= 1
+            _fill()
+            yield from results
+    finally:
+        if executor is None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        else:
+            for item in pending:
+                if not isinstance(item, PageResult):
+                    item.cancel()
+
+
+def iter_page_results(
+    pdf: Union[Path, PdfDocument],
     options: ConvertOptions,
     *,
     progress_cb: Optional[Callable[[int, int], None]] = None,
-) -> Iterator[Tuple[int, str]]:
-    """Yield `(page_number, text)` for each OCR'd PDF page.
+    executor: Optional[Executor] = None,
+    duplicates: Optional[DuplicateIndex] = None,
+) -> Iterator[PageResult]:
+    """Yield a `PageResult` for each PDF page, in page order.
+
+    `pdf` is a path or an open `PdfDocument`; passing the document lets the
+    caller share one parse of the file (e.g. with its page count) and
+    leaves it open. Page numbers are 1-indexed. Pages are rendered in chunks of
+    `options.render_chunk_size` per poppler call. With `options.workers > 1`
+    chunks are rendered and OCR'd on a process pool (each worker holds one
+    page image at a time); results are still yielded in page order.
+    Otherwise rendering and OCR run as a bounded in-process pipeline with
+    `options.ocr_threads` OCR threads, `options.queue_depth` pages queued
+    between the stages and at most `options.max_image_bytes` of rendered
+    images waiting. Passing `executor` (see `create_ocr_pool`) runs
+    the chunks on that shared pool instead of a private one.
+
+    With `options.text_layer` set to "auto", pages whose embedded text passes
+    `is_usable_text` skip rendering and OCR entirely; "only" never OCRs.
+
+    With `options.cache_dir` set, OCR results are stored in a persistent cache
+    keyed by page content, DPI, language and tesseract version; cache hits
+    also skip rendering and OCR.
+
+    `options.ocr_backend` selects the OCR engine (see `ocr_backends`).
+
+    With `options.adaptive_dpi` set, pages are first OCR'd at that DPI and
+    re-rendered at `options.dpi` only if tesseract's word confidences fall
+    below `min_confidence` (mean) or fewer than `min_words` words are found.
+    Each result's `dpi` records the resolution that was used.
+
+    With `options.preprocess`, rendered pages go through
+    `preprocess.preprocess_image` and tesseract receives a 1-bit image.
 
-    Page numbers are 1-indexed.
+    With `options.skip_blank`, rendered pages without ink are not OCR'd and
+    yield empty text ("blank"). With `options.skip_duplicates`, rendered
+    pages that are near-duplicates of a page OCR'd earlier reuse its text
+    ("duplicate"); pass a shared `duplicates` index to also match pages of
+    documents converted before or alongside this one.
+
+    Page images above `options.tile_threshold` pixels are OCR'd in
+    overlapping horizontal strips on `options.tile_threads` threads and
+    stitched back together (see `tiling`).
+
+    With `options.ocr_lang` set to "auto" (or "auto:eng+rus+..."), each
+    rendered page is first run through tesseract's orientation and script
+    detection, turned upright and OCR'd with only the languages of its
+    script; choices are shared across the document (see `language`).
     """
 
+    if options.workers < 1:
+        raise ValueError("workers must be >= 1.")
+    if options.ocr_threads < 1 or options.queue_depth < 1 or options.max_image_bytes < 1:
+        raise ValueError("ocr_threads, queue_depth and max_image_bytes must be >= 1.")
+    if options.adaptive_dpi is not None and not 0 < options.adaptive_dpi < options.dpi:
+        raise ValueError("adaptive_dpi must be > 0 and lower than dpi.")
+    if options.text_layer not in TEXT_LAYER_MODES:
+        raise ValueError(f"text_layer must be one of {TEXT_LAYER_MODES}.")
+    if not 0 <= options.blank_max_ink < 1 or not 0 <= options.duplicate_max_difference < 1:
+        raise ValueError("blank_max_ink and duplicate_max_difference must be between 0 and 1.")
+    if options.tile_threshold < 0 or (options.tile_threads is not None and options.tile_threads < 1):
+        raise ValueError("tile_threshold must be >= 0 and tile_threads >= 1.")
+    if not options.skip_duplicates:
+        duplicates = None
+    elif duplicates is None:
+        duplicates = DuplicateIndex(max_difference=options.duplicate_max_difference)
+    candidates = auto_candidates(options.ocr_lang)
+    languages = LanguageChooser(candidates) if candidates is not None else None
+    backend = backend_class(options.ocr_backend)
     if options.tesseract_cmd is not None:
-        pytesseract.pytesseract.tesseract_cmd = str(options.tesseract_cmd)
+        set_tesseract_cmd(str(options.tesseract_cmd))
 
-    total_pages = count_pdf_pages(pdf_path)
-    last_page = options.last_page or total_pages
-    if options.first_page < 1 or last_page < options.first_page:
-        raise ValueError("Invalid page range: first_page/last_page.")
-    if last_page > total_pages:
-        raise ValueError(f"PDF only has {total_pages} pages, last_page={last_page}.")
+    document = pdf if isinstance(pdf, PdfDocument) else PdfDocument(pdf)
+    pdf_path = document.path
+    try:
+        # One parse serves the page count, text layers and cache keys.
+        total_pages = document.page_count
+        last_page = options.last_page or total_pages
+        if options.first_page < 1 or last_page < options.first_page:
+            raise ValueError("Invalid page range: first_page/last_page.")
+        if last_page > total_pages:
+            raise ValueError(f"PDF only has {total_pages} pages, last_page={last_page}.")
 
-    for page_number in range(options.first_page, last_page + 1):
-        images = iter_page_images(
-            pdf_path,
-            page_number=page_number,
-            dpi=options.dpi,
-            poppler_path=options.poppler_path,
+        cache = None
+        cache_keys: Dict[int, str] = {}
+        tesseract_version = None
+        if options.cache_dir is not None and options.text_layer != "only":
+            cache = DiskCache(options.cache_dir / "ocr.sqlite3", max_bytes=options.cache_max_bytes)
+            tesseract_version = backend.version()
+
+        # Text-layer-only runs never OCR, so they need no pool.
+        use_pool = options.text_layer != "only" and (executor is not None or options.workers > 1)
+        chunk_size = options.render_chunk_size
+        if use_pool:
+            # Keep chunks small enough that every worker gets a share of the range.
+            page_count = last_page - options.first_page + 1
+            chunk_size = max(1, min(chunk_size, -(-page_count // options.workers)))
+
+        jobs = _iter_jobs(
+            document,
+            options,
+            options.first_page,
+            last_page,
+            chunk_size,
+            cache=cache,
+            cache_keys=cache_keys,
+            tesseract_version=tesseract_version,
         )
+        if use_pool:
+            results = _iter_pool_results(pdf_path, options, jobs, executor, duplicates, languages)
+        else:
+            results = _iter_staged_results(pdf_path, options, jobs, duplicates, languages)
+
+        try:
+            for result in results:
+                if duplicates is not None and result.source == "duplicate":
+                    original = duplicates.text(result.duplicate_of)
+                    if original is None:
+                        # The original page aged out of the index meanwhile: OCR this one after all.
+                        logger.debug("Page %d: %s left the duplicate index", result.page_number, result.duplicate_of)
+                        (result,) = _ocr_page_range(
+                            pdf_path, result.page_number, result.page_number, options, None, languages
+                        )
+                    else:
+                        result = dataclasses.replace(result, text=original[0], dpi=original[1])
+                if cache is not None and result.source == "ocr":
+                    cache.put(cache_keys.pop(result.page_number), _encode_cached(result, options))
+                if duplicates is not None and result.source == "ocr":
+                    duplicates.set_text(PageRef(str(pdf_path), result.page_number), result.text, result.dpi)
 
-        # Normally one image per page; keep the loop to match existing scripts.
-        page_text_parts = []
-        for image in images:
-            page_text_parts.append(ocr_image(image, lang=options.ocr_lang))
+                yield result
 
-        yield page_number, "".join(page_text_parts)
+                if progress_cb is not None:
+                    progress_cb(
+                        result.page_number - options.first_page + 1,
+                        last_page - options.first_page + 1,
+                    )
+        finally:
+            # Stop rendering before the document is closed under it.
+            results.close()
+            if cache is not None:
+                cache.close()
+    finally:
+        if document is not pdf:
+            document.close()
 
-        if progress_cb is not None:
-            progress_cb(page_number - options.first_page + 1, last_page - options.first_page + 1)
 
+def iter_ocr_pages(
+    pdf: Union[Path, PdfDocument],
+    options: ConvertOptions,
+    *,
+    progress_cb: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[Tuple[int, str]]:
+    """Yield `(page_number, text)` for each converted PDF page.
+
+    Thin wrapper around `iter_page_results` for callers that only need text.
+    """
 
+    for result in iter_page_results(pdf, options, progress_cb=progress_cb):
+        yield result.page_number, result.text
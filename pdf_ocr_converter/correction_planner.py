@@ -0,0 +1,237 @@
+"""Plan correction requests against a token budget.
+
+Sending exactly one page per request wastes a round-trip on sparse pages
+(title pages, one-liners) and silently truncates dense pages whose
+correction does not fit in `max_tokens`. The planner instead:
+
+- splits oversized pages into parts at paragraph (then line) boundaries,
+- packs consecutive small pages / parts into one request, delimited by
+  marker lines the model is asked to keep,
+- maps the corrected parts back to their pages, in order.
+
+Token counts use the same rough `estimate_tokens` heuristic as the rest of
+the correction code.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pdf_ocr_converter.openai_corrector import PROMPT_TEMPLATE, OpenAICorrectOptions, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+BATCH_PROMPT_TEMPLATE = (
+    "Please correct the following text for grammar, punctuation, and capitalization. "
+    "The text is divided into sections. Each section starts with a marker line such as "
+    "<<<SECTION 1>>>. Keep every marker line exactly as it is, in the same order, and "
+    "only correct the text between the markers:\n\n"
+    "{text}"
+)
+
+_MARKER = "<<<SECTION {index}>>>"
+_MARKER_RE = re.compile(r"^[ \t]*<<<SECTION (\d+)>>>[ \t]*$", re.MULTILINE)
+
+# Corrections are usually a little longer than their input (added punctuation).
+_COMPLETION_RATIO = 1.25
+
+
+@dataclass(frozen=True)
+class PlannerOptions:
+    """Budget for planned correction requests."""
+
+    context_tokens: int = 4097
+    max_pages_per_request: int = 8
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A page, or one part of a page that had to be split."""
+
+    key: Any
+    part: int
+    parts: int
+    text: str
+    # Separator that followed this part in the original page text.
+    joiner: str = ""
+
+
+@dataclass(frozen=True)
+class CorrectionRequest:
+    """One request: the text to send, its prompt template and its segments."""
+
+    segments: Tuple[Segment, ...]
+
+    @property
+    def batched(self) -> bool:
+        return len(self.segments) > 1
+
+    @property
+    def template(self) -> str:
+        return BATCH_PROMPT_TEMPLATE if self.batched else PROMPT_TEMPLATE
+
+    @property
+    def text(self) -> str:
+        if not self.batched:
+            return self.segments[0].text
+        return "\n".join(
+            _MARKER.format(index=i) + "\n" + segment.text.strip("\n")
+            for i, segment in enumerate(self.segments, start=1)
+        )
+
+
+def input_token_budget(correct_options: OpenAICorrectOptions, planner_options: PlannerOptions) -> int:
+    """Return the largest input (in tokens) whose correction is not truncated.
+
+    The correction must fit in `max_tokens`, and prompt + `max_tokens` must
+    fit in the model's context window.
+    """
+
+    overhead = estimate_tokens(BATCH_PROMPT_TEMPLATE.format(text=""))
+    by_completion = int(correct_options.max_tokens / _COMPLETION_RATIO)
+    by_context = planner_options.context_tokens - correct_options.max_tokens - overhead
+    return max(1, min(by_completion, by_context))
+
+
+def split_text(text: str, max_tokens: int) -> List[Tuple[str, str]]:
+    """Split `text` into `(part, joiner)` pairs of at most `max_tokens` each.
+
+    Splits prefer paragraph breaks, then line breaks, then whitespace; only
+    a single unbroken run longer than the budget is cut mid-word. Joining
+    each part with its joiner reproduces `text` up to whitespace at the cut
+    points.
+    """
+
+    if estimate_tokens(text) <= max_tokens:
+        return [(text, "")]
+
+    for separator in ("\n\n", "\n", " "):
+        pieces = text.split(separator)
+        if len(pieces) > 1:
+            break
+    else:
+        max_chars = max(1, (max_tokens - 1) * 4)
+        return [(text[i:i + max_chars], "") for i in range(0, len(text), max_chars)]
+
+    parts: List[Tuple[str, str]] = []
+    current: List[str] = []
+    for piece in pieces:
+        candidate = separator.join(current + [piece])
+        if current and estimate_tokens(candidate) > max_tokens:
+            parts.extend(split_text(separator.join(current), max_tokens))
+            parts[-1] = (parts[-1][0], separator)
+            current = [piece]
+        else:
+            current.append(piece)
+    parts.extend(split_text(separator.join(current), max_tokens))
+    return parts
+
+
+def plan_requests(
+    pages: Iterable[Tuple[Any, str]],
+    *,
+    correct_options: Optional[OpenAICorrectOptions] = None,
+    planner_options: Optional[PlannerOptions] = None,
+) -> Iterator[CorrectionRequest]:
+    """Group `(key, text)` pages into correction requests, preserving order.
+
+    Requests are emitted as soon as the next page would not fit, so pages
+    can be streamed in while earlier requests are already being sent.
+    """
+
+    correct_options = correct_options or OpenAICorrectOptions()
+    planner_options = planner_options or PlannerOptions()
+    budget = input_token_budget(correct_options, planner_options)
+    # Leave room for the marker line of each section in a batch.
+    marker_tokens = estimate_tokens(_MARKER.format(index=planner_options.max_pages_per_request)) + 1
+
+    batch: List[Segment] = []
+    batch_tokens = 0
+    for key, text in pages:
+        pieces = split_text(text, budget - marker_tokens)
+        for part, (piece, joiner) in enumerate(pieces):
+            segment = Segment(key, part, len(pieces), piece, joiner)
+            tokens = estimate_tokens(piece) + marker_tokens
+            if batch and (
+                batch_tokens + tokens > budget or len(batch) >= planner_options.max_pages_per_request
+            ):
+                yield CorrectionRequest(tuple(batch))
+                batch, batch_tokens = [], 0
+            batch.append(segment)
+            batch_tokens += tokens
+
+    if batch:
+        yield CorrectionRequest(tuple(batch))
+
+
+def parse_batched_response(response: str, count: int) -> Optional[List[str]]:
+    """Split a batched correction back into its `count` sections.
+
+    Returns None if the markers are missing, duplicated or out of order, in
+    which case the caller should fall back to correcting sections one by one.
+    """
+
+    matches = list(_MARKER_RE.finditer(response))
+    if [int(m.group(1)) for m in matches] != list(range(1, count + 1)):
+        return None
+
+    sections = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(response)
+        sections.append(response[match.end():end].strip())
+    return sections
+
+
+def correct_request(
+    request: CorrectionRequest,
+    correct: Callable[[str, str], str],
+) -> List[str]:
+    """Correct a planned request with `correct(text, template)`; one result per segment."""
+
+    if not request.batched:
+        return [correct(request.text, request.template)]
+
+    sections = parse_batched_response(correct(request.text, request.template), len(request.segments))
+    if sections is None:
+        logger.warning("Batched correction lost its section markers; retrying sections one by one.")
+        sections = [correct(segment.text, PROMPT_TEMPLATE) for segment in request.segments]
+    return sections
+
+
+async def correct_request_async(
+    request: CorrectionRequest,
+    correct: Callable[[str, str], Awaitable[str]],
+) -> List[str]:
+    """Async counterpart of `correct_request`."""
+
+    if not request.batched:
+        return [await correct(request.text, request.template)]
+
+    sections = parse_batched_response(
+        await correct(request.text, request.template), len(request.segments)
+    )
+    if sections is None:
+        logger.warning("Batched correction lost its section markers; retrying sections one by one.")
+        sections = [await correct(segment.text, PROMPT_TEMPLATE) for segment in request.segments]
+    return sections
+
+
+class PageAssembler:
+    """Reassemble corrected segments into whole pages, in order."""
+
+    def __init__(self) -> None:
+        self._parts: Dict[int, List[str]] = {}
+
+    def add(self, request: CorrectionRequest, results: List[str]) -> Iterator[Tuple[Any, str]]:
+        """Feed one request's results; yield `(key, corrected_page)` for completed pages."""
+
+        for segment, corrected in zip(request.segments, results):
+            parts = self._parts.setdefault(id(segment.key), [])
+            parts.append(corrected)
+            parts.append(segment.joiner)
+            if segment.part == segment.parts - 1:
+                del self._parts[id(segment.key)]
+                yield segment.key, "".join(parts)
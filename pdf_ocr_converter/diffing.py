@@ -2,31 +2,194 @@
 
 from __future__ import annotations
 
+from collections import Counter
 import difflib
-from typing import Iterable, Iterator, List
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+DIFF_MODES = ("ndiff", "lines", "words")
+
+
+def iter_changed_lines(raw_text: str, corrected_text: str, *, mode: str = "ndiff") -> Iterator[str]:
+    """Yield only added/removed lines ("- " / "+ " prefixed).
+
+    Modes:
+    - "ndiff" (default): exactly the "+ " and "- " lines of `difflib.ndiff`
+      as of Python 3.11 (test/data/ndiff_changed_lines.json pins them).
+      ndiff also yields "  " unchanged lines and "? " intraline hints, which
+      the repo's use-case (reviewing changes) does not need, so they are
+      never computed.
+    - "lines": line-level opcodes only. Within a replaced block all removed
+      lines come before all added ones, instead of ndiff's interleaving of
+      similar line pairs; this skips ndiff's pairwise line comparison, which
+      is quadratic in the block size.
+    - "words": word-level changes; each run of removed / added words becomes
+      one "- " / "+ " line.
+    """
 
+    if mode == "ndiff":
+        yield from _iter_ndiff_changes(raw_text.splitlines(), corrected_text.splitlines())
+    elif mode == "lines":
+        for _, removed, added in _iter_opcodes(raw_text.splitlines(), corrected_text.splitlines()):
+            for line in removed:
+                yield "- " + line
+            for line in added:
+                yield "+ " + line
+    elif mode == "words":
+        for _, removed, added in _iter_opcodes(raw_text.split(), corrected_text.split()):
+            if removed:
+                yield "- " + " ".join(removed)
+            if added:
+                yield "+ " + " ".join(added)
+    else:
+        raise ValueError(f"mode must be one of {DIFF_MODES}.")
+
+
+def changed_lines(raw_text: str, corrected_text: str, *, mode: str = "ndiff") -> List[str]:
+    """Return changed lines as a list (wrapper around `iter_changed_lines`)."""
 
-def iter_changed_lines(raw_text: str, corrected_text: str) -> Iterator[str]:
-    """Yield only added/removed lines from a unified ndiff.
+    return list(iter_changed_lines(raw_text=raw_text, corrected_text=corrected_text, mode=mode))
 
-    `difflib.ndiff()` yields:
-    - "  " unchanged lines
-    - "- " removed lines
-    - "+ " added lines
-    - "? " intraline hints
 
-    For the repo's use-case (reviewing changes), we keep only "+ " and "- ".
-    """
+def _iter_opcodes(a: List[str], b: List[str]) -> Iterator[Tuple[str, List[str], List[str]]]:
+    """Yield `(tag, removed, added)` for every non-equal opcode."""
 
-    for line in difflib.ndiff(raw_text.splitlines(), corrected_text.splitlines()):
-        if line.startswith("+ ") or line.startswith("- "):
-            yield line
+    for tag, alo, ahi, blo, bhi in difflib.SequenceMatcher(None, a, b).get_opcodes():
+        if tag != "equal":
+            yield tag, a[alo:ahi], b[blo:bhi]
 
 
-def changed_lines(raw_text: str, corrected_text: str) -> List[str]:
-    """Return changed lines as a list (wrapper around `iter_changed_lines`)."""
+class _LineSimilarity:
+    """ndiff's line similarity scores, each computed at most once.
+
+    `difflib.Differ` re-scores the same line pairs at every level of its
+    recursive search for synch points; caching the scores gives identical
+    decisions for a fraction of the work.
+    """
+
+    def __init__(self, a: List[str], b: List[str]) -> None:
+        self.a = a
+        self.b = b
+        self._counts: Dict[Tuple[int, int], Counter] = {}
+        self._quick: Dict[Tuple[int, int], float] = {}
+        self._ratio: Dict[Tuple[int, int], float] = {}
+        self._matcher = difflib.SequenceMatcher(difflib.IS_CHARACTER_JUNK)
+        self._matcher_b = None
+
+    def _char_counts(self, side: int, index: int) -> Counter:
+        key = (side, index)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = Counter(self.a[index] if side == 0 else self.b[index])
+        return counts
+
+    def quick_ratio(self, i: int, j: int) -> float:
+        """`SequenceMatcher.quick_ratio` (shared character count bound)."""
+
+        value = self._quick.get((i, j))
+        if value is None:
+            common = self._char_counts(0, i) & self._char_counts(1, j)
+            value = self._quick[(i, j)] = _ratio(sum(common.values()), len(self.a[i]) + len(self.b[j]))
+        return value
+
+    def ratio(self, i: int, j: int) -> float:
+        """`SequenceMatcher.ratio` with ndiff's character junk."""
+
+        value = self._ratio.get((i, j))
+        if value is None:
+            if self._matcher_b != j:
+                # set_seq2 indexes the second line; reuse it across the row.
+                self._matcher.set_seq2(self.b[j])
+                self._matcher_b = j
+            self._matcher.set_seq1(self.a[i])
+            value = self._ratio[(i, j)] = self._matcher.ratio()
+        return value
+
+
+def _ratio(matches: int, length: int) -> float:
+    # Same formula as difflib._calculate_ratio.
+    return 2.0 * matches / length if length else 1.0
+
+
+def _iter_ndiff_changes(a: List[str], b: List[str]) -> Iterator[str]:
+    """Yield ndiff's "- " / "+ " lines in ndiff's order (see `difflib.Differ.compare`)."""
+
+    similarity = _LineSimilarity(a, b)
+    for tag, alo, ahi, blo, bhi in difflib.SequenceMatcher(None, a, b).get_opcodes():
+        if tag == "replace":
+            yield from _iter_fancy_replace(similarity, alo, ahi, blo, bhi)
+        elif tag == "delete":
+            for line in a[alo:ahi]:
+                yield "- " + line
+        elif tag == "insert":
+            for line in b[blo:bhi]:
+                yield "+ " + line
+
+
+def _iter_fancy_replace(similarity: _LineSimilarity, alo: int, ahi: int, blo: int, bhi: int) -> Iterator[str]:
+    """`Differ._fancy_replace` / `_fancy_helper` without intraline hints.
+
+    The recursion (before synch point, synch pair, after synch point) is run
+    off an explicit stack, so very long replaced blocks cannot hit the
+    recursion limit.
+    """
 
-    return list(iter_changed_lines(raw_text=raw_text, corrected_text=corrected_text))
+    a, b = similarity.a, similarity.b
+    # Work items: ("range", alo, ahi, blo, bhi) or ("lines", prefix, lines).
+    stack: List[tuple] = [("range", alo, ahi, blo, bhi)]
+    while stack:
+        item = stack.pop()
+        if item[0] == "lines":
+            for line in item[2]:
+                yield item[1] + line
+            continue
+
+        _, alo, ahi, blo, bhi = item
+        if alo >= ahi:
+            if blo < bhi:
+                stack.append(("lines", "+ ", b[blo:bhi]))
+            continue
+        if blo >= bhi:
+            stack.append(("lines", "- ", a[alo:ahi]))
+            continue
+
+        best_ratio, cutoff = 0.74, 0.75
+        best_i = best_j = -1
+        eqi = eqj = None
+        for j in range(blo, bhi):
+            bj = b[j]
+            for i in range(alo, ahi):
+                ai = a[i]
+                if ai == bj:
+                    if eqi is None:
+                        eqi, eqj = i, j
+                    continue
+                # real_quick_ratio, quick_ratio, ratio: cheapest bound first.
+                if (
+                    _ratio(min(len(ai), len(bj)), len(ai) + len(bj)) > best_ratio
+                    and similarity.quick_ratio(i, j) > best_ratio
+                    and similarity.ratio(i, j) > best_ratio
+                ):
+                    best_ratio, best_i, best_j = similarity.ratio(i, j), i, j
+
+        if best_ratio < cutoff:
+            if eqi is None:
+                # Plain replace: the shorter block is dumped first.
+                if bhi - blo < ahi - alo:
+                    stack.append(("lines", "- ", a[alo:ahi]))
+                    stack.append(("lines", "+ ", b[blo:bhi]))
+                else:
+                    stack.append(("lines", "+ ", b[blo:bhi]))
+                    stack.append(("lines", "- ", a[alo:ahi]))
+                continue
+            best_i, best_j = eqi, eqj
+            pair: tuple = ("lines", "", [])  # identical lines are unchanged
+        else:
+            pair = ("lines", "", ["- " + a[best_i], "+ " + b[best_j]])
+
+        # Pushed in reverse: before the synch point, the pair, after it.
+        stack.append(("range", best_i + 1, ahi, best_j + 1, bhi))
+        stack.append(pair)
+        stack.append(("range", alo, best_i, blo, best_j))
 
 
 def format_page_header(page_number: int) -> str:
@@ -41,5 +204,3 @@ def write_page_block(output_file, page_number: int, lines: Iterable[str]) -> Non
     output_file.write("\n" + format_page_header(page_number) + "\n")
     for line in lines:
         output_file.write(line + "\n")
-
-
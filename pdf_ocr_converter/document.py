@@ -0,0 +1,115 @@
+"""A PDF opened once and shared by the pipeline stages.
+
+Counting pages, extracting text layers, fingerprinting pages for the OCR
+cache and sizing pages for tiling all need the parsed PDF. `PdfDocument`
+memory-maps the file and parses it once, on first use: PyPDF2 then reads
+objects straight from the mapping instead of issuing a seek + read per
+object, and only the parts of the file that are touched get paged in, so a
+multi-gigabyte scan costs its cross-reference table and page tree rather
+than a full read. Page metadata and content streams are looked up per page,
+on demand.
+
+Rendering still goes through poppler, which opens the file by path.
+Documents do not pickle; pool workers receive `path`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import mmap
+from pathlib import Path
+from typing import Dict, Optional
+
+from pdf_ocr_converter import metrics
+
+
+@dataclass(frozen=True)
+class PageInfo:
+    """Geometry of one page: its crop box in points and its /Rotate angle."""
+
+    page_number: int
+    width: float
+    height: float
+    rotation: int = 0
+
+    def pixels(self, dpi: int) -> float:
+        """Pixel count of the page rendered at `dpi`."""
+
+        return self.width * self.height * (dpi / 72) ** 2
+
+
+class PdfDocument:
+    """A memory-mapped PDF with a lazily built PyPDF2 reader.
+
+    Page numbers are 1-indexed. Not thread-safe: use a document from one
+    thread at a time. Use as a context manager, or call `close`.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._file = self.path.open("rb")
+        try:
+            self.size = self.path.stat().st_size
+            if self.size == 0:
+                raise ValueError(f"{self.path} is empty.")
+            self._map: Optional[mmap.mmap] = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self._reader = None
+        self._page_count: Optional[int] = None
+        self._page_info: Dict[int, PageInfo] = {}
+
+    def __enter__(self) -> "PdfDocument":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._reader = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    @property
+    def reader(self):
+        """The PyPDF2 reader, created on first use."""
+
+        if self._reader is None:
+            if self._map is None:
+                raise ValueError(f"{self.path} is closed.")
+            import PyPDF2
+
+            self._reader = PyPDF2.PdfReader(self._map)
+        return self._reader
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            with metrics.timed("count_pages", nbytes=self.size):
+                self._page_count = len(self.reader.pages)
+        return self._page_count
+
+    def page(self, page_number: int):
+        """Return the PyPDF2 page object."""
+
+        if not 1 <= page_number <= self.page_count:
+            raise IndexError(f"{self.path} has no page {page_number}.")
+        return self.reader.pages[page_number - 1]
+
+    def page_info(self, page_number: int) -> PageInfo:
+        info = self._page_info.get(page_number)
+        if info is None:
+            page = self.page(page_number)
+            box = page.cropbox
+            info = PageInfo(page_number, float(box.width), float(box.height), int(page.get("/Rotate", 0) or 0))
+            self._page_info[page_number] = info
+        return info
+
+    def page_stream(self, page_number: int) -> bytes:
+        """Return the page's (decoded) content stream; empty for a page without one."""
+
+        contents = self.page(page_number).get_contents()
+        return contents.get_data() if contents is not None else b""
@@ -0,0 +1,146 @@
+"""Per-page checkpoint journal for resumable runs.
+
+The journal is a JSON-lines file: a header line describing the run, then one
+line per completed page holding everything needed to re-create that page's
+output blocks. Each line is flushed to the OS before the page counts as
+done, so after the process dies the journal holds every completed page plus
+at most one torn trailing line, which is discarded on load.
+
+Lines are fsync'd at most every `sync_interval` seconds (and on close)
+rather than per page, which keeps a synchronous disk flush off the page
+path. An OS crash or power loss can therefore lose the pages of the last
+interval; a resumed run simply converts them again.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+import json
+import os
+from pathlib import Path
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+JOURNAL_VERSION = 1
+DEFAULT_SYNC_INTERVAL = 1.0
+
+
+@dataclass(frozen=True)
+class PageRecord:
+    """Outputs of one completed page (None for outputs not produced)."""
+
+    page_number: int
+    raw: Optional[str] = None
+    corrected: Optional[str] = None
+    diff: Optional[List[str]] = None
+
+
+class JournalMismatchError(ValueError):
+    """Raised when resuming from a journal written for a different run."""
+
+
+def _read_journal(path: Path) -> Tuple[Optional[Dict[str, Any]], List[PageRecord], int]:
+    """Return `(header, records, valid_bytes)` for a journal file.
+
+    `valid_bytes` is the length of the intact prefix of the file; anything
+    after it is a torn write from an interrupted run.
+    """
+
+    header = None
+    records: List[PageRecord] = []
+    valid_bytes = 0
+    with path.open("rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if header is None:
+                header = entry
+            else:
+                records.append(PageRecord(**entry))
+            valid_bytes += len(line)
+    return header, records, valid_bytes
+
+
+class Journal:
+    """Append-only writer for a run's checkpoint journal."""
+
+    def __init__(
+        self,
+        path: Path,
+        run_info: Dict[str, Any],
+        *,
+        resume: bool = False,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+    ) -> None:
+        """Open a journal for `run_info`.
+
+        With `resume=True` an existing journal for the same run is kept and
+        the pages it already holds are loaded into `self.records`; otherwise
+        any existing journal is replaced.
+
+        Raises:
+            JournalMismatchError: if resuming and the journal on disk was
+                written for a different input or different options.
+        """
+
+        self.path = path
+        self.header = {"version": JOURNAL_VERSION, **run_info}
+        self.records: List[PageRecord] = []
+        self.sync_interval = sync_interval
+        self._last_page: Optional[int] = None
+        self._last_sync = time.monotonic()
+
+        if resume and path.exists():
+            header, records, valid_bytes = _read_journal(path)
+            if header is not None:
+                if header != self.header:
+                    raise JournalMismatchError(
+                        f"Journal {path} was written for a different input or options; "
+                        "rerun without --resume to start over."
+                    )
+                self.records = records
+                self._last_page = records[-1].page_number if records else None
+                self._fp = path.open("r+b")
+                self._fp.truncate(valid_bytes)
+                self._fp.seek(valid_bytes)
+                return
+
+        self._fp = path.open("wb")
+        self._append(self.header)
+
+    @property
+    def next_page(self) -> Optional[int]:
+        """The page after the last completed one, or None if nothing is done."""
+
+        return self._last_page + 1 if self._last_page is not None else None
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        self._fp.write(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._fp.flush()
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self._sync()
+
+    def _sync(self) -> None:
+        os.fsync(self._fp.fileno())
+        self._last_sync = time.monotonic()
+
+    def record(self, page: PageRecord) -> None:
+        """Record a completed page (durable within `sync_interval`)."""
+
+        self._append(asdict(page))
+        self._last_page = page.page_number
+
+    def close(self) -> None:
+        if not self._fp.closed:
+            self._sync()
+        self._fp.close()
+
+    def discard(self) -> None:
+        """Close and delete the journal (after a successful run)."""
+
+        self._fp.close()  # nothing to make durable
+        self.path.unlink()
@@ -0,0 +1,137 @@
+"""JSON-lines page output with a binary page-offset index.
+
+`--format jsonl` writes one JSON object per page, in page order, as pages
+complete:
+
+    {"page": 3, "source": "ocr", "dpi": 300, "duplicate_of": null,
+     "raw": "...", "corrected": "...", "diff": ["..."],
+     "timings": {"ocr": 1.73, "correct": 0.91, ...}}
+
+`source` / `dpi` / `duplicate_of` say how the text was produced (see
+`core.PageResult`); outputs the run's `--mode` does not produce are null.
+`timings` holds the wall seconds of each per-page stage (see `metrics`).
+Pages replayed from a resume journal carry no source, DPI or timings.
+
+Next to `out.jsonl`, `out.jsonl.idx` indexes the lines: an 8-byte magic
+followed by one fixed-size little-endian entry per page (`uint32` page
+number, `uint64` byte offset, `uint32` byte length), appended after the
+page's line is written. Pages are consecutive, so `read_page` finds an
+entry by position and reads the page with a single seek into the JSONL
+file, without scanning it.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+from pdf_ocr_converter.journal import PageRecord
+
+INDEX_MAGIC = b"PDFOCRI1"
+_ENTRY = struct.Struct("<IQI")
+
+
+def index_path(jsonl_path: Path) -> Path:
+    """Return the sidecar index path for a JSONL output file."""
+
+    return jsonl_path.with_name(jsonl_path.name + ".idx")
+
+
+def page_entry(
+    record: PageRecord,
+    *,
+    source: Optional[str] = None,
+    dpi: Optional[int] = None,
+    duplicate_of: Optional[Dict[str, Any]] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """Return the JSON object written for one page."""
+
+    return {
+        "page": record.page_number,
+        "source": source,
+        "dpi": dpi,
+        "duplicate_of": duplicate_of,
+        "raw": record.raw,
+        "corrected": record.corrected,
+        "diff": record.diff,
+        "timings": timings,
+    }
+
+
+class JsonlWriter:
+    """Writes page objects to a JSONL file and its offset index."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fp = open(path, "wb")
+        try:
+            self._index = open(index_path(path), "wb")
+        except BaseException:
+            self._fp.close()
+            raise
+        self._index.write(INDEX_MAGIC)
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        """Append one page's object (pages must come in order, without gaps)."""
+
+        line = json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+        offset = self._fp.tell()
+        self._fp.write(line)
+        self._fp.flush()
+        # The index entry follows its line, so an entry never points past the data.
+        self._index.write(_ENTRY.pack(entry["page"], offset, len(line)))
+        self._index.flush()
+
+    def close(self) -> None:
+        self._fp.close()
+        self._index.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_index(jsonl_path: Path) -> List[Tuple[int, int, int]]:
+    """Return every `(page, offset, length)` entry of a JSONL output's index."""
+
+    data = index_path(jsonl_path).read_bytes()
+    if not data.startswith(INDEX_MAGIC):
+        raise ValueError(f"{index_path(jsonl_path)} is not a page index.")
+    body = data[len(INDEX_MAGIC):]
+    usable = len(body) - len(body) % _ENTRY.size  # ignore a torn trailing entry
+    return list(_ENTRY.iter_unpack(body[:usable]))
+
+
+def read_page(jsonl_path: Path, page_number: int) -> Dict[str, Any]:
+    """Return one page's object from a JSONL output, via its index.
+
+    Raises:
+        KeyError: if the page is not in the output.
+    """
+
+    with open(index_path(jsonl_path), "rb") as index:
+        if index.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            raise ValueError(f"{index_path(jsonl_path)} is not a page index.")
+        first = index.read(_ENTRY.size)
+        if len(first) < _ENTRY.size:
+            raise KeyError(page_number)
+        first_page = _ENTRY.unpack(first)[0]
+        position = page_number - first_page
+        if position < 0:
+            raise KeyError(page_number)
+        index.seek(len(INDEX_MAGIC) + position * _ENTRY.size)
+        entry = index.read(_ENTRY.size)
+    if len(entry) < _ENTRY.size:
+        raise KeyError(page_number)
+    page, offset, length = _ENTRY.unpack(entry)
+    if page != page_number:
+        raise ValueError(f"{index_path(jsonl_path)} is not in page order.")
+
+    with open(jsonl_path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
@@ -0,0 +1,183 @@
+"""Per-page script detection, to OCR each page with as few languages as possible.
+
+Tesseract runs every language of `lang` on every page, and its run time
+grows with each one: a mixed corpus converted with "eng+deu+rus+ell" pays
+for four models on every page. With `ocr_lang="auto"` each page first goes
+through tesseract's orientation and script detection (OSD, `--psm 0`),
+which looks at a sample of characters and costs a fraction of full
+recognition. The detected script picks the languages written in it, and
+the page is turned upright per the detected orientation before full OCR.
+
+`ocr_lang="auto:eng+deu+rus+ell"` restricts the choice to those
+candidates: a Cyrillic page is OCR'd with "rus", a Latin page with
+"eng+deu" (OSD tells scripts apart, not languages sharing one). Plain
+"auto" uses the first language listed for the script in
+`SCRIPT_LANGUAGES` ("Latin" -> "eng").
+
+A `LanguageChooser` holds one document's choices. Pages whose script is
+not detected confidently (little text, OSD gives up) reuse the language
+the document's pages were most often OCR'd with, or all candidates before
+any page was detected.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+import math
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from pdf_ocr_converter.ocr_backends import Osd, get_backend
+
+AUTO_LANG = "auto"
+
+# OSD is run on a copy of the page scaled down to at most this many pixels
+# (about a letter page at 200 DPI); it only needs legible characters.
+OSD_MAX_PIXELS = 4_000_000
+# Below these confidences the detected orientation / script is ignored.
+MIN_ORIENTATION_CONFIDENCE = 2.0
+MIN_SCRIPT_CONFIDENCE = 1.0
+
+# Tesseract language codes by OSD script name; the first is the default
+# for plain "auto".
+SCRIPT_LANGUAGES: Dict[str, Tuple[str, ...]] = {
+    "Latin": (
+        "eng", "deu", "fra", "spa", "ita", "por", "nld", "pol", "ces", "slk", "slv", "hrv", "bos",
+        "hun", "ron", "swe", "dan", "nor", "fin", "est", "lav", "lit", "isl", "tur", "aze", "uzb",
+        "cat", "glg", "eus", "gle", "cym", "mlt", "sqi", "afr", "swa", "ind", "msa", "fil", "vie",
+        "lat", "epo",
+    ),
+    "Fraktur": ("frk",),
+    "Cyrillic": ("rus", "ukr", "bel", "bul", "mkd", "srp", "kaz", "kir", "mon", "tgk"),
+    "Greek": ("ell", "grc"),
+    "Armenian": ("hye",),
+    "Georgian": ("kat",),
+    "Hebrew": ("heb", "yid"),
+    "Arabic": ("ara", "fas", "urd", "pus", "snd", "uig"),
+    "Devanagari": ("hin", "mar", "nep", "san"),
+    "Bengali": ("ben", "asm"),
+    "Gurmukhi": ("pan",),
+    "Gujarati": ("guj",),
+    "Oriya": ("ori",),
+    "Tamil": ("tam",),
+    "Telugu": ("tel",),
+    "Kannada": ("kan",),
+    "Malayalam": ("mal",),
+    "Sinhala": ("sin",),
+    "Thai": ("tha",),
+    "Lao": ("lao",),
+    "Khmer": ("khm",),
+    "Myanmar": ("mya",),
+    "Tibetan": ("bod",),
+    "Ethiopic": ("amh",),
+    "Han": ("chi_sim", "chi_tra"),
+    "Han_vert": ("chi_sim_vert", "chi_tra_vert"),
+    "Japanese": ("jpn",),
+    "Hiragana": ("jpn",),
+    "Katakana": ("jpn",),
+    "Japanese_vert": ("jpn_vert",),
+    "Hangul": ("kor",),
+    "Hangul_vert": ("kor_vert",),
+}
+
+_FALLBACK_LANG = "eng"
+
+
+def auto_candidates(ocr_lang: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Return the candidate languages of an "auto" `ocr_lang`, or None if it is not "auto".
+
+    Plain "auto" has no candidates (an empty tuple): any script's default
+    language may be chosen.
+    """
+
+    if ocr_lang is None or not (ocr_lang == AUTO_LANG or ocr_lang.startswith(AUTO_LANG + ":")):
+        return None
+    candidates = tuple(lang for lang in ocr_lang[len(AUTO_LANG) + 1:].split("+") if lang)
+    if ocr_lang != AUTO_LANG and not candidates:
+        raise ValueError("ocr_lang 'auto:' needs at least one language, e.g. 'auto:eng+rus'.")
+    return candidates
+
+
+class PageLanguage(NamedTuple):
+    """How to OCR one page: tesseract `lang` and the clockwise `rotate` to apply first."""
+
+    lang: str
+    rotate: int
+
+
+def detect_orientation(image, *, backend: str = "subprocess") -> Optional[Osd]:
+    """Run OSD on a (scaled-down copy of a) page image."""
+
+    pixels = image.width * image.height
+    if pixels > OSD_MAX_PIXELS:
+        from PIL import Image
+
+        factor = math.ceil(math.sqrt(pixels / OSD_MAX_PIXELS))
+        resample = Image.NEAREST if image.mode in ("1", "P") else Image.BOX
+        image = image.resize((max(1, image.width // factor), max(1, image.height // factor)), resample)
+    return get_backend(backend).orientation(image)
+
+
+def upright(image, rotate: int):
+    """Return `image` rotated clockwise by `rotate` (a multiple of 90) degrees."""
+
+    if rotate % 360 == 0:
+        return image
+    from PIL import Image
+
+    # Transposes are lossless; PIL's ROTATE_* constants turn counter-clockwise.
+    method = {90: Image.ROTATE_270, 180: Image.ROTATE_180, 270: Image.ROTATE_90}[rotate % 360]
+    return image.transpose(method)
+
+
+class LanguageChooser:
+    """Picks each page's languages from its OSD result, for one document.
+
+    `known` seeds the per-language page counts (see `snapshot`), so that
+    chunks of a document OCR'd in pool workers share the choices made so
+    far. Safe to use from several OCR threads.
+    """
+
+    def __init__(self, candidates: Tuple[str, ...] = (), known: Optional[Dict[str, int]] = None) -> None:
+        self.candidates = candidates
+        self._counts: Counter = Counter(known or {})
+        self._lock = threading.Lock()
+
+    def languages_for(self, script: str) -> Optional[str]:
+        """Return the `lang` for pages in `script`, or None if no candidate is written in it."""
+
+        script_languages = SCRIPT_LANGUAGES.get(script, ())
+        if not self.candidates:
+            return script_languages[0] if script_languages else None
+        matching = [lang for lang in self.candidates if lang in script_languages]
+        return "+".join(matching) or None
+
+    def choose(self, osd: Optional[Osd]) -> PageLanguage:
+        """Return the languages and rotation for a page with this OSD result."""
+
+        rotate = 0
+        if osd is not None and osd.orientation_confidence >= MIN_ORIENTATION_CONFIDENCE:
+            rotate = osd.rotate
+        lang = None
+        if osd is not None and osd.script_confidence >= MIN_SCRIPT_CONFIDENCE:
+            lang = self.languages_for(osd.script)
+        with self._lock:
+            if lang is not None:
+                self._counts[lang] += 1
+            elif self._counts:
+                lang = self._counts.most_common(1)[0][0]
+            else:
+                lang = "+".join(self.candidates) or _FALLBACK_LANG
+        return PageLanguage(lang, rotate)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return the pages detected per `lang` so far."""
+
+        with self._lock:
+            return dict(self._counts)
+
+    def merge(self, counts: Dict[str, int]) -> None:
+        """Add page counts detected elsewhere (e.g. by a pool worker)."""
+
+        with self._lock:
+            self._counts.update(counts)
@@ -0,0 +1,329 @@
+"""Per-page, per-stage timing records for a conversion run.
+
+The conversion code wraps each stage of a page's journey (page count,
+render, load, preprocess, OSD, OCR, correction, diff, write) in `timed`, which
+records wall time, CPU time of the calling thread and the number of bytes
+handled. Recording is off by default: until a recorder is installed with
+`use`, `timed` does nothing beyond reading two clocks.
+
+Notes on the numbers:
+- `cpu_s` is the CPU time of the thread running the stage. Work done by
+  child processes (the tesseract CLI, poppler) does not show up there; the
+  run-level `children_cpu_s` in `MetricsRecorder.report` covers it.
+- Render records cover one poppler call for a chunk of `pages` pages,
+  starting at `page`; every other stage is recorded per page.
+- Pool workers (`--workers`) are not children of the main process, so
+  each pool task also returns a "pool_task" record whose `cpu_s` is the
+  worker's process CPU time including its tesseract / poppler children.
+- Pages that skipped OCR (blank / duplicate, see `page_filter`) are listed
+  under "skipped" with the reason.
+- Correction records of batched requests (several pages per request) use
+  the first page of the request. With concurrent (asyncio) correction the
+  event loop thread interleaves requests, so those records carry wall
+  time only (`cpu_s` is 0).
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+import json
+import math
+import os
+from pathlib import Path
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _children_cpu() -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@dataclass(frozen=True)
+class StageRecord:
+    """Timing of one stage for one page (or one chunk of `pages` pages)."""
+
+    stage: str
+    page: Optional[int]
+    wall_s: float
+    cpu_s: float
+    nbytes: int = 0
+    pages: int = 1
+
+
+class Span:
+    """Handle yielded by `timed`; set `nbytes` once the size is known."""
+
+    def __init__(self, nbytes: int = 0) -> None:
+        self.nbytes = nbytes
+
+
+class MetricsRecorder:
+    """Thread-safe collection of `StageRecord`s."""
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.records: List[StageRecord] = []
+        self.skipped: List[Dict[str, Any]] = []
+        # Wall time per stage of single-page records, by page.
+        self._page_times: Dict[int, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._children_started = _children_cpu()
+
+    @contextmanager
+    def timed(
+        self,
+        stage: str,
+        page: Optional[int] = None,
+        *,
+        nbytes: int = 0,
+        pages: int = 1,
+        cpu: bool = True,
+    ) -> Iterator[Span]:
+        """Record the wall (and, with `cpu`, thread CPU) time spent in the block."""
+
+        span = Span(nbytes)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time() if cpu else 0.0
+        try:
+            yield span
+        finally:
+            self.add(
+                StageRecord(
+                    stage,
+                    page,
+                    time.perf_counter() - wall_start,
+                    time.thread_time() - cpu_start if cpu else 0.0,
+                    span.nbytes,
+                    pages,
+                )
+            )
+
+    def elapsed_record(self, stage: str, page: Optional[int] = None, *, pages: int = 1) -> StageRecord:
+        """Return a record of everything since this recorder was created.
+
+        `cpu_s` is the CPU time of the whole process plus its waited-for
+        children, so it is only meaningful for a process doing one task at
+        a time (a pool worker).
+        """
+
+        children = _children_cpu() or 0.0
+        return StageRecord(
+            stage,
+            page,
+            time.perf_counter() - self._started,
+            time.process_time() - self._cpu_started + children - (self._children_started or 0.0),
+            pages=pages,
+        )
+
+    def add(self, record: StageRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+            self._index(record)
+
+    def extend(self, records: Iterable[StageRecord]) -> None:
+        """Add records collected elsewhere (e.g. returned by a pool worker)."""
+
+        with self._lock:
+            for record in records:
+                self.records.append(record)
+                self._index(record)
+
+    def _index(self, record: StageRecord) -> None:
+        if record.page is not None and record.pages == 1:
+            times = self._page_times.setdefault(record.page, {})
+            times[record.stage] = times.get(record.stage, 0.0) + record.wall_s
+
+    def page_times(self, page: int) -> Dict[str, float]:
+        """Return the wall time per stage recorded so far for `page`.
+
+        Repeated stages (e.g. OCR at two DPIs) are summed; records covering a
+        chunk of pages (rendering) are not included.
+        """
+
+        with self._lock:
+            return dict(self._page_times.get(page, {}))
+
+    def skip(self, document: str, page: int, reason: str, **details: Any) -> None:
+        """Note a page whose OCR was skipped, and why."""
+
+        with self._lock:
+            self.skipped.append({"document": document, "page": page, "reason": reason, **details})
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return per-stage totals and p50 / p95 / max of wall and CPU time."""
+
+        with self._lock:
+            records = list(self.records)
+        by_stage: Dict[str, List[StageRecord]] = {}
+        for record in records:
+            by_stage.setdefault(record.stage, []).append(record)
+
+        summary: Dict[str, Dict[str, float]] = {}
+        for stage, stage_records in by_stage.items():
+            walls = sorted(r.wall_s for r in stage_records)
+            cpus = sorted(r.cpu_s for r in stage_records)
+            summary[stage] = {
+                "count": len(stage_records),
+                "pages": sum(r.pages for r in stage_records),
+                "bytes": sum(r.nbytes for r in stage_records),
+                "wall_s_total": sum(walls),
+                "wall_s_p50": percentile(walls, 50),
+                "wall_s_p95": percentile(walls, 95),
+                "wall_s_max": walls[-1],
+                "cpu_s_total": sum(cpus),
+                "cpu_s_p50": percentile(cpus, 50),
+                "cpu_s_p95": percentile(cpus, 95),
+                "cpu_s_max": cpus[-1],
+            }
+        return summary
+
+    def report(self, **run_info: Any) -> Dict[str, Any]:
+        """Return the full report: run totals, per-stage summary and all records."""
+
+        run = dict(run_info)
+        run["wall_s"] = time.perf_counter() - self._started
+        run["cpu_s"] = time.process_time() - self._cpu_started
+        children = _children_cpu()
+        run["children_cpu_s"] = None if children is None else children - self._children_started
+        run["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+        with self._lock:
+            records = sorted(
+                self.records, key=lambda r: (r.page is None, r.page or 0, r.stage)
+            )
+            skipped = sorted(self.skipped, key=lambda entry: (entry["document"], entry["page"]))
+        return {
+            "run": run,
+            "stages": self.summary(),
+            "skipped": skipped,
+            "records": [asdict(record) for record in records],
+        }
+
+    def write_report(self, path: Path, **run_info: Any) -> None:
+        """Write `report(**run_info)` to `path` as JSON."""
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**run_info), f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, path)
+
+
+class _NullRecorder(MetricsRecorder):
+    """Default recorder: discards everything."""
+
+    enabled = False
+
+    def add(self, record: StageRecord) -> None:
+        pass
+
+    def extend(self, records: Iterable[StageRecord]) -> None:
+        pass
+
+    def skip(self, document: str, page: int, reason: str, **details: Any) -> None:
+        pass
+
+    def page_times(self, page: int) -> Dict[str, float]:
+        return {}
+
+
+_NULL = _NullRecorder()
+_current: MetricsRecorder = _NULL
+
+
+def current() -> MetricsRecorder:
+    """Return the installed recorder (a no-op recorder if none is)."""
+
+    return _current
+
+
+@contextmanager
+def use(recorder: Optional[MetricsRecorder]) -> Iterator[Optional[MetricsRecorder]]:
+    """Install `recorder` process-wide (all threads) for the duration of the block."""
+
+    global _current
+    previous = _current
+    _current = recorder if recorder is not None else _NULL
+    try:
+        yield recorder
+    finally:
+        _current = previous
+
+
+def timed(stage: str, page: Optional[int] = None, *, nbytes: int = 0, pages: int = 1, cpu: bool = True):
+    """Time a stage with the installed recorder (see `MetricsRecorder.timed`)."""
+
+    return _current.timed(stage, page, nbytes=nbytes, pages=pages, cpu=cpu)
+
+
+def text_nbytes(text: Optional[str]) -> int:
+    """Return the UTF-8 size of `text`, or 0 when no recorder is installed."""
+
+    if text is None or not _current.enabled:
+        return 0
+    return len(text.encode("utf-8"))
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Return the `q`th percentile (nearest rank) of already sorted values."""
+
+    if not sorted_values:
+        raise ValueError("percentile of an empty sequence.")
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@contextmanager
+def profile(path: Path) -> Iterator[None]:
+    """cProfile the block, including threads started inside it, and dump the merged stats to `path`.
+
+    Each thread gets its own profiler (one cProfile hook per thread before
+    Python 3.12); their stats are added together at the end. From 3.12 on,
+    cProfile is built on `sys.monitoring`, whose events fire in every thread,
+    so a single profiler covers them all. Pool worker processes (`--workers`)
+    are not profiled.
+    """
+
+    import cProfile
+    import pstats
+
+    profiles: List[cProfile.Profile] = []
+    lock = threading.Lock()
+    per_thread = sys.version_info < (3, 12)
+
+    def _start_thread(frame, event, arg) -> None:
+        # First profile event of a new thread: hand over to a profiler of its own.
+        thread_profile = cProfile.Profile()
+        with lock:
+            profiles.append(thread_profile)
+        thread_profile.enable()
+
+    main = cProfile.Profile()
+    if per_thread:
+        threading.setprofile(_start_thread)
+    main.enable()
+    try:
+        yield
+    finally:
+        main.disable()
+        if per_thread:
+            threading.setprofile(None)
+        stats = pstats.Stats(main)
+        with lock:
+            for thread_profile in profiles:
+                stats.add(thread_profile)
+        stats.dump_stats(str(path))
@@ -0,0 +1,347 @@
+"""OCR engines behind a common interface.
+
+The default "subprocess" backend is pytesseract: every call writes the image
+to a temporary file and starts a fresh tesseract process, which then loads
+its language data from disk. That start-up cost is paid per page.
+
+The "tesserocr" backend keeps one tesseract engine alive in-process (one per
+thread, so one per pool worker), loads the language data once and hands
+images over in memory. It needs the optional `tesserocr` package, which
+links against the tesseract library.
+
+Both engines are imported on first use, so that importing this module (and
+the CLI) does not load pytesseract, which in turn imports NumPy and pandas
+when they are installed.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+import logging
+from pathlib import Path
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OCR_BACKENDS = ("subprocess", "tesserocr")
+
+# Set by `set_tesseract_cmd`; applied when pytesseract is imported.
+_tesseract_cmd: Optional[str] = None
+
+# How the tesseract CLI's OSD gives up on a page with too little text.
+_OSD_TOO_LITTLE_TEXT = ("Too few characters", "Image too small to scale")
+# Other OSD failures (e.g. no osd.traineddata) are logged once per process.
+_osd_failure_logged = False
+
+
+@dataclass(frozen=True)
+class OcrLine:
+    """A recognized text line with its bounding box (pixels) and word confidences.
+
+    `block` and `paragraph` are tesseract's layout numbers within the image.
+    """
+
+    text: str
+    left: int
+    top: int
+    right: int
+    bottom: int
+    block: int = 0
+    paragraph: int = 0
+    confidences: Tuple[float, ...] = field(default=(), compare=False)
+
+
+@dataclass(frozen=True)
+class Osd:
+    """Tesseract's orientation and script detection (OSD) for one image.
+
+    `rotate` is the clockwise rotation (0, 90, 180 or 270 degrees) that
+    turns the page upright; `script` is a tesseract script name ("Latin",
+    "Cyrillic", "Han", ...).
+    """
+
+    rotate: int
+    orientation_confidence: float
+    script: str
+    script_confidence: float
+
+
+class OcrBackend(ABC):
+    """Turns one page image into text."""
+
+    name = ""
+
+    @abstractmethod
+    def image_to_string(self, image) -> str:
+        """Return the recognized text."""
+
+    @abstractmethod
+    def recognize(self, image) -> Tuple[str, List[float]]:
+        """Return the text plus the confidence (0-100) of each recognized word."""
+
+    @abstractmethod
+    def lines(self, image) -> List[OcrLine]:
+        """Return the recognized lines, in reading order, with their positions."""
+
+    @abstractmethod
+    def orientation(self, image) -> Optional[Osd]:
+        """Detect the page orientation and script; None when there is too little text."""
+
+    @classmethod
+    @abstractmethod
+    def version(cls) -> str:
+        """Return a string identifying the engine version (used in cache keys)."""
+
+    def close(self) -> None:
+        pass
+
+
+class SubprocessBackend(OcrBackend):
+    """pytesseract: one tesseract process per image."""
+
+    name = "subprocess"
+
+    def __init__(self, lang: Optional[str] = None) -> None:
+        self.lang = lang
+
+    def image_to_string(self, image) -> str:
+        pytesseract = _import_pytesseract()
+        if self.lang:
+            return pytesseract.image_to_string(image, lang=self.lang)
+        return pytesseract.image_to_string(image)
+
+    def recognize(self, image) -> Tuple[str, List[float]]:
+        pytesseract = _import_pytesseract()
+        internals = pytesseract.pytesseract
+        if not (hasattr(internals, "save") and hasattr(internals, "run_tesseract")):
+            # Public API: two tesseract runs.
+            text = pytesseract.image_to_string(image, lang=self.lang)
+            return text, tsv_word_confidences(pytesseract.image_to_data(image, lang=self.lang))
+        # A single tesseract run writes both the text and the per-word TSV.
+        # The public API has no call returning both, so this uses pytesseract's
+        # `save` / `run_tesseract` helpers (pinned in requirements.txt) and
+        # falls back to the public calls above if they go away.
+        with internals.save(image) as (temp_name, input_filename):
+            internals.run_tesseract(input_filename, temp_name, "txt", self.lang, config="tsv")
+            text = Path(temp_name + ".txt").read_text(encoding="utf-8")
+            tsv = Path(temp_name + ".tsv").read_text(encoding="utf-8")
+        return text, tsv_word_confidences(tsv)
+
+    def lines(self, image) -> List[OcrLine]:
+        return tsv_lines(_import_pytesseract().image_to_data(image, lang=self.lang))
+
+    def orientation(self, image) -> Optional[Osd]:
+        global _osd_failure_logged
+        pytesseract = _import_pytesseract()
+        try:
+            return parse_osd(pytesseract.image_to_osd(image))
+        except pytesseract.TesseractError as exc:
+            message = str(exc.message)
+            if not any(marker in message for marker in _OSD_TOO_LITTLE_TEXT) and not _osd_failure_logged:
+                _osd_failure_logged = True
+                logger.warning("Tesseract OSD failed (%s); pages use the fallback languages, unrotated.", message)
+            return None
+
+    @classmethod
+    def version(cls) -> str:
+        return str(_import_pytesseract().get_tesseract_version())
+
+
+class TesserocrBackend(OcrBackend):
+    """A warm in-process tesseract engine (requires `tesserocr`)."""
+
+    name = "tesserocr"
+
+    def __init__(self, lang: Optional[str] = None) -> None:
+        _import_tesserocr()
+        self.lang = lang
+        # Both engines are created on first use, so an engine used only for
+        # `orientation` (see `language.detect_orientation`) does not load a
+        # recognition model too.
+        self._api = None
+        self._osd_api = None
+
+    def _engine(self, image):
+        if self._api is None:
+            # Same default as the tesseract CLI.
+            self._api = _import_tesserocr().PyTessBaseAPI(lang=self.lang or "eng")
+        self._api.SetImage(image)
+        return self._api
+
+    def image_to_string(self, image) -> str:
+        return self._engine(image).GetUTF8Text()
+
+    def recognize(self, image) -> Tuple[str, List[float]]:
+        api = self._engine(image)
+        return api.GetUTF8Text(), [float(c) for c in api.AllWordConfidences()]
+
+    def lines(self, image) -> List[OcrLine]:
+        return tsv_lines(self._engine(image).GetTSVText(0))
+
+    def orientation(self, image) -> Optional[Osd]:
+        if self._osd_api is None:
+            tesserocr = _import_tesserocr()
+            self._osd_api = tesserocr.PyTessBaseAPI(lang="osd", psm=tesserocr.PSM.OSD_ONLY)
+        self._osd_api.SetImage(image)
+        result = self._osd_api.DetectOrientationScript()
+        if not result:
+            return None
+        # `orient_deg` is the counter-clockwise rotation of the text.
+        return Osd(
+            rotate=(360 - result["orient_deg"]) % 360,
+            orientation_confidence=float(result["orient_conf"]),
+            script=result["script_name"],
+            script_confidence=float(result["script_conf"]),
+        )
+
+    @classmethod
+    def version(cls) -> str:
+        return "tesserocr " + _import_tesserocr().tesseract_version().strip()
+
+    def close(self) -> None:
+        if self._api is not None:
+            self._api.End()
+        if self._osd_api is not None:
+            self._osd_api.End()
+
+
+def tsv_word_confidences(tsv: str) -> List[float]:
+    """Return the confidence of every non-empty word in tesseract TSV output."""
+
+    confidences = []
+    lines = tsv.splitlines()
+    if not lines:
+        return confidences
+    columns = lines[0].split("\t")
+    level, conf, text = columns.index("level"), columns.index("conf"), columns.index("text")
+    for line in lines[1:]:
+        fields = line.split("\t")
+        if len(fields) <= text or fields[level] != "5" or not fields[text].strip():
+            continue
+        value = float(fields[conf])
+        if value >= 0:
+            confidences.append(value)
+    return confidences
+
+
+def tsv_lines(tsv: str) -> List[OcrLine]:
+    """Group the words of tesseract TSV output into `OcrLine`s, in output order.
+
+    The header row is optional (tesseract's C API leaves it out).
+    """
+
+    rows = [line.split("\t") for line in tsv.splitlines()]
+    if rows and rows[0][0] == "level":
+        header, rows = rows[0], rows[1:]
+    else:
+        header = list(_TSV_COLUMNS)
+    columns = {name: i for i, name in enumerate(header)}
+    lines: Dict[Tuple[int, int, int], List[List[str]]] = {}
+    for fields in rows:
+        if len(fields) < len(columns) or fields[columns["level"]] != "5" or not fields[columns["text"]].strip():
+            continue
+        key = tuple(int(fields[columns[name]]) for name in ("block_num", "par_num", "line_num"))
+        lines.setdefault(key, []).append(fields)
+
+    result = []
+    for (block, paragraph, _), words in lines.items():
+        boxes = [
+            tuple(int(word[columns[name]]) for name in ("left", "top", "width", "height")) for word in words
+        ]
+        result.append(
+            OcrLine(
+                " ".join(word[columns["text"]].strip() for word in words),
+                left=min(left for left, _, _, _ in boxes),
+                top=min(top for _, top, _, _ in boxes),
+                right=max(left + width for left, _, width, _ in boxes),
+                bottom=max(top + height for _, top, _, height in boxes),
+                block=block,
+                paragraph=paragraph,
+                confidences=tuple(
+                    float(word[columns["conf"]]) for word in words if float(word[columns["conf"]]) >= 0
+                ),
+            )
+        )
+    return result
+
+
+def parse_osd(text: str) -> Osd:
+    """Parse the output of `tesseract IMAGE - --psm 0` (`image_to_osd`)."""
+
+    fields = {}
+    for line in text.splitlines():
+        name, sep, value = line.partition(":")
+        if sep:
+            fields[name.strip()] = value.strip()
+    try:
+        return Osd(
+            rotate=int(fields["Rotate"]) % 360,
+            orientation_confidence=float(fields["Orientation confidence"]),
+            script=fields["Script"],
+            script_confidence=float(fields["Script confidence"]),
+        )
+    except (KeyError, ValueError):
+        raise ValueError(f"Unexpected tesseract OSD output: {text!r}") from None
+
+
+def set_tesseract_cmd(cmd: str) -> None:
+    """Make the subprocess backend run the tesseract executable at `cmd`."""
+
+    global _tesseract_cmd
+    _tesseract_cmd = cmd
+    if "pytesseract" in sys.modules:
+        _import_pytesseract()
+
+
+def _import_pytesseract():
+    import pytesseract
+
+    if _tesseract_cmd is not None:
+        pytesseract.pytesseract.tesseract_cmd = _tesseract_cmd
+    return pytesseract
+
+
+def _import_tesserocr():
+    try:
+        import tesserocr
+    except ImportError as exc:
+        raise RuntimeError(
+            "The 'tesserocr' OCR backend requires the tesserocr package "
+            "(pip install tesserocr)."
+        ) from exc
+    return tesserocr
+
+
+_TSV_COLUMNS = (
+    "level", "page_num", "block_num", "par_num", "line_num", "word_num",
+    "left", "top", "width", "height", "conf", "text",
+)
+
+_BACKEND_CLASSES = {cls.name: cls for cls in (SubprocessBackend, TesserocrBackend)}
+
+# Engines are reused for the lifetime of the thread (in a pool worker: of the
+# worker process). tesserocr engines must not be shared between threads.
+_local = threading.local()
+
+
+def backend_class(name: str) -> type:
+    """Return the backend class registered under `name`."""
+
+    try:
+        return _BACKEND_CLASSES[name]
+    except KeyError:
+        raise ValueError(f"ocr_backend must be one of {OCR_BACKENDS}.") from None
+
+
+def get_backend(name: str = "subprocess", *, lang: Optional[str] = None) -> OcrBackend:
+    """Return this thread's engine for `(name, lang)`, creating it on first use."""
+
+    engines: Dict[Tuple[str, Optional[str]], OcrBackend] = _local.__dict__.setdefault("engines", {})
+    key = (name, lang)
+    engine = engines.get(key)
+    if engine is None:
+        engine = engines[key] = backend_class(name)(lang)
+    return engine
@@ -6,8 +6,19 @@ core OCR logic does not require network access and stays testable.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import asdict, dataclass
+from pathlib import Path
+import logging
+from typing import List, Optional, Tuple
+
+from pdf_ocr_converter.cache import DEFAULT_MAX_BYTES, DiskCache, make_key
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TEMPLATE = (
+    "Please correct the following text for grammar, punctuation, and capitalization:\n\n"
+    "{text}"
+)
 
 
 @dataclass(frozen=True)
@@ -19,28 +30,119 @@ class OpenAICorrectOptions:
     temperature: float = 0.5
 
 
+def build_prompt(text: str, template: str = PROMPT_TEMPLATE) -> str:
+    """Return the correction prompt for `text`."""
+
+    return template.format(text=text)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (~4 characters per token)."""
+
+    return len(text) // 4 + 1
+
+
+def split_truncated(text: str, template: str = PROMPT_TEMPLATE) -> Optional[List[Tuple[str, str]]]:
+    """Return `(part, joiner)` halves of `text` to correct separately after its correction hit `max_tokens`.
+
+    Returns None when `text` cannot be re-split: a single word, or a batched
+    request whose section markers must stay in one prompt. The caller then
+    keeps the uncorrected text rather than a cut-off correction.
+    """
+
+    if template != PROMPT_TEMPLATE or len(text.split()) < 2:
+        return None
+    from pdf_ocr_converter.correction_planner import split_text
+
+    parts = split_text(text, max(1, estimate_tokens(text) // 2))
+    return parts if len(parts) > 1 else None
+
+
+@dataclass
+class CorrectionCacheStats:
+    """Hit/miss counters for a `CorrectionCache`."""
+
+    hits: int = 0
+    misses: int = 0
+    tokens_saved: int = 0
+
+
+class CorrectionCache:
+    """Persistent memo of correction results.
+
+    Keys cover the input text, every `OpenAICorrectOptions` field and the
+    prompt template, so changing any of them misses the cache.
+    """
+
+    def __init__(self, path: Path, *, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self._cache = DiskCache(path, max_bytes=max_bytes)
+        self.stats = CorrectionCacheStats()
+
+    @staticmethod
+    def key(text: str, options: OpenAICorrectOptions, template: str = PROMPT_TEMPLATE) -> str:
+        return make_key("correction-v1", template, sorted(asdict(options).items()), text)
+
+    def get(
+        self,
+        text: str,
+        options: OpenAICorrectOptions,
+        template: str = PROMPT_TEMPLATE,
+    ) -> Optional[str]:
+        """Return the cached correction of `text`, counting the hit or miss."""
+
+        corrected = self._cache.get(self.key(text, options, template))
+        if corrected is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+            self.stats.tokens_saved += estimate_tokens(build_prompt(text, template)) + estimate_tokens(corrected)
+        return corrected
+
+    def put(
+        self,
+        text: str,
+        options: OpenAICorrectOptions,
+        corrected: str,
+        template: str = PROMPT_TEMPLATE,
+    ) -> None:
+        self._cache.put(self.key(text, options, template), corrected)
+
+    def close(self) -> None:
+        self._cache.close()
+
+
 def correct_text_via_openai(
     text: str,
     *,
     api_key: str,
     options: Optional[OpenAICorrectOptions] = None,
+    cache: Optional[CorrectionCache] = None,
+    template: str = PROMPT_TEMPLATE,
 ) -> str:
-    """Send text to OpenAI for basic grammar/punctuation correction."""
+    """Send text to OpenAI for basic grammar/punctuation correction.
 
-    if not api_key:
-        raise ValueError("OpenAI API key is required for correction.")
+    With `cache`, previously corrected texts are returned without a request.
+    `template` is the prompt (with a `{text}` placeholder) to send. A
+    correction cut off at `max_tokens` is redone in halves (see
+    `split_truncated`), or the text is returned uncorrected.
+    """
 
     if options is None:
         options = OpenAICorrectOptions()
 
+    if cache is not None:
+        cached = cache.get(text, options, template)
+        if cached is not None:
+            return cached
+
+    if not api_key:
+        raise ValueError("OpenAI API key is required for correction.")
+
     import openai
 
     openai.api_key = api_key
 
-    prompt = (
-        "Please correct the following text for grammar, punctuation, and capitalization:\n\n"
-        f"{text}"
-    )
+    prompt = build_prompt(text, template)
 
     response = openai.Completion.create(
         engine=options.engine,
@@ -51,6 +153,19 @@ def correct_text_via_openai(
         temperature=options.temperature,
     )
 
-    return response.choices[0].text.strip()
+    if response.choices[0].finish_reason == "length":
+        parts = split_truncated(text, template)
+        if parts is None:
+            logger.warning("Correction was cut off at max_tokens; keeping the uncorrected text.")
+            return text
+        return "".join(
+            correct_text_via_openai(part, api_key=api_key, options=options, cache=cache, template=template) + joiner
+            for part, joiner in parts
+        )
+
+    corrected = response.choices[0].text.strip()
+    if cache is not None:
+        cache.put(text, options, corrected, template)
+    return corrected
 
 
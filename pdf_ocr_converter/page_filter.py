@@ -0,0 +1,318 @@
+"""Cheap pre-OCR checks for blank and duplicate pages.
+
+Scanned archives contain blank separator pages and repeated sheets (cover
+pages, forms) that cost as much OCR time as any other page. These checks
+run on the rendered page image and take a few milliseconds:
+
+- `ink_coverage` / `is_blank`: the share of clearly dark pixels in the page
+  (without its outer margin, where scanner borders live), measured on a
+  downscaled copy so paper grain and speckles average out;
+- `fingerprint` / `DuplicateIndex`: a perceptual fingerprint made of a
+  difference hash (dHash) and a normalised 96x96 thumbnail. The dHash
+  cheaply rules out pages with a different layout; two pages are only
+  near-duplicates when almost no thumbnail pixel differs strongly as
+  well, because the dHash bits of dense text pages are much alike while
+  their words still differ at thumbnail scale. Matching targets repeated
+  renders of the same sheet (recompression, noise, scanner speckle), not
+  re-scans at a different skew.
+
+`DuplicateIndex` keeps the dHashes in a BK-tree, so a lookup only visits
+pages within `_MAX_HASH_DISTANCE` bits (in practice, pages of the same
+layout), and holds the latest `max_entries` pages, so lookups stay cheap
+over a long batch.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+DEFAULT_BLANK_MAX_INK = 0.0005
+DEFAULT_DUPLICATE_MAX_DIFFERENCE = 0.004
+DEFAULT_DUPLICATE_MAX_ENTRIES = 4096
+
+_HASH_SIZE = 16
+_THUMBNAIL_SIZE = 96
+# A dHash bit is set only where the right neighbour is brighter by more than
+# this many levels, so flat paper gives stable 0 bits instead of noise.
+_HASH_MARGIN = 4
+# dHash bits that may differ before the thumbnails are compared at all.
+# Recompressed / noisy copies of a sheet differ by at most a few bits;
+# pages of another layout mostly by more.
+_MAX_HASH_DISTANCE = 8
+# Thumbnail pixels differing by at least this much count as changed.
+_PIXEL_DIFFERENCE = 48
+_MAX_ASPECT_DIFFERENCE = 0.02
+
+
+def _work_copy(image: Image.Image, width: int) -> Image.Image:
+    """Return a grayscale copy of `image`, box-downscaled to about `width` pixels wide."""
+
+    gray = image.convert("L")
+    factor = max(1, gray.width // width)
+    return gray.reduce(factor) if factor > 1 else gray
+
+
+def ink_coverage(image: Image.Image, *, margin: float = 0.05, work_width: int = 400) -> float:
+    """Return the fraction of dark ("ink") pixels inside the page's margins.
+
+    Pixels count as ink when they are darker than 60% of the paper level
+    (the median brightness), so tinted paper does not count as ink.
+    """
+
+    gray = _work_copy(image, work_width)
+    dx, dy = int(gray.width * margin), int(gray.height * margin)
+    gray = gray.crop((dx, dy, gray.width - dx, gray.height - dy))
+    histogram = gray.histogram()
+    total = sum(histogram)
+    if not total:
+        return 0.0
+
+    half, seen, paper = total / 2, 0, 255
+    for level, count in enumerate(histogram):
+        seen += count
+        if seen >= half:
+            paper = level
+            break
+    threshold = int(paper * 0.6)
+    return sum(histogram[:threshold]) / total
+
+
+def is_blank(image: Image.Image, *, max_ink: float = DEFAULT_BLANK_MAX_INK) -> bool:
+    """Return True if the page has (almost) no ink, see `ink_coverage`."""
+
+    return ink_coverage(image) <= max_ink
+
+
+@dataclass(frozen=True)
+class PageFingerprint:
+    """Perceptual fingerprint of a page image, see `fingerprint`."""
+
+    dhash: int
+    thumbnail: bytes
+    aspect: float
+
+    def difference(self, other: "PageFingerprint") -> float:
+        """Return the fraction of thumbnail pixels that differ clearly from `other`'s."""
+
+        from PIL import Image, ImageChops
+
+        size = (_THUMBNAIL_SIZE, _THUMBNAIL_SIZE)
+        histogram = ImageChops.difference(
+            Image.frombytes("L", size, self.thumbnail), Image.frombytes("L", size, other.thumbnail)
+        ).histogram()
+        return sum(histogram[_PIXEL_DIFFERENCE:]) / (_THUMBNAIL_SIZE * _THUMBNAIL_SIZE)
+
+    def hash_distance(self, other: "PageFingerprint") -> int:
+        return _hamming(self.dhash, other.dhash)
+
+
+def fingerprint(image: Image.Image) -> PageFingerprint:
+    """Return the dHash and normalised thumbnail of a page image."""
+
+    from PIL import Image, ImageOps
+
+    gray = _work_copy(image, 2 * _THUMBNAIL_SIZE)
+    thumbnail = ImageOps.autocontrast(gray.resize((_THUMBNAIL_SIZE, _THUMBNAIL_SIZE), Image.BOX), cutoff=1)
+
+    small = thumbnail.resize((_HASH_SIZE + 1, _HASH_SIZE), Image.BOX).tobytes()
+    dhash = 0
+    for y in range(_HASH_SIZE):
+        row = small[y * (_HASH_SIZE + 1):(y + 1) * (_HASH_SIZE + 1)]
+        for x in range(_HASH_SIZE):
+            dhash = (dhash << 1) | (row[x] + _HASH_MARGIN < row[x + 1])
+    return PageFingerprint(dhash, thumbnail.tobytes(), image.width / image.height)
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class _HashTree:
+    """A BK-tree of dHashes under Hamming distance; each node holds the pages with its hash.
+
+    A node's children are keyed by their distance to it, so by the triangle
+    inequality a search within `radius` of a hash at distance `d` from the
+    node only needs the children keyed `d - radius` to `d + radius`.
+    Removed pages leave their node in place; the owner rebuilds the tree
+    once they pile up.
+    """
+
+    def __init__(self) -> None:
+        # Node: [dhash, pages, children by distance].
+        self._root: Optional[list] = None
+
+    def add(self, dhash: int, ref: PageRef) -> None:
+        if self._root is None:
+            self._root = [dhash, {ref}, {}]
+            return
+        node = self._root
+        while True:
+            distance = _hamming(node[0], dhash)
+            if distance == 0:
+                node[1].add(ref)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [dhash, {ref}, {}]
+                return
+            node = child
+
+    def discard(self, dhash: int, ref: PageRef) -> None:
+        node = self._root
+        while node is not None:
+            distance = _hamming(node[0], dhash)
+            if distance == 0:
+                node[1].discard(ref)
+                return
+            node = node[2].get(distance)
+
+    def search(self, dhash: int, radius: int) -> Iterator[PageRef]:
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = _hamming(node[0], dhash)
+            if distance <= radius:
+                yield from node[1]
+            for key, child in node[2].items():
+                if distance - radius <= key <= distance + radius:
+                    stack.append(child)
+
+
+@dataclass(frozen=True)
+class PageRef:
+    """A page of a document (`document` is the PDF path as a string)."""
+
+    document: str
+    page_number: int
+
+
+class DuplicateIndex:
+    """Fingerprints of OCR'd pages, to find near-duplicates of new pages.
+
+    Pages are `add`ed when they are rendered and their text is filled in
+    with `set_text` once it is known. A page may duplicate any earlier page
+    of its own document (results come out in page order, so that page's
+    text is known by the time the duplicate is emitted), but only pages of
+    other documents whose text is already known; this is what lets one
+    index serve a whole batch of concurrently converted documents.
+    Beyond `max_entries` pages the oldest are dropped, with their text.
+    Thread-safe.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_difference: float = DEFAULT_DUPLICATE_MAX_DIFFERENCE,
+        max_entries: int = DEFAULT_DUPLICATE_MAX_ENTRIES,
+        known: Sequence[Tuple[PageRef, PageFingerprint]] = (),
+    ) -> None:
+        """`known` seeds the index with entries whose text is known elsewhere (see `snapshot`)."""
+
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1.")
+
+        self.max_difference = max_difference
+        self.max_entries = max_entries
+        # Insertion order: (sequence number, fingerprint) per page.
+        self._entries: "OrderedDict[PageRef, Tuple[int, PageFingerprint]]" = OrderedDict()
+        self._tree = _HashTree()
+        self._removed = 0
+        self._added = 0
+        self._known: Set[PageRef] = set()
+        self._texts: Dict[PageRef, Tuple[str, Optional[int]]] = {}
+        self._lock = threading.Lock()
+        for ref, fp in known:
+            self._add(ref, fp)
+            self._known.add(ref)
+
+    def find(self, fp: PageFingerprint, document: str) -> Optional[PageRef]:
+        """Return the closest matching earlier page, or None."""
+
+        with self._lock:
+            candidates = sorted(
+                (
+                    self._entries[ref] + (ref,)
+                    for ref in self._tree.search(fp.dhash, _MAX_HASH_DISTANCE)
+                    if ref.document == document or ref in self._known
+                ),
+                key=lambda entry: entry[0],
+            )
+        return find_duplicate(fp, [(ref, other) for _, other, ref in candidates], self.max_difference)
+
+    def add(self, ref: PageRef, fp: PageFingerprint) -> None:
+        with self._lock:
+            self._add(ref, fp)
+
+    def _add(self, ref: PageRef, fp: PageFingerprint) -> None:
+        if ref in self._entries:
+            self._remove(ref)
+        self._entries[ref] = (self._added, fp)
+        self._added += 1
+        self._tree.add(fp.dhash, ref)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        if self._removed > len(self._entries):
+            # Drop the nodes of removed pages.
+            self._tree = _HashTree()
+            for entry_ref, (_, entry_fp) in self._entries.items():
+                self._tree.add(entry_fp.dhash, entry_ref)
+            self._removed = 0
+
+    def _remove(self, ref: PageRef) -> None:
+        _, fp = self._entries.pop(ref)
+        self._tree.discard(fp.dhash, ref)
+        self._removed += 1
+        self._known.discard(ref)
+        self._texts.pop(ref, None)
+
+    def entries(self) -> List[Tuple[PageRef, PageFingerprint]]:
+        with self._lock:
+            return [(ref, fp) for ref, (_, fp) in self._entries.items()]
+
+    def set_text(self, ref: PageRef, text: str, dpi: Optional[int]) -> None:
+        with self._lock:
+            if ref in self._entries:
+                self._texts[ref] = (text, dpi)
+                self._known.add(ref)
+
+    def text(self, ref: PageRef) -> Optional[Tuple[str, Optional[int]]]:
+        """Return `(text, dpi)` of an indexed page whose text is known, or None if it was dropped since."""
+
+        with self._lock:
+            return self._texts.get(ref)
+
+    def snapshot(self, limit: int = 512) -> List[Tuple[PageRef, PageFingerprint]]:
+        """Return the latest `limit` entries whose text is known (to seed a pool worker).
+
+        The snapshot is pickled with every pool task, hence the limit.
+        """
+
+        with self._lock:
+            known = [(ref, fp) for ref, (_, fp) in self._entries.items() if ref in self._known]
+        return known[-limit:]
+
+
+def find_duplicate(
+    fp: PageFingerprint,
+    candidates: Sequence[Tuple[PageRef, PageFingerprint]],
+    max_difference: float,
+) -> Optional[PageRef]:
+    """Return the candidate closest to `fp` within `max_difference`, or None."""
+
+    best: Optional[PageRef] = None
+    best_difference = max_difference
+    for ref, other in candidates:
+        if abs(fp.aspect - other.aspect) > _MAX_ASPECT_DIFFERENCE * other.aspect:
+            continue
+        if fp.hash_distance(other) > _MAX_HASH_DISTANCE:
+            continue
+        difference = fp.difference(other)
+        if difference <= best_difference:
+            best, best_difference = ref, difference
+    return best
@@ -0,0 +1,215 @@
+"""Threaded stage pipeline with bounded queues and a memory ceiling.
+
+A pipeline is a source iterator (run on its own thread) followed by stages,
+each a function applied by `workers` threads and fed through a queue of at
+most `queue_depth` items. Results come out in source order. Backpressure is
+end to end: the number of items in flight is capped, so a fast producer
+(e.g. the renderer) blocks instead of running ahead of slow consumers (OCR,
+correction, writing), and memory stays flat however long the input is.
+
+Items that carry large buffers can additionally be charged against a
+`MemoryBudget`, which caps their total size across all stages.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence
+
+# How often blocked threads re-check whether the pipeline was shut down.
+_POLL_SECONDS = 0.1
+
+_END = object()
+
+
+class PipelineClosed(Exception):
+    """Raised inside pipeline threads once the pipeline has been shut down."""
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline step: `fn` applied to every item by `workers` threads."""
+
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    queue_depth: int = 4
+
+
+class MemoryBudget:
+    """Caps the total size of buffers (e.g. page images) alive in a pipeline.
+
+    `acquire` blocks while the budget is exhausted. A single buffer larger
+    than the whole budget is let through once nothing else is held, so an
+    oversized page slows the pipeline down but cannot deadlock it.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1.")
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self.peak = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes: int) -> None:
+        with self._cond:
+            while self.in_use and self.in_use + nbytes > self.max_bytes:
+                if self._closed:
+                    raise PipelineClosed()
+                self._cond.wait()
+            if self._closed:
+                raise PipelineClosed()
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+
+    def release(self, nbytes: int) -> None:
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """Wake up and fail every pending `acquire`."""
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class _Failure:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def run_stages(
+    source: Iterable[Any],
+    stages: Sequence[Stage],
+    *,
+    memory: Optional[MemoryBudget] = None,
+) -> Iterator[Any]:
+    """Run `source` through `stages`, yielding the final results in source order.
+
+    The first exception raised by the source or any stage is re-raised here.
+    Closing the returned generator early shuts every thread down (threads
+    finish the item they are working on first); `memory`, the budget the
+    source and stages charge their buffers to, is closed along with it.
+    """
+
+    for stage in stages:
+        if stage.workers < 1 or stage.queue_depth < 1:
+            raise ValueError(f"Stage {stage.name!r}: workers and queue_depth must be >= 1.")
+
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=stage.queue_depth) for stage in stages]
+    queues.append(queue.Queue())  # results; bounded by `slots` below
+    # Items between the source and the consumer; bounds the reorder buffer too.
+    slots = threading.Semaphore(sum(stage.queue_depth + stage.workers for stage in stages) or 1)
+
+    def _put(q: queue.Queue, item: Any) -> None:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+        raise PipelineClosed()
+
+    def _get(q: queue.Queue) -> Any:
+        while not stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        raise PipelineClosed()
+
+    def _fail(error: BaseException) -> None:
+        # Errors skip the remaining stages and go straight to the consumer.
+        queues[-1].put((-1, _Failure(error)))
+        stop.set()
+
+    def _feed() -> None:
+        iterator = iter(source)
+        try:
+            seq = 0
+            while True:
+                while not slots.acquire(timeout=_POLL_SECONDS):
+                    if stop.is_set():
+                        return
+                if stop.is_set():
+                    return
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    _put(queues[0], (seq, _END))
+                    return
+                _put(queues[0], (seq, item))
+                seq += 1
+        except PipelineClosed:
+            pass
+        except BaseException as exc:
+            _fail(exc)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def _work(index: int) -> None:
+        stage, inbox, outbox = stages[index], queues[index], queues[index + 1]
+        try:
+            while True:
+                seq, item = _get(inbox)
+                if item is _END:
+                    # Pass the end marker on to the sibling workers, then downstream.
+                    with end_lock:
+                        finished[index] += 1
+                        last = finished[index] == stage.workers
+                    if last:
+                        _put(outbox, (seq, _END))
+                    else:
+                        _put(inbox, (seq, _END))
+                    return
+                _put(outbox, (seq, stage.fn(item)))
+        except PipelineClosed:
+            pass
+        except BaseException as exc:
+            _fail(exc)
+
+    end_lock = threading.Lock()
+    finished = [0] * len(stages)
+    threads = [threading.Thread(target=_feed, name="pipeline-source", daemon=True)]
+    for index, stage in enumerate(stages):
+        threads.extend(
+            threading.Thread(target=_work, args=(index,), name=f"pipeline-{stage.name}-{n}", daemon=True)
+            for n in range(stage.workers)
+        )
+    for thread in threads:
+        thread.start()
+
+    buffered: Dict[int, Any] = {}
+    next_seq = 0
+    end_seq: Optional[int] = None
+    try:
+        while end_seq is None or next_seq < end_seq:
+            if next_seq in buffered:
+                item = buffered.pop(next_seq)
+                next_seq += 1
+                slots.release()
+                yield item
+                continue
+
+            seq, item = queues[-1].get()
+            if isinstance(item, _Failure):
+                raise item.error
+            if item is _END:
+                end_seq = seq
+            else:
+                buffered[seq] = item
+    finally:
+        stop.set()
+        if memory is not None:
+            memory.close()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,207 @@
+"""Optional image clean-up before OCR, built on NumPy.
+
+Rendered pages reach tesseract as full-colour images. Scans in particular
+carry tinted or noisy backgrounds, dark scanner borders and a slight skew,
+all of which cost tesseract time and accuracy. This stage:
+
+- converts to 8-bit grayscale,
+- binarizes with a local (adaptive) mean threshold, so uneven lighting and
+  tinted paper do not swallow faint text, and drops isolated speckles,
+- estimates and removes skew from the horizontal projection profile,
+- crops empty margins and scanner borders,
+
+and hands tesseract a compact 1-bit image.
+
+NumPy is an optional dependency; it is only imported when preprocessing is
+enabled.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+from PIL import Image
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError("Image preprocessing requires NumPy (pip install numpy).") from exc
+    return numpy
+
+
+def to_grayscale(image: Image.Image):
+    """Return the image as a 2-D uint8 array (ITU-R 601 luma)."""
+
+    np = _import_numpy()
+    if image.mode in ("L", "1"):
+        return np.asarray(image.convert("L"))
+    rgb = np.asarray(image.convert("RGB"), dtype=np.uint16)
+    # Integer weights summing to 256 keep the whole computation in uint16.
+    luma = rgb[..., 0] * 77 + rgb[..., 1] * 150 + rgb[..., 2] * 29
+    return (luma >> 8).astype(np.uint8)
+
+
+def binarize(gray, *, block_size: int = 41, offset: int = 10):
+    """Return a boolean ink mask using a local mean threshold.
+
+    A pixel is ink when it is more than `offset` levels darker than the mean
+    of the `block_size` x `block_size` window around it. Window sums come
+    from running sums (one pass per axis), so the cost does not depend on
+    `block_size`.
+    """
+
+    np = _import_numpy()
+    half = block_size // 2
+    gray = gray.astype(np.int32)
+    window_sum, rows = _box_sum(gray, half, axis=0)
+    window_sum, cols = _box_sum(window_sum, half, axis=1)
+    area = rows[:, None] * cols[None, :]
+    return gray * area < window_sum - offset * area
+
+
+def despeckle(ink, *, min_neighbours: int = 2):
+    """Drop ink pixels with fewer than `min_neighbours` ink pixels around them."""
+
+    np = _import_numpy()
+    counts = ink.astype(np.int32)
+    counts, _ = _box_sum(counts, 1, axis=0)
+    counts, _ = _box_sum(counts, 1, axis=1)
+    # The 3x3 count includes the pixel itself.
+    return ink & (counts > min_neighbours)
+
+
+def _box_sum(values, half: int, axis: int):
+    """Sum `values` over a window of +-`half` along `axis` (clipped at the edges).
+
+    Returns the sums and the window length at each position.
+    """
+
+    np = _import_numpy()
+    n = values.shape[axis]
+    shape = list(values.shape)
+    shape[axis] = 1
+    cumulative = np.concatenate(
+        [np.zeros(shape, dtype=np.int32), np.cumsum(values, axis=axis, dtype=np.int32)], axis=axis
+    )
+    index = np.arange(n)
+    upper = np.minimum(index + half + 1, n)
+    lower = np.maximum(index - half, 0)
+    sums = np.take(cumulative, upper, axis=axis) - np.take(cumulative, lower, axis=axis)
+    return sums, upper - lower
+
+
+def estimate_skew(ink, *, max_angle: float = 5.0, step: float = 0.25, max_points: int = 200_000) -> float:
+    """Return the skew angle (degrees, counter-clockwise) of the text lines in `ink`.
+
+    Each candidate angle projects (a sample of) the ink pixels onto the
+    vertical axis; text lines are level where that row histogram is sharpest.
+    """
+
+    np = _import_numpy()
+    ys, xs = np.nonzero(ink)
+    if len(ys) < 2:
+        return 0.0
+    if len(ys) > max_points:
+        pick = np.random.default_rng(0).choice(len(ys), max_points, replace=False)
+        ys, xs = ys[pick], xs[pick]
+
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    radians = np.deg2rad(angles)
+    # One row per candidate angle: the projected row of every ink pixel.
+    projected = np.rint(
+        ys[None, :] * np.cos(radians)[:, None] + xs[None, :] * np.sin(radians)[:, None]
+    ).astype(np.int64)
+    projected -= projected.min(axis=1, keepdims=True)
+
+    best_angle, best_score = 0.0, -1.0
+    for angle, rows in zip(angles, projected):
+        histogram = np.bincount(rows).astype(np.float64)
+        score = float(np.sum(np.diff(histogram) ** 2))
+        # Prefer the smallest correction among (near-)equal scores.
+        if score > best_score * (1 + 1e-9) or (score >= best_score and abs(angle) < abs(best_angle)):
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def ink_bounding_box(
+    ink,
+    *,
+    min_fraction: float = 0.002,
+    border_fraction: float = 0.5,
+    edge_fraction: float = 0.1,
+    border_pad: int = 3,
+) -> Optional[Tuple[int, int, int, int]]:
+    """Return `(left, top, right, bottom)` of the content in `ink`, or None if blank.
+
+    Scanner borders show up as rows / columns that are mostly ink (more than
+    `border_fraction`) near the image edges (within `edge_fraction` of the
+    size); everything from the edge up to the innermost such row / column
+    is cut away first. Of the rest, rows / columns with less than
+    `min_fraction` ink are treated as empty.
+    """
+
+    np = _import_numpy()
+    height, width = ink.shape
+    top, bottom = _inside_borders(ink.sum(axis=1) / width, border_fraction, edge_fraction, border_pad)
+    left, right = _inside_borders(ink.sum(axis=0) / height, border_fraction, edge_fraction, border_pad)
+    content = ink[top:bottom, left:right]
+    if content.size == 0:
+        return None
+
+    rows = np.nonzero(content.mean(axis=1) > min_fraction)[0]
+    cols = np.nonzero(content.mean(axis=0) > min_fraction)[0]
+    if len(rows) == 0 or len(cols) == 0:
+        return None
+    return left + int(cols[0]), top + int(rows[0]), left + int(cols[-1]) + 1, top + int(rows[-1]) + 1
+
+
+def _inside_borders(fraction, border_fraction: float, edge_fraction: float, pad: int) -> Tuple[int, int]:
+    """Return the `[start, stop)` span of `fraction` inside any edge borders."""
+
+    np = _import_numpy()
+    n = len(fraction)
+    edge = max(1, int(n * edge_fraction))
+    border = np.nonzero(fraction > border_fraction)[0]
+    leading = border[border < edge]
+    trailing = border[border >= n - edge]
+    start = int(leading[-1]) + 1 + pad if len(leading) else 0
+    stop = int(trailing[0]) - pad if len(trailing) else n
+    return start, max(start, stop)
+
+
+def preprocess_image(
+    image: Image.Image,
+    *,
+    deskew: bool = True,
+    crop: bool = True,
+    margin: int = 20,
+    block_size: int = 41,
+    offset: int = 10,
+) -> Image.Image:
+    """Return a cleaned-up, 1-bit version of a page image for OCR."""
+
+    np = _import_numpy()
+    ink = despeckle(binarize(to_grayscale(image), block_size=block_size, offset=offset))
+
+    if deskew:
+        angle = estimate_skew(ink)
+        if angle:
+            rotated = Image.fromarray(ink).rotate(
+                -angle, resample=Image.NEAREST, expand=True, fillcolor=0
+            )
+            ink = np.asarray(rotated)
+
+    if crop:
+        box = ink_bounding_box(ink)
+        if box is not None:
+            left, top, right, bottom = box
+            height, width = ink.shape
+            ink = ink[
+                max(0, top - margin):min(height, bottom + margin),
+                max(0, left - margin):min(width, right + margin),
+            ]
+
+    # Black text on white paper.
+    return Image.fromarray(~ink)
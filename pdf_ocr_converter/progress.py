@@ -1,10 +1,20 @@
-"""Progress utilities (no third-party deps)."""
+"""Progress and logging utilities (no third-party deps)."""
 
 from __future__ import annotations
 
+import logging
 import sys
 
 
+def configure_logging(verbose: bool) -> None:
+    """Set up root logging for the command-line entry points."""
+
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else logging.INFO,
+        format="%(levelname)s %(name)s: %(message)s",
+    )
+
+
 def print_progress_bar(
     iteration: int,
     total: int,
@@ -0,0 +1,255 @@
+"""Full-text search over converted pages (SQLite FTS5).
+
+`--index DB` feeds each page's text into the index as it completes, and
+`pdf-ocr-converter search DB QUERY` returns ranked page hits with snippets.
+
+Pages are rows of an FTS5 table whose rowid encodes `(document, page)`, so
+re-converting a document replaces that document's rows for the converted
+page range (one rowid-range delete) and leaves other documents alone.
+Writes are buffered per document and committed `batch_size` pages per
+transaction: an FTS5 insert costs far less than OCR, and batching keeps
+the per-transaction sync off the page path.
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import json
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from pdf_ocr_converter.cache import CONNECT_TIMEOUT, enable_wal
+
+DEFAULT_BATCH_SIZE = 64
+# Rowid = document id * PAGE_SLOTS + page number.
+PAGE_SLOTS = 1 << 20
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    path: str
+    page: int
+    # bm25 relevance; higher is better.
+    score: float
+    snippet: str
+
+
+def _terms_query(query: str) -> str:
+    """Match every whitespace-separated term literally (FTS5 operators disabled)."""
+
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+class SearchIndex:
+    """An FTS5 page index. Usable from several threads (calls are serialized)."""
+
+    def __init__(self, path: Path, *, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1.")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        # Autocommit mode; writes use explicit `BEGIN IMMEDIATE` transactions.
+        self._conn = sqlite3.connect(
+            str(path), timeout=CONNECT_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        enable_wal(self._conn)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " path TEXT NOT NULL UNIQUE,"
+            " updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(text, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def document(self, pdf_path: Path, *, first_page: int = 1, last_page: Optional[int] = None) -> "DocumentIndexer":
+        """Return a writer for one conversion of `pdf_path`.
+
+        The document's rows for `first_page`..`last_page` (to the end when
+        None) are replaced: they are deleted with the writer's first batch.
+        """
+
+        return DocumentIndexer(self, str(pdf_path.resolve()), first_page, last_page)
+
+    def _write_batch(
+        self, path: str, pages: List[Tuple[int, str]], replace_range: Optional[Tuple[int, Optional[int]]]
+    ) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO documents (path, updated) VALUES (?, ?)"
+                    " ON CONFLICT (path) DO UPDATE SET updated = excluded.updated",
+                    (path, time.time()),
+                )
+                document_id = self._conn.execute("SELECT id FROM documents WHERE path = ?", (path,)).fetchone()[0]
+                base = document_id * PAGE_SLOTS
+                if replace_range is not None:
+                    first_page, last_page = replace_range
+                    self._conn.execute(
+                        "DELETE FROM pages WHERE rowid BETWEEN ? AND ?",
+                        (base + first_page, base + (last_page if last_page is not None else PAGE_SLOTS - 1)),
+                    )
+                rows = [(base + page, text) for page, text in pages]
+                self._conn.executemany("DELETE FROM pages WHERE rowid = ?", [(rowid,) for rowid, _ in rows])
+                self._conn.executemany("INSERT INTO pages (rowid, text) VALUES (?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, pdf_path: Path) -> None:
+        """Drop a document and all its pages from the index."""
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM documents WHERE path = ?", (str(pdf_path.resolve()),)
+                ).fetchone()
+                if row is not None:
+                    base = row[0] * PAGE_SLOTS
+                    self._conn.execute("DELETE FROM pages WHERE rowid BETWEEN ? AND ?", (base, base + PAGE_SLOTS - 1))
+                    self._conn.execute("DELETE FROM documents WHERE id = ?", row)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def search(
+        self,
+        query: str,
+        *,
+        limit: int = 10,
+        document: Optional[Path] = None,
+        syntax: bool = False,
+    ) -> List[SearchHit]:
+        """Return the best-ranked pages matching `query`.
+
+        By default every term must occur (matched literally); with `syntax`
+        the query is passed to FTS5 as is (AND / OR / NOT, "phrases",
+        prefix*, NEAR(...)).
+
+        Raises:
+            ValueError: for an invalid FTS5 query.
+        """
+
+        match = query if syntax else _terms_query(query)
+        if not match.strip():
+            return []
+        sql = (
+            "SELECT documents.path, pages.rowid - documents.id * ?, bm25(pages),"
+            " snippet(pages, 0, '[', ']', '...', 16)"
+            # Each hit's document is looked up by primary key (rowid // PAGE_SLOTS).
+            " FROM pages JOIN documents ON documents.id = pages.rowid / ?"
+            " WHERE pages MATCH ?"
+        )
+        params: list = [PAGE_SLOTS, PAGE_SLOTS, match]
+        if document is not None:
+            sql += " AND documents.path = ?"
+            params.append(str(document.resolve()))
+        sql += " ORDER BY bm25(pages) LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as exc:
+                raise ValueError(f"Invalid search query {query!r}: {exc}") from None
+        return [SearchHit(path, page, -score, snippet) for path, page, score, snippet in rows]
+
+
+class DocumentIndexer:
+    """Buffers one document's pages and writes them to the index in batches."""
+
+    def __init__(self, index: SearchIndex, path: str, first_page: int, last_page: Optional[int]) -> None:
+        self.index = index
+        self.path = path
+        self._pending: List[Tuple[int, str]] = []
+        self._replace_range: Optional[Tuple[int, Optional[int]]] = (first_page, last_page)
+
+    def add(self, page_number: int, text: str) -> None:
+        if not 1 <= page_number < PAGE_SLOTS:
+            raise ValueError(f"Page numbers must be between 1 and {PAGE_SLOTS - 1}.")
+        self._pending.append((page_number, text))
+        if len(self._pending) >= self.index.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending and self._replace_range is None:
+            return
+        self.index._write_batch(self.path, self._pending, self._replace_range)
+        self._pending = []
+        self._replace_range = None
+
+    def close(self) -> None:
+        """Write the remaining pages."""
+
+        self.flush()
+
+    def __enter__(self) -> "DocumentIndexer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pdf-ocr-converter search",
+        description="Search pages indexed with --index.",
+    )
+    parser.add_argument("index", help="Index file written with --index.")
+    parser.add_argument("query", nargs="+", help="Search terms (all must occur).")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of hits (default: 10).")
+    parser.add_argument("--document", default=None, help="Only search this PDF.")
+    parser.add_argument(
+        "--fts",
+        action="store_true",
+        help="Treat the query as FTS5 syntax (AND / OR / NOT, \"phrases\", prefix*, NEAR).",
+    )
+    parser.add_argument("--json", action="store_true", help="Print hits as JSON lines.")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    index_path = Path(args.index)
+    if not index_path.exists():
+        raise SystemExit(f"Index does not exist: {index_path}")
+
+    with SearchIndex(index_path) as index:
+        try:
+            hits = index.search(
+                " ".join(args.query),
+                limit=args.limit,
+                document=Path(args.document) if args.document else None,
+                syntax=args.fts,
+            )
+        except ValueError as exc:
+            raise SystemExit(str(exc))
+
+    for hit in hits:
+        if args.json:
+            print(json.dumps({"path": hit.path, "page": hit.page, "score": hit.score, "snippet": hit.snippet}))
+        else:
+            print(f"{hit.path}:{hit.page}\t{hit.score:.2f}\t{' '.join(hit.snippet.split())}")
+    return 0 if hits else 1
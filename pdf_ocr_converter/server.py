@@ -0,0 +1,663 @@
+"""Local HTTP conversion service with warm OCR workers.
+
+Every CLI run pays interpreter start-up, imports, OCR engine start-up and
+pool spin-up, which dominates small jobs. `pdf-ocr-converter serve` keeps one
+OCR process pool (`core.create_ocr_pool`) alive across jobs, with the
+render / OCR stack loaded in every worker (`core.warm_ocr_pool`). Jobs run
+the same code as the CLI: `core.iter_page_results` for the pages,
+`async_correction.AsyncCorrector` for correction and `diffing.changed_lines`
+for diffs.
+
+Endpoints (plain asyncio + HTTP/1.1, one request per connection; there is
+no authentication, so bind to localhost):
+
+- `POST /jobs`: run a job and stream its results back as JSON lines
+  (`application/x-ndjson`), in page order, while pages finish. The body is
+  either the PDF itself (`Content-Type: application/pdf`) or a JSON object
+  with a `"path"` inside one of the server's `path_roots`. Per-job options
+  (see `JOB_OPTIONS`) come from the query string or the JSON object.
+  Events: "queued", "started", one "page" per page (the journal's
+  `PageRecord` fields plus `source` / `dpi`), then "done" or "error".
+- `GET /jobs/<id>`: a job's status; `GET /jobs` lists recent jobs and
+  `GET /health` reports the load.
+
+Admission is bounded: `max_jobs` jobs run at once and up to `max_queued`
+more wait for a slot; beyond that `POST /jobs` is answered with 503 and
+`Retry-After`. A client that disconnects cancels its job.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor
+import dataclasses
+from dataclasses import dataclass, field
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import uuid
+
+from pdf_ocr_converter.async_correction import DEFAULT_API_BASE, AsyncCorrector, RetryPolicy, aiter_in_thread
+from pdf_ocr_converter.core import ConvertOptions, PageResult, create_ocr_pool, iter_page_results, warm_ocr_pool
+from pdf_ocr_converter.diffing import DIFF_MODES, changed_lines
+from pdf_ocr_converter.journal import PageRecord
+from pdf_ocr_converter.ocr_backends import OCR_BACKENDS
+from pdf_ocr_converter.openai_corrector import CorrectionCache
+from pdf_ocr_converter.progress import configure_logging
+from pdf_ocr_converter.textlayer import TEXT_LAYER_MODES
+
+logger = logging.getLogger(__name__)
+
+MODES = ("raw", "corrected", "diff", "all")
+
+# Options a job may set, with their types; everything else is fixed by the server.
+JOB_OPTIONS = {
+    "mode": str,
+    "diff_mode": str,
+    "dpi": int,
+    "first_page": int,
+    "last_page": int,
+    "ocr_lang": str,
+    "text_layer": str,
+    "adaptive_dpi": int,
+    "preprocess": bool,
+    "skip_blank": bool,
+    "skip_duplicates": bool,
+}
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+_MAX_HEADERS = 100
+_UPLOAD_CHUNK = 1024 * 1024
+
+
+class RequestError(Exception):
+    """A client error, answered with `status` and a JSON `{"error": message}`."""
+
+    def __init__(self, status: int, message: str, *, headers: Sequence[Tuple[str, str]] = ()) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = list(headers)
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, str]
+    # Header names are lower-cased.
+    headers: Dict[str, str]
+
+
+@dataclass
+class Job:
+    """Status of a job; `state` goes queued -> running -> done / failed / cancelled."""
+
+    id: str
+    source: str
+    mode: str
+    state: str = "queued"
+    pages_done: int = 0
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+
+
+def _coerce(value: Any, kind: type) -> Any:
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.lower() in ("1", "true", "yes", "on"):
+            return True
+        if isinstance(value, str) and value.lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(value)
+    if kind is int:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(value)
+        return int(value)
+    if not isinstance(value, str):
+        raise ValueError(value)
+    return value
+
+
+def parse_job_options(values: Dict[str, Any], defaults: ConvertOptions) -> Tuple[str, str, ConvertOptions]:
+    """Return `(mode, diff_mode, options)` for a job's query / JSON values."""
+
+    unknown = sorted(set(values) - set(JOB_OPTIONS))
+    if unknown:
+        raise RequestError(400, f"Unknown option(s): {', '.join(unknown)}.")
+
+    parsed = {}
+    for name, value in values.items():
+        try:
+            parsed[name] = _coerce(value, JOB_OPTIONS[name])
+        except ValueError:
+            raise RequestError(400, f"Invalid value for {name}: {value!r}.") from None
+
+    mode = parsed.pop("mode", "raw")
+    diff_mode = parsed.pop("diff_mode", "ndiff")
+    if mode not in MODES:
+        raise RequestError(400, f"mode must be one of {MODES}.")
+    if diff_mode not in DIFF_MODES:
+        raise RequestError(400, f"diff_mode must be one of {DIFF_MODES}.")
+    if parsed.get("text_layer", defaults.text_layer) not in TEXT_LAYER_MODES:
+        raise RequestError(400, f"text_layer must be one of {TEXT_LAYER_MODES}.")
+    return mode, diff_mode, dataclasses.replace(defaults, **parsed)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """Read a request line and headers (the body is left in `reader`); None on EOF."""
+
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError(400, "Malformed request line.") from None
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= _MAX_HEADERS:
+            raise RequestError(431, "Too many headers.")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    url = urlsplit(target)
+    return Request(method.upper(), url.path, dict(parse_qsl(url.query)), headers)
+
+
+def _write_head(writer: asyncio.StreamWriter, status: int, headers: Sequence[Tuple[str, str]]) -> None:
+    lines = [f"HTTP/1.1 {status} {_REASONS[status]}", *(f"{name}: {value}" for name, value in headers)]
+    lines += ["Connection: close", "", ""]
+    writer.write("\r\n".join(lines).encode("latin-1"))
+
+
+async def send_json(
+    writer: asyncio.StreamWriter, status: int, payload: Any, *, headers: Sequence[Tuple[str, str]] = ()
+) -> None:
+    body = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+    _write_head(
+        writer, status, [("Content-Type", "application/json"), ("Content-Length", str(len(body))), *headers]
+    )
+    writer.write(body)
+    await writer.drain()
+
+
+class _EventStream:
+    """A chunked `application/x-ndjson` response."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+
+    async def start(self, headers: Sequence[Tuple[str, str]] = ()) -> None:
+        _write_head(
+            self.writer,
+            200,
+            [
+                ("Content-Type", "application/x-ndjson"),
+                ("Transfer-Encoding", "chunked"),
+                ("Cache-Control", "no-store"),
+                *headers,
+            ],
+        )
+        await self.writer.drain()
+
+    async def send(self, event: Dict[str, Any]) -> None:
+        data = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        self.writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+        await self.writer.drain()
+
+    async def end(self) -> None:
+        self.writer.write(b"0\r\n\r\n")
+        await self.writer.drain()
+
+
+class ConversionServer:
+    """Accepts conversion jobs over HTTP and runs them on a shared OCR pool.
+
+    `executor` is the (warm) OCR pool shared by all jobs; without one, jobs
+    run the in-process pipeline. `corrector` serves the correction modes;
+    it is shared too, so its rate limits apply across jobs.
+    """
+
+    def __init__(
+        self,
+        defaults: ConvertOptions,
+        *,
+        executor: Optional[Executor] = None,
+        corrector: Optional[AsyncCorrector] = None,
+        max_jobs: int = 2,
+        max_queued: int = 8,
+        max_upload_bytes: int = 256 * 1024 * 1024,
+        path_roots: Sequence[Path] = (),
+        upload_dir: Optional[Path] = None,
+        keep_jobs: int = 256,
+    ) -> None:
+        if max_jobs < 1 or max_queued < 0:
+            raise ValueError("max_jobs must be >= 1 and max_queued >= 0.")
+
+        self.defaults = defaults
+        self.executor = executor
+        self.corrector = corrector
+        self.max_jobs = max_jobs
+        self.max_queued = max_queued
+        self.max_upload_bytes = max_upload_bytes
+        self.path_roots = [Path(root).resolve() for root in path_roots]
+        self.upload_dir = upload_dir
+        self.keep_jobs = keep_jobs
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Jobs admitted and not finished (queued, running or still uploading).
+        self.admitted = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        # asyncio primitives are created inside the running loop.
+        self._slots = asyncio.Semaphore(self.max_jobs)
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await read_request(reader)
+            if request is not None:
+                await self._dispatch(request, reader, writer)
+        except RequestError as exc:
+            await send_json(writer, exc.status, {"error": exc.message}, headers=exc.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logger.exception("Request failed")
+            try:
+                await send_json(writer, 500, {"error": "Internal server error."})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _dispatch(self, request: Request, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if request.path == "/health":
+            _require_method(request, "GET")
+            await send_json(writer, 200, self.health())
+        elif request.path == "/jobs":
+            _require_method(request, "GET", "POST")
+            if request.method == "GET":
+                await send_json(writer, 200, {"jobs": [dataclasses.asdict(job) for job in self.jobs.values()]})
+            else:
+                await self._submit(request, reader, writer)
+        elif request.path.startswith("/jobs/"):
+            _require_method(request, "GET")
+            job = self.jobs.get(request.path[len("/jobs/"):])
+            if job is None:
+                raise RequestError(404, "No such job.")
+            await send_json(writer, 200, dataclasses.asdict(job))
+        else:
+            raise RequestError(404, "Not found.")
+
+    def health(self) -> Dict[str, Any]:
+        running = sum(1 for job in self.jobs.values() if job.state == "running")
+        return {
+            "status": "ok",
+            "admitted": self.admitted,
+            "running": running,
+            "max_jobs": self.max_jobs,
+            "max_queued": self.max_queued,
+        }
+
+    async def _submit(self, request: Request, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Admission is decided before the upload is read, so it also bounds
+        # the uploads buffered on disk.
+        if self.admitted >= self.max_jobs + self.max_queued:
+            raise RequestError(503, "Too many jobs; retry later.", headers=[("Retry-After", "1")])
+
+        self.admitted += 1
+        upload: Optional[Path] = None
+        try:
+            pdf_path, upload, values = await self._read_job_input(request, reader)
+            mode, diff_mode, options = parse_job_options(values, self.defaults)
+            if mode != "raw" and self.corrector is None:
+                raise RequestError(400, "Correction is not configured on this server (OPENAI_API_KEY).")
+            source = "upload" if upload is not None else str(pdf_path)
+            await self._run(request, reader, writer, pdf_path, mode, diff_mode, options, source=source)
+        finally:
+            if upload is not None:
+                upload.unlink()
+            self.admitted -= 1
+
+    async def _read_job_input(
+        self, request: Request, reader: asyncio.StreamReader
+    ) -> Tuple[Path, Optional[Path], Dict[str, Any]]:
+        """Return `(pdf_path, uploaded_file_or_None, option_values)` for a POST /jobs."""
+
+        if "chunked" in request.headers.get("transfer-encoding", "").lower():
+            raise RequestError(411, "Content-Length is required.")
+        try:
+            length = int(request.headers.get("content-length", ""))
+        except ValueError:
+            raise RequestError(411, "Content-Length is required.") from None
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        values: Dict[str, Any] = dict(request.query)
+
+        if content_type == "application/pdf":
+            if length > self.max_upload_bytes:
+                raise RequestError(413, f"Uploads are limited to {self.max_upload_bytes} bytes.")
+            fd, name = tempfile.mkstemp(suffix=".pdf", prefix="upload-", dir=self.upload_dir)
+            upload = Path(name)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    remaining = length
+                    while remaining:
+                        chunk = await reader.readexactly(min(remaining, _UPLOAD_CHUNK))
+                        f.write(chunk)
+                        remaining -= len(chunk)
+            except BaseException:
+                upload.unlink()
+                raise
+            return upload, upload, values
+
+        if content_type == "application/json":
+            if length > 1024 * 1024:
+                raise RequestError(413, "JSON bodies are limited to 1 MiB.")
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except (ValueError, UnicodeDecodeError):
+                raise RequestError(400, "Invalid JSON body.") from None
+            if not isinstance(body, dict) or not isinstance(body.get("path"), str):
+                raise RequestError(400, 'The JSON body needs a "path".')
+            values.update(body)
+            return self._allowed_path(values.pop("path")), None, values
+
+        raise RequestError(415, "Send application/pdf (the file) or application/json (a path).")
+
+    def _allowed_path(self, path: str) -> Path:
+        resolved = Path(path).expanduser().resolve()
+        if not any(resolved == root or root in resolved.parents for root in self.path_roots):
+            raise RequestError(400, "Path is outside the server's --path-root directories.")
+        if not resolved.is_file():
+            raise RequestError(400, f"No such file: {resolved}")
+        return resolved
+
+    def _new_job(self, source: str, mode: str) -> Job:
+        job = Job(uuid.uuid4().hex[:16], source, mode)
+        self.jobs[job.id] = job
+        # Forget the oldest finished jobs.
+        for job_id in [job_id for job_id, old in self.jobs.items() if old.finished is not None]:
+            if len(self.jobs) <= self.keep_jobs:
+                break
+            del self.jobs[job_id]
+        return job
+
+    async def _run(
+        self,
+        request: Request,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        pdf_path: Path,
+        mode: str,
+        diff_mode: str,
+        options: ConvertOptions,
+        *,
+        source: str,
+    ) -> None:
+        job = self._new_job(source, mode)
+        # A queued job sends nothing until it gets a slot, and a running one
+        # may go long between pages, so a closed connection is noticed by
+        # reading rather than on the next write; it cancels the job's task.
+        work = asyncio.ensure_future(self._run_job(job, writer, pdf_path, mode, diff_mode, options))
+        disconnect = asyncio.ensure_future(_read_until_eof(reader))
+        try:
+            await asyncio.wait({work, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            disconnect.cancel()
+            work.cancel()
+            # Let the job unwind (stop OCR, cancel corrections) before the connection closes.
+            await asyncio.wait({work})
+        if not work.cancelled():
+            work.result()
+
+    async def _run_job(
+        self,
+        job: Job,
+        writer: asyncio.StreamWriter,
+        pdf_path: Path,
+        mode: str,
+        diff_mode: str,
+        options: ConvertOptions,
+    ) -> None:
+        stream = _EventStream(writer)
+        try:
+            await stream.start([("X-Job-Id", job.id)])
+            await stream.send({"event": "queued", "job": job.id})
+            async with self._slots:
+                job.state, job.started = "running", time.time()
+                await stream.send({"event": "started", "job": job.id})
+                await self._stream_pages(job, pdf_path, mode, diff_mode, options, stream)
+            job.state = "done"
+            await stream.send({"event": "done", "job": job.id, "pages": job.pages_done})
+            await stream.end()
+        except (ConnectionError, asyncio.CancelledError):
+            job.state = "cancelled"
+            raise
+        except Exception as exc:
+            logger.exception("Job %s failed", job.id)
+            job.state, job.error = "failed", str(exc) or repr(exc)
+            await stream.send({"event": "error", "job": job.id, "error": job.error})
+            await stream.end()
+        finally:
+            job.finished = time.time()
+            logger.info("Job %s %s (%d pages, %s)", job.id, job.state, job.pages_done, job.source)
+
+    async def _stream_pages(
+        self,
+        job: Job,
+        pdf_path: Path,
+        mode: str,
+        diff_mode: str,
+        options: ConvertOptions,
+        stream: _EventStream,
+    ) -> None:
+        want_raw = mode in ("raw", "all")
+        want_corrected = mode in ("corrected", "all")
+        want_diff = mode in ("diff", "all")
+
+        results = aiter_in_thread(iter_page_results(pdf_path, options, executor=self.executor))
+        pages: AsyncIterator[Tuple[PageResult, Optional[str]]]
+        if want_corrected or want_diff:
+            pages = self.corrector.correct_stream((result, result.text) async for result in results)
+        else:
+            pages = _uncorrected(results)
+
+        try:
+            async for result, corrected_text in pages:
+                diff = changed_lines(result.text, corrected_text, mode=diff_mode) if want_diff else None
+                record = PageRecord(
+                    result.page_number,
+                    raw=result.text if want_raw else None,
+                    corrected=corrected_text if want_corrected else None,
+                    diff=diff,
+                )
+                await stream.send(
+                    {
+                        "event": "page",
+                        "job": job.id,
+                        **dataclasses.asdict(record),
+                        "source": result.source,
+                        "dpi": result.dpi,
+                    }
+                )
+                job.pages_done += 1
+        finally:
+            # Stops OCR (and cancels queued pool chunks) when the job ends early.
+            await pages.aclose()
+            await results.aclose()
+
+
+async def _read_until_eof(reader: asyncio.StreamReader) -> None:
+    """Return when the client closes the connection."""
+
+    try:
+        # One request per connection: anything else the client sends is ignored.
+        while await reader.read(_UPLOAD_CHUNK):
+            pass
+    except ConnectionError:
+        pass
+
+
+async def _uncorrected(results: AsyncIterator[PageResult]) -> AsyncIterator[Tuple[PageResult, None]]:
+    try:
+        async for result in results:
+            yield result, None
+    finally:
+        await results.aclose()
+
+
+def _require_method(request: Request, *methods: str) -> None:
+    if request.method not in methods:
+        raise RequestError(405, f"Use {' or '.join(methods)}.", headers=[("Allow", ", ".join(methods))])
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pdf-ocr-converter serve",
+        description="Run a local HTTP conversion service with warm OCR workers.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765).")
+    parser.add_argument("--workers", type=int, default=2, help="Warm OCR worker processes (default: 2).")
+    parser.add_argument("--max-jobs", type=int, default=2, help="Jobs converted at once (default: 2).")
+    parser.add_argument(
+        "--max-queued", type=int, default=8, help="Jobs waiting for a slot before new ones get 503 (default: 8)."
+    )
+    parser.add_argument("--max-upload-mb", type=int, default=256, help="Largest accepted upload (default: 256).")
+    parser.add_argument(
+        "--path-root",
+        action="append",
+        default=None,
+        help="Directory whose PDFs may be converted by path (repeatable; default: the current directory).",
+    )
+    parser.add_argument("--dpi", type=int, default=300, help="Default DPI for PDF rendering (default: 300).")
+    parser.add_argument(
+        "--ocr-lang",
+        default=None,
+        help="Default tesseract language(s), e.g. 'eng+deu', or 'auto[:eng+rus]' to detect per page.",
+    )
+    parser.add_argument("--text-layer", choices=TEXT_LAYER_MODES, default="auto", help="Default text-layer mode.")
+    parser.add_argument("--ocr-backend", choices=OCR_BACKENDS, default="subprocess", help="OCR engine.")
+    parser.add_argument("--poppler-path", default=None, help="Path to poppler 'bin' folder (Windows).")
+    parser.add_argument("--tesseract-cmd", default=None, help="Path to tesseract.exe (Windows).")
+    parser.add_argument("--cache-dir", default=None, help="Directory for the persistent OCR / correction caches.")
+    parser.add_argument("--cache-max-mb", type=int, default=512, help="Size limit per cache (default: 512).")
+    parser.add_argument(
+        "--correction-concurrency", type=int, default=4, help="Correction requests in flight (default: 4)."
+    )
+    parser.add_argument("--rpm", type=float, default=None, help="Correction requests per minute limit.")
+    parser.add_argument("--tpm", type=float, default=None, help="Correction tokens per minute limit.")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries on HTTP 429 / 5xx (default: 5).")
+    parser.add_argument(
+        "--api-base",
+        default=None,
+        help="Completion API base URL (default: $OPENAI_API_BASE, else https://api.openai.com/v1).",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Enable debug logging.")
+    return parser
+
+
+async def serve(args: argparse.Namespace) -> None:
+    defaults = ConvertOptions(
+        dpi=args.dpi,
+        poppler_path=Path(args.poppler_path) if args.poppler_path else None,
+        tesseract_cmd=Path(args.tesseract_cmd) if args.tesseract_cmd else None,
+        ocr_lang=args.ocr_lang,
+        workers=args.workers,
+        text_layer=args.text_layer,
+        cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        ocr_backend=args.ocr_backend,
+    )
+
+    pool = create_ocr_pool(args.workers, tesseract_cmd=defaults.tesseract_cmd)
+    correction_cache: Optional[CorrectionCache] = None
+    try:
+        try:
+            warmed = await asyncio.to_thread(
+                warm_ocr_pool, pool, args.workers, ocr_backend=args.ocr_backend, ocr_lang=args.ocr_lang
+            )
+            logger.info("%d OCR workers ready.", warmed)
+        except Exception as exc:
+            # The server still serves text-layer pages; OCR jobs will report the error.
+            logger.warning("Could not start the OCR engine in the workers: %s", exc)
+
+        corrector = None
+        api_key = os.getenv("OPENAI_API_KEY", "")
+        if api_key:
+            if defaults.cache_dir is not None:
+                correction_cache = CorrectionCache(
+                    defaults.cache_dir / "corrections.sqlite3", max_bytes=defaults.cache_max_bytes
+                )
+            corrector = AsyncCorrector(
+                api_key,
+                api_base=args.api_base or os.getenv("OPENAI_API_BASE", DEFAULT_API_BASE),
+                max_in_flight=args.correction_concurrency,
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                retry=RetryPolicy(max_retries=args.max_retries),
+                cache=correction_cache,
+            )
+
+        server = ConversionServer(
+            defaults,
+            executor=pool,
+            corrector=corrector,
+            max_jobs=args.max_jobs,
+            max_queued=args.max_queued,
+            max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+            path_roots=[Path(root) for root in args.path_root or [os.getcwd()]],
+        )
+        listener = await server.start(args.host, args.port)
+        for sock in listener.sockets:
+            logger.info("Listening on http://%s:%d", *sock.getsockname()[:2])
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if correction_cache is not None:
+            correction_cache.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging(args.verbose)
+    from dotenv import load_dotenv
+
+    load_dotenv()  # allow OPENAI_API_KEY from a local .env
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
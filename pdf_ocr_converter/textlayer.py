@@ -0,0 +1,63 @@
+"""Embedded text-layer extraction for born-digital PDFs.
+
+Pages that already carry extractable text do not need to be rasterized and
+OCR'd. This module decides whether a page's embedded text is trustworthy
+enough to use instead of OCR output.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TEXT_LAYER_MODES = ("auto", "only", "never")
+
+
+def extract_page_text(page) -> str:
+    """Return the embedded text of a PyPDF2 page ("" if extraction fails)."""
+
+    try:
+        return page.extract_text() or ""
+    except Exception:  # PyPDF2 raises a wide variety of errors on malformed pages.
+        logger.debug("Text-layer extraction failed", exc_info=True)
+        return ""
+
+
+def is_usable_text(
+    text: Optional[str],
+    *,
+    min_chars: int = 20,
+    min_alnum_ratio: float = 0.6,
+    max_bad_ratio: float = 0.01,
+    min_avg_word_len: float = 1.5,
+    max_avg_word_len: float = 20.0,
+) -> bool:
+    """Return True if extracted text looks like real text rather than noise.
+
+    The checks target the usual failure modes of PDF text extraction:
+    - scanned pages with no (or almost no) text layer,
+    - fonts without a ToUnicode map, which extract as replacement or control
+      characters / symbol soup,
+    - broken spacing, which extracts as a few very long "words".
+    """
+
+    if not text:
+        return False
+
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < min_chars:
+        return False
+
+    bad = sum(1 for c in chars if c == "\ufffd" or not c.isprintable())
+    if bad / len(chars) > max_bad_ratio:
+        return False
+
+    alnum = sum(1 for c in chars if c.isalnum())
+    if alnum / len(chars) < min_alnum_ratio:
+        return False
+
+    words = text.split()
+    avg_word_len = len(chars) / len(words)
+    return min_avg_word_len <= avg_word_len <= max_avg_word_len
@@ -0,0 +1,142 @@
+"""OCR of oversized page images in overlapping horizontal strips.
+
+Engineering drawings and broadsheets rendered at 300 DPI easily exceed
+100 megapixels; tesseract then runs for minutes on one core with a working
+set several times the bitmap. `ocr_tiled` cuts such a page into horizontal
+strips, OCRs the strips on a thread pool (tesseract runs outside the GIL,
+in a subprocess or in C++) and stitches the lines back together.
+
+Each strip owns a band of rows and is cropped with half of `overlap` extra
+on either side. A line is kept only by the strip that owns its vertical
+centre, so lines seen twice in an overlap are not duplicated, and a line
+cut at a strip edge (its centre is in the margin) is dropped there and
+read whole by the neighbouring strip. This holds for lines up to `overlap`
+pixels tall. Reading order is kept within a strip; multi-column layouts
+that continue across strips come out strip by strip.
+
+The strip threads are kept for the life of the process, one pool per
+thread count, so the OCR engine each thread holds (see
+`ocr_backends.get_backend`) is loaded once rather than for every page.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
+from dataclasses import dataclass
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from pdf_ocr_converter.ocr_backends import OcrLine
+
+DEFAULT_TILE_THRESHOLD = 40_000_000
+DEFAULT_STRIP_PIXELS = 12_000_000
+# Strips own at least this many times `overlap` rows, so overlap stays a
+# small share of the work.
+_MIN_OWNED_OVERLAPS = 3
+
+# Strip thread pools by size; see `_strip_pool`.
+_strip_pools: Dict[int, ThreadPoolExecutor] = {}
+_strip_pools_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Strip:
+    """Rows `[top, bottom)` are OCR'd; lines centred in `[own_top, own_bottom)` are kept."""
+
+    top: int
+    bottom: int
+    own_top: int
+    own_bottom: int
+
+
+def plan_strips(width: int, height: int, *, overlap: int, strip_pixels: int = DEFAULT_STRIP_PIXELS) -> List[Strip]:
+    """Split a `width` x `height` image into strips of about `strip_pixels` pixels."""
+
+    if overlap < 0 or strip_pixels < 1:
+        raise ValueError("overlap must be >= 0 and strip_pixels >= 1.")
+    count = math.ceil(width * height / strip_pixels)
+    if overlap:
+        count = min(count, height // (_MIN_OWNED_OVERLAPS * overlap))
+    count = max(1, count)
+
+    bounds = [round(i * height / count) for i in range(count + 1)]
+    half = overlap // 2
+    return [
+        Strip(max(0, own_top - half), min(height, own_bottom + overlap - half), own_top, own_bottom)
+        for own_top, own_bottom in zip(bounds, bounds[1:])
+    ]
+
+
+def stitch(strips: Sequence[Strip], strip_lines: Sequence[Sequence[OcrLine]]) -> Tuple[str, List[OcrLine]]:
+    """Merge per-strip lines (strip coordinates) into page text and page-coordinate lines.
+
+    Paragraph breaks (a blank line) follow tesseract's block / paragraph
+    numbers within a strip; across a strip boundary a line continues the
+    paragraph when it starts below the previous line within one line height.
+    """
+
+    kept: List[Tuple[int, OcrLine]] = []
+    for index, (strip, lines) in enumerate(zip(strips, strip_lines)):
+        for line in lines:
+            top, bottom = line.top + strip.top, line.bottom + strip.top
+            if strip.own_top <= (top + bottom) // 2 < strip.own_bottom:
+                kept.append((index, dataclasses.replace(line, top=top, bottom=bottom)))
+
+    parts: List[str] = []
+    previous: Optional[Tuple[int, OcrLine]] = None
+    for index, line in kept:
+        if previous is not None:
+            previous_index, previous_line = previous
+            if previous_index == index:
+                same_paragraph = (line.block, line.paragraph) == (previous_line.block, previous_line.paragraph)
+            else:
+                gap = line.top - previous_line.bottom
+                same_paragraph = 0 <= gap <= previous_line.bottom - previous_line.top
+            parts.append("\n" if same_paragraph else "\n\n")
+        parts.append(line.text)
+        previous = (index, line)
+
+    text = "".join(parts) + "\n" if parts else ""
+    return text, [line for _, line in kept]
+
+
+def _strip_pool(threads: int) -> ThreadPoolExecutor:
+    """Return the process-wide pool of `threads` strip threads, creating it on first use."""
+
+    with _strip_pools_lock:
+        pool = _strip_pools.get(threads)
+        if pool is None:
+            pool = _strip_pools[threads] = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ocr-strip")
+        return pool
+
+
+def ocr_tiled(
+    image,
+    recognize_lines: Callable[[object], List[OcrLine]],
+    *,
+    overlap: int,
+    strip_pixels: int = DEFAULT_STRIP_PIXELS,
+    threads: int = 1,
+) -> Tuple[str, List[float]]:
+    """OCR a large PIL image strip by strip; return its text and word confidences.
+
+    `recognize_lines` OCRs one strip image and is called from up to
+    `threads` threads at once (see `ocr_backends.OcrBackend.lines`). The
+    threads are shared with other pages OCR'd with the same `threads`.
+    """
+
+    strips = plan_strips(image.width, image.height, overlap=overlap, strip_pixels=strip_pixels)
+
+    def _ocr_strip(strip: Strip) -> List[OcrLine]:
+        with image.crop((0, strip.top, image.width, strip.bottom)) as crop:
+            return recognize_lines(crop)
+
+    if threads > 1 and len(strips) > 1:
+        strip_lines = list(_strip_pool(threads).map(_ocr_strip, strips))
+    else:
+        strip_lines = [_ocr_strip(strip) for strip in strips]
+
+    text, lines = stitch(strips, strip_lines)
+    return text, [confidence for line in lines for confidence in line.confidences]
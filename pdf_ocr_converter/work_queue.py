@@ -0,0 +1,691 @@
+"""Work queue for converting documents with several processes or hosts.
+
+`pdf-ocr-converter queue add` splits documents into page-range work items
+in a SQLite job table; any number of `pdf-ocr-converter queue work`
+processes, on any hosts that see the same volume, claim items and convert
+them; `pdf-ocr-converter queue assemble` writes a finished document's
+output files, identical to the ones `pdf-ocr-converter` writes for it.
+
+A claimed item is leased to its worker for `lease_seconds`. The worker
+renews the lease from a heartbeat thread and with every page it stores, so
+an item whose worker died or hung becomes claimable again once its lease
+expires. Each claim bumps the item's attempt counter, which fences the
+previous holder: a worker whose lease was taken over gets `LeaseLostError`
+on its next write instead of overwriting the new holder's pages. Items are
+retried up to `max_attempts` times.
+
+Every page is committed as its own transaction, so a reclaimed item only
+redoes the pages of its range, and results survive any worker crashing.
+Lease expiry uses wall-clock time, so workers' clocks must roughly agree.
+The database uses SQLite's default rollback journal rather than WAL, which
+does not work on network file systems.
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import Executor
+import dataclasses
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from pdf_ocr_converter.core import (
+    ConvertOptions,
+    count_pdf_pages,
+    create_ocr_pool,
+    iter_page_results,
+    warm_ocr_pool,
+)
+from pdf_ocr_converter.diffing import DIFF_MODES, changed_lines
+from pdf_ocr_converter.journal import PageRecord
+from pdf_ocr_converter.ocr_backends import OCR_BACKENDS
+from pdf_ocr_converter.pipeline import Stage, run_stages
+from pdf_ocr_converter.progress import configure_logging
+from pdf_ocr_converter.textlayer import TEXT_LAYER_MODES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 120.0
+DEFAULT_PAGES_PER_ITEM = 8
+DEFAULT_MAX_ATTEMPTS = 3
+MODES = ("raw", "corrected", "diff", "all")
+
+# `ConvertOptions` fields a document may set; everything else (paths, worker
+# counts, caches) belongs to the host running the worker.
+DOCUMENT_OPTIONS = ("dpi", "ocr_lang", "text_layer", "adaptive_dpi", "preprocess", "skip_blank", "skip_duplicates")
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when a worker writes to an item whose lease it no longer holds."""
+
+
+@dataclass(frozen=True)
+class QueuedDocument:
+    id: int
+    pdf_path: Path
+    mode: str
+    diff_mode: str
+    # Values for `DOCUMENT_OPTIONS`.
+    options: Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    """A claimed page range; `attempt` identifies this claim of the item."""
+
+    id: int
+    document: QueuedDocument
+    first_page: int
+    last_page: int
+    worker: str
+    attempt: int
+
+
+class WorkQueue:
+    """The SQLite job table. One instance per process; usable from any thread."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> None:
+        if lease_seconds <= 0 or max_attempts < 1:
+            raise ValueError("lease_seconds must be > 0 and max_attempts >= 1.")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Autocommit mode; writes use explicit `BEGIN IMMEDIATE` transactions.
+        # Ids are never reused, so a re-queued document's items cannot be
+        # mistaken for the ones an old lease holder is still working on.
+        self._conn = sqlite3.connect(
+            str(path), timeout=60.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " path TEXT NOT NULL UNIQUE,"
+            " mode TEXT NOT NULL,"
+            " diff_mode TEXT NOT NULL,"
+            " options TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS items ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " document_id INTEGER NOT NULL,"
+            " first_page INTEGER NOT NULL,"
+            " last_page INTEGER NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending',"
+            " worker TEXT,"
+            " lease_expires REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT);"
+            "CREATE INDEX IF NOT EXISTS items_state ON items (state, document_id, first_page);"
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " document_id INTEGER NOT NULL,"
+            " page_number INTEGER NOT NULL,"
+            " record TEXT NOT NULL,"
+            " source TEXT NOT NULL,"
+            " dpi INTEGER,"
+            " worker TEXT NOT NULL,"
+            " PRIMARY KEY (document_id, page_number));"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "WorkQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write(self, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return result
+
+    def add_document(
+        self,
+        pdf_path: Path,
+        *,
+        mode: str = "raw",
+        diff_mode: str = "ndiff",
+        options: Optional[Dict[str, Any]] = None,
+        first_page: int = 1,
+        last_page: Optional[int] = None,
+        pages_per_item: int = DEFAULT_PAGES_PER_ITEM,
+    ) -> int:
+        """Queue a document's page range; adding a document again starts it over.
+
+        Returns the document id.
+        """
+
+        options = dict(options or {})
+        unknown = sorted(set(options) - set(DOCUMENT_OPTIONS))
+        if unknown:
+            raise ValueError(f"Unknown document option(s): {', '.join(unknown)}.")
+        if mode not in MODES or diff_mode not in DIFF_MODES:
+            raise ValueError(f"mode must be one of {MODES} and diff_mode one of {DIFF_MODES}.")
+        if pages_per_item < 1:
+            raise ValueError("pages_per_item must be >= 1.")
+
+        pdf_path = pdf_path.resolve()
+        total_pages = count_pdf_pages(pdf_path)
+        last_page = last_page or total_pages
+        if first_page < 1 or last_page < first_page or last_page > total_pages:
+            raise ValueError(f"Invalid page range {first_page}-{last_page} for {total_pages} pages.")
+
+        def _add() -> int:
+            row = self._conn.execute("SELECT id FROM documents WHERE path = ?", (str(pdf_path),)).fetchone()
+            if row is not None:
+                for table in ("items", "pages"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE document_id = ?", (row[0],))
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+            document_id = self._conn.execute(
+                "INSERT INTO documents (path, mode, diff_mode, options) VALUES (?, ?, ?, ?)",
+                (str(pdf_path), mode, diff_mode, json.dumps(options, sort_keys=True)),
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO items (document_id, first_page, last_page) VALUES (?, ?, ?)",
+                [
+                    (document_id, first, min(first + pages_per_item - 1, last_page))
+                    for first in range(first_page, last_page + 1, pages_per_item)
+                ],
+            )
+            return document_id
+
+        return self._write(_add)
+
+    def claim(self, worker: str) -> Optional[WorkItem]:
+        """Lease the next pending (or expired) item to `worker`; None if there is none."""
+
+        def _claim() -> Optional[WorkItem]:
+            now = time.time()
+            self._conn.execute(
+                "UPDATE items SET state = 'failed', error = COALESCE(error, 'lease expired')"
+                " WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            )
+            row = self._conn.execute(
+                "SELECT id, document_id, first_page, last_page, attempts FROM items"
+                " WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?)"
+                " ORDER BY document_id, first_page LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            item_id, document_id, first_page, last_page, attempts = row
+            self._conn.execute(
+                "UPDATE items SET state = 'leased', worker = ?, lease_expires = ?, attempts = ? WHERE id = ?",
+                (worker, now + self.lease_seconds, attempts + 1, item_id),
+            )
+            return WorkItem(item_id, self._document(document_id), first_page, last_page, worker, attempts + 1)
+
+        return self._write(_claim)
+
+    def _renew(self, item: WorkItem) -> bool:
+        cursor = self._conn.execute(
+            "UPDATE items SET lease_expires = ?"
+            " WHERE id = ? AND worker = ? AND attempts = ? AND state = 'leased'",
+            (time.time() + self.lease_seconds, item.id, item.worker, item.attempt),
+        )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, item: WorkItem) -> bool:
+        """Extend the item's lease; False if the lease was lost."""
+
+        return self._write(lambda: self._renew(item))
+
+    def record_page(self, item: WorkItem, record: PageRecord, *, source: str, dpi: Optional[int]) -> None:
+        """Store one page's outputs (and renew the lease) in one transaction."""
+
+        if not item.first_page <= record.page_number <= item.last_page:
+            raise ValueError(f"Page {record.page_number} is outside item {item.first_page}-{item.last_page}.")
+
+        def _record() -> None:
+            if not self._renew(item):
+                raise LeaseLostError(f"Lease on item {item.id} was lost.")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (document_id, page_number, record, source, dpi, worker)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    item.document.id,
+                    record.page_number,
+                    json.dumps(dataclasses.asdict(record), ensure_ascii=False),
+                    source,
+                    dpi,
+                    item.worker,
+                ),
+            )
+
+        self._write(_record)
+
+    def complete(self, item: WorkItem) -> None:
+        def _complete() -> None:
+            if not self._renew(item):
+                raise LeaseLostError(f"Lease on item {item.id} was lost.")
+            (stored,) = self._conn.execute(
+                "SELECT COUNT(*) FROM pages WHERE document_id = ? AND page_number BETWEEN ? AND ?",
+                (item.document.id, item.first_page, item.last_page),
+            ).fetchone()
+            if stored != item.last_page - item.first_page + 1:
+                raise ValueError(
+                    f"Item {item.id} has {stored} of pages {item.first_page}-{item.last_page} stored."
+                )
+            self._conn.execute("UPDATE items SET state = 'done', lease_expires = NULL WHERE id = ?", (item.id,))
+
+        self._write(_complete)
+
+    def fail(self, item: WorkItem, error: str) -> None:
+        """Give the item back for a retry, or fail it after `max_attempts` attempts."""
+
+        state = "failed" if item.attempt >= self.max_attempts else "pending"
+        self._write(
+            lambda: self._conn.execute(
+                "UPDATE items SET state = ?, error = ?, lease_expires = NULL"
+                " WHERE id = ? AND worker = ? AND attempts = ? AND state = 'leased'",
+                (state, error, item.id, item.worker, item.attempt),
+            )
+        )
+
+    def _document(self, document_id: int) -> QueuedDocument:
+        row = self._conn.execute(
+            "SELECT id, path, mode, diff_mode, options FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
+        return QueuedDocument(row[0], Path(row[1]), row[2], row[3], json.loads(row[4]))
+
+    def find_document(self, pdf_path: Path) -> QueuedDocument:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM documents WHERE path = ?", (str(pdf_path.resolve()),)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"{pdf_path} is not queued.")
+            return self._document(row[0])
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Per document: item counts by state, pages stored and item errors."""
+
+        with self._lock:
+            documents = self._conn.execute("SELECT id, path, mode FROM documents ORDER BY id").fetchall()
+            report = []
+            for document_id, path, mode in documents:
+                states = dict(
+                    self._conn.execute(
+                        "SELECT state, COUNT(*) FROM items WHERE document_id = ? GROUP BY state", (document_id,)
+                    ).fetchall()
+                )
+                pages = self._conn.execute(
+                    "SELECT COUNT(*) FROM pages WHERE document_id = ?", (document_id,)
+                ).fetchone()[0]
+                errors = [
+                    error
+                    for (error,) in self._conn.execute(
+                        "SELECT error FROM items WHERE document_id = ? AND error IS NOT NULL ORDER BY first_page",
+                        (document_id,),
+                    )
+                ]
+                report.append({"path": path, "mode": mode, "items": states, "pages_done": pages, "errors": errors})
+            return report
+
+    def is_drained(self) -> bool:
+        """True when no item is pending or leased."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM items WHERE state IN ('pending', 'leased') LIMIT 1").fetchone()
+            return row is None
+
+    def page_records(self, document: QueuedDocument) -> Iterator[PageRecord]:
+        """Yield a finished document's pages in order.
+
+        Raises:
+            ValueError: if any of the document's items is not done.
+        """
+
+        with self._lock:
+            unfinished = self._conn.execute(
+                "SELECT first_page, last_page, state FROM items"
+                " WHERE document_id = ? AND state != 'done' ORDER BY first_page",
+                (document.id,),
+            ).fetchall()
+            if unfinished:
+                ranges = ", ".join(f"{first}-{last} ({state})" for first, last, state in unfinished)
+                raise ValueError(f"{document.pdf_path} is not finished: pages {ranges}.")
+            rows = self._conn.execute(
+                "SELECT page_number, record FROM pages WHERE document_id = ? ORDER BY page_number", (document.id,)
+            ).fetchall()
+            items = self._conn.execute(
+                "SELECT first_page, last_page FROM items WHERE document_id = ?", (document.id,)
+            ).fetchall()
+        expected = sorted(page for first, last in items for page in range(first, last + 1))
+        if [page_number for page_number, _ in rows] != expected:
+            missing = sorted(set(expected) - {page_number for page_number, _ in rows})
+            raise ValueError(f"{document.pdf_path} is missing pages {missing}.")
+        for _, record in rows:
+            yield PageRecord(**json.loads(record))
+
+
+class _Heartbeat:
+    """Renews an item's lease every third of the lease time until stopped."""
+
+    def __init__(self, queue: WorkQueue, item: WorkItem) -> None:
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(queue, item), name="lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _run(self, queue: WorkQueue, item: WorkItem) -> None:
+        while not self._stop.wait(queue.lease_seconds / 3):
+            try:
+                if not queue.heartbeat(item):
+                    logger.warning("Lost the lease on pages %d-%d.", item.first_page, item.last_page)
+                    return
+            except sqlite3.Error as exc:  # e.g. the volume is briefly unavailable; retry on the next beat
+                logger.warning("Heartbeat failed: %s", exc)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def process_item(
+    queue: WorkQueue,
+    item: WorkItem,
+    defaults: ConvertOptions,
+    *,
+    correct: Optional[Callable[[str], str]] = None,
+    executor: Optional[Executor] = None,
+) -> None:
+    """Convert a claimed item's pages, storing each page as it finishes.
+
+    `defaults` carries the host's settings (poppler path, workers, caches);
+    the document's own options and the item's page range are applied on
+    top. `correct` corrects one page's text (needed for the correction
+    modes); it runs on a pipeline stage, so OCR of the next pages overlaps
+    it, as in the CLI. `executor` is an OCR pool shared across items (see
+    `core.create_ocr_pool`).
+    """
+
+    document = item.document
+    want_raw = document.mode in ("raw", "all")
+    want_corrected = document.mode in ("corrected", "all")
+    want_diff = document.mode in ("diff", "all")
+    if (want_corrected or want_diff) and correct is None:
+        raise ValueError(f"{document.pdf_path} needs correction (mode {document.mode}).")
+
+    options = dataclasses.replace(
+        defaults, **document.options, first_page=item.first_page, last_page=item.last_page
+    )
+    results = iter_page_results(document.pdf_path, options, executor=executor)
+    if want_corrected or want_diff:
+        stages = [Stage("correct", lambda result: (result, correct(result.text)), queue_depth=options.queue_depth)]
+        pages = run_stages(results, stages)
+    else:
+        pages = ((result, None) for result in results)
+
+    heartbeat = _Heartbeat(queue, item)
+    try:
+        for result, corrected_text in pages:
+            record = PageRecord(
+                result.page_number,
+                raw=result.text if want_raw else None,
+                corrected=corrected_text if want_corrected else None,
+                diff=changed_lines(result.text, corrected_text, mode=document.diff_mode) if want_diff else None,
+            )
+            queue.record_page(item, record, source=result.source, dpi=result.dpi)
+        queue.complete(item)
+    finally:
+        heartbeat.stop()
+        pages.close()
+        results.close()
+
+
+def run_worker(
+    queue: WorkQueue,
+    defaults: ConvertOptions,
+    *,
+    worker: Optional[str] = None,
+    correct: Optional[Callable[[str], str]] = None,
+    poll_interval: float = 5.0,
+    until_empty: bool = False,
+    executor: Optional[Executor] = None,
+) -> int:
+    """Claim and process items until interrupted; return the number of items done.
+
+    With `until_empty`, return once no item is pending or leased to anyone.
+    A failing item is logged and given back for a retry. `executor` is
+    passed to `process_item`, so one OCR pool serves every item.
+    """
+
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    while True:
+        item = queue.claim(worker)
+        if item is None:
+            if until_empty and queue.is_drained():
+                return done
+            time.sleep(poll_interval)
+            continue
+
+        logger.info("%s: pages %d-%d of %s", worker, item.first_page, item.last_page, item.document.pdf_path)
+        try:
+            process_item(queue, item, defaults, correct=correct, executor=executor)
+        except LeaseLostError as exc:
+            logger.warning("%s", exc)
+        except Exception as exc:
+            logger.exception("Pages %d-%d of %s failed", item.first_page, item.last_page, item.document.pdf_path)
+            queue.fail(item, str(exc) or repr(exc))
+        else:
+            done += 1
+
+
+def assemble(
+    queue: WorkQueue,
+    pdf_path: Path,
+    *,
+    raw_out: Path,
+    corrected_out: Path,
+    diff_out: Path,
+) -> None:
+    """Write a finished document's output files (per its mode), as the CLI does."""
+
+    from pdf_ocr_converter.cli import _write_page_record
+
+    document = queue.find_document(pdf_path)
+    records = queue.page_records(document)
+    first = next(records, None)  # raises before any output file is replaced if unfinished
+
+    paths = {
+        "raw": raw_out if document.mode in ("raw", "all") else None,
+        "corrected": corrected_out if document.mode in ("corrected", "all") else None,
+        "diff": diff_out if document.mode in ("diff", "all") else None,
+    }
+    files = {name: open(path, "w", encoding="utf-8") if path else None for name, path in paths.items()}
+    try:
+        if first is not None:
+            _write_page_record(first, files["raw"], files["corrected"], files["diff"])
+        for record in records:
+            _write_page_record(record, files["raw"], files["corrected"], files["diff"])
+    finally:
+        for fp in files.values():
+            if fp is not None:
+                fp.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pdf-ocr-converter queue",
+        description="Convert documents with workers on several processes / hosts sharing a SQLite job table.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="Queue documents as page-range work items.")
+    add.add_argument("db", help="Job table (SQLite file on a volume all workers can reach).")
+    add.add_argument("input", nargs="+", help="PDF files to convert.")
+    add.add_argument("--mode", choices=MODES, default="raw", help="Output mode.")
+    add.add_argument("--diff-mode", choices=DIFF_MODES, default="ndiff", help="Diff output (default: ndiff).")
+    add.add_argument("--first-page", type=int, default=1, help="First page to process (1-indexed).")
+    add.add_argument("--last-page", type=int, default=None, help="Last page to process (inclusive).")
+    add.add_argument(
+        "--pages-per-item",
+        type=int,
+        default=DEFAULT_PAGES_PER_ITEM,
+        help=f"Pages per work item (default: {DEFAULT_PAGES_PER_ITEM}).",
+    )
+    add.add_argument("--dpi", type=int, default=300, help="DPI for PDF rendering (default: 300).")
+    add.add_argument("--adaptive-dpi", type=int, default=None, help="OCR at this DPI first (see the main CLI).")
+    add.add_argument(
+        "--ocr-lang",
+        default=None,
+        help="Tesseract language(s), e.g. 'eng+deu', or 'auto[:eng+rus]' to detect per page.",
+    )
+    add.add_argument("--text-layer", choices=TEXT_LAYER_MODES, default="never", help="Use embedded text.")
+    add.add_argument("--preprocess", action="store_true", help="Clean up page images before OCR.")
+    add.add_argument("--skip-blank", action="store_true", help="Skip OCR for blank pages.")
+    add.add_argument("--skip-duplicates", action="store_true", help="Reuse text of near-duplicate pages.")
+
+    work = commands.add_parser("work", help="Claim and convert work items.")
+    work.add_argument("db", help="Job table.")
+    work.add_argument("--worker-id", default=None, help="Name in the job table (default: host:pid).")
+    work.add_argument("--until-empty", action="store_true", help="Exit once no work is pending or leased.")
+    work.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=DEFAULT_LEASE_SECONDS,
+        help=f"Lease on a claimed item, renewed while working (default: {DEFAULT_LEASE_SECONDS:g}).",
+    )
+    work.add_argument(
+        "--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="Attempts per item before it fails."
+    )
+    work.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between claims when idle.")
+    work.add_argument("--workers", type=int, default=1, help="OCR worker processes for this worker (default: 1).")
+    work.add_argument("--ocr-threads", type=int, default=1, help="OCR threads without --workers (default: 1).")
+    work.add_argument("--ocr-backend", choices=OCR_BACKENDS, default="subprocess", help="OCR engine.")
+    work.add_argument("--poppler-path", default=None, help="Path to poppler 'bin' folder (Windows).")
+    work.add_argument("--tesseract-cmd", default=None, help="Path to tesseract.exe (Windows).")
+    work.add_argument("--cache-dir", default=None, help="Directory for the persistent OCR / correction caches.")
+    work.add_argument("--cache-max-mb", type=int, default=512, help="Size limit per cache (default: 512).")
+
+    status = commands.add_parser("status", help="Show progress per document.")
+    status.add_argument("db", help="Job table.")
+
+    assemble_cmd = commands.add_parser("assemble", help="Write a finished document's output files.")
+    assemble_cmd.add_argument("db", help="Job table.")
+    assemble_cmd.add_argument("input", help="The queued PDF.")
+    assemble_cmd.add_argument("--raw-out", default="output_raw.txt", help="Raw text output file.")
+    assemble_cmd.add_argument("--corrected-out", default="output_corrected.txt", help="Corrected text output file.")
+    assemble_cmd.add_argument("--diff-out", default="output_diff.txt", help="Diff output file.")
+
+    for sub in (add, work, status, assemble_cmd):
+        sub.add_argument("--verbose", action="store_true", help="Enable debug logging.")
+    return parser
+
+
+def _work(args: argparse.Namespace, queue: WorkQueue) -> int:
+    from pdf_ocr_converter.openai_corrector import CorrectionCache, correct_text_via_openai
+
+    defaults = ConvertOptions(
+        poppler_path=Path(args.poppler_path) if args.poppler_path else None,
+        tesseract_cmd=Path(args.tesseract_cmd) if args.tesseract_cmd else None,
+        workers=args.workers,
+        ocr_threads=args.ocr_threads,
+        cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        ocr_backend=args.ocr_backend,
+    )
+    correction_cache = None
+    if defaults.cache_dir is not None:
+        correction_cache = CorrectionCache(
+            defaults.cache_dir / "corrections.sqlite3", max_bytes=defaults.cache_max_bytes
+        )
+    api_key = os.getenv("OPENAI_API_KEY", "")
+
+    def _correct(text: str) -> str:
+        return correct_text_via_openai(text, api_key=api_key, cache=correction_cache)
+
+    # One pool for all claimed items, rather than one per item (every few pages).
+    pool = create_ocr_pool(args.workers, tesseract_cmd=defaults.tesseract_cmd) if args.workers > 1 else None
+    try:
+        if pool is not None:
+            try:
+                warm_ocr_pool(pool, args.workers, ocr_backend=args.ocr_backend)
+            except Exception as exc:
+                # Text-layer pages still convert; OCR items will report the error.
+                logger.warning("Could not start the OCR engine in the workers: %s", exc)
+        done = run_worker(
+            queue,
+            defaults,
+            worker=args.worker_id,
+            correct=_correct,
+            poll_interval=args.poll_interval,
+            until_empty=args.until_empty,
+            executor=pool,
+        )
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if correction_cache is not None:
+            correction_cache.close()
+    logger.info("Processed %d work items.", done)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_logging(args.verbose)
+    from dotenv import load_dotenv
+
+    load_dotenv()  # allow OPENAI_API_KEY from a local .env
+
+    lease_seconds = getattr(args, "lease_seconds", DEFAULT_LEASE_SECONDS)
+    max_attempts = getattr(args, "max_attempts", DEFAULT_MAX_ATTEMPTS)
+    with WorkQueue(Path(args.db), lease_seconds=lease_seconds, max_attempts=max_attempts) as queue:
+        if args.command == "add":
+            options = {name: getattr(args, name) for name in DOCUMENT_OPTIONS}
+            for pdf in args.input:
+                queue.add_document(
+                    Path(pdf),
+                    mode=args.mode,
+                    diff_mode=args.diff_mode,
+                    options=options,
+                    first_page=args.first_page,
+                    last_page=args.last_page,
+                    pages_per_item=args.pages_per_item,
+                )
+                logger.info("Queued %s", pdf)
+        elif args.command == "work":
+            try:
+                return _work(args, queue)
+            except KeyboardInterrupt:
+                return 130
+        elif args.command == "status":
+            print(json.dumps(queue.status(), indent=2))
+        else:
+            try:
+                assemble(
+                    queue,
+                    Path(args.input),
+                    raw_out=Path(args.raw_out),
+                    corrected_out=Path(args.corrected_out),
+                    diff_out=Path(args.diff_out),
+                )
+            except (KeyError, ValueError) as exc:
+                raise SystemExit(exc.args[0])
+    return 0
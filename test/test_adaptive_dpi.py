@@ -0,0 +1,76 @@
+from pathlib import Path
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from pdf_ocr_converter import core
+from pdf_ocr_converter.core import ConvertOptions, _ocr_page_range_adaptive, _page_runs, is_confident
+from pdf_ocr_converter.ocr_backends import OcrBackend
+
+# Pages whose low-DPI OCR is not confident enough.
+WEAK_PAGES = {2, 3, 6}
+
+
+class _StubBackend(OcrBackend):
+    """Reads the page number from the image; weak pages get low confidences."""
+
+    name = "stub"
+
+    def image_to_string(self, image) -> str:
+        return f"page {image.getpixel((0, 0))} at {image.width}"
+
+    def recognize(self, image):
+        confidence = 30.0 if image.getpixel((0, 0)) in WEAK_PAGES else 95.0
+        return self.image_to_string(image), [confidence] * 5
+
+    def lines(self, image):
+        return []
+
+    def orientation(self, image):
+        return None
+
+    @classmethod
+    def version(cls) -> str:
+        return "stub"
+
+
+class TestAdaptiveDpi(unittest.TestCase):
+    def test_is_confident(self) -> None:
+        self.assertTrue(is_confident([90, 85, 95], min_confidence=80, min_words=3))
+        self.assertFalse(is_confident([90, 40, 70], min_confidence=80, min_words=3))
+        self.assertFalse(is_confident([99, 99], min_confidence=80, min_words=3))
+        self.assertTrue(is_confident([], min_confidence=80, min_words=0))
+
+    def test_page_runs(self) -> None:
+        self.assertEqual(list(_page_runs([2, 3, 4, 7, 9, 10])), [(2, 4), (7, 7), (9, 10)])
+        self.assertEqual(list(_page_runs([])), [])
+
+
+class TestAdaptiveEscalation(unittest.TestCase):
+    def test_only_weak_pages_are_re_rendered_and_order_is_kept(self) -> None:
+        rendered = []
+        backend = _StubBackend()
+
+        def _render(pdf_path, *, first_page, last_page, dpi, poppler_path, chunk_size=16, memory=None):
+            rendered.append((first_page, last_page, dpi))
+            for page_number in range(first_page, last_page + 1):
+                # Image width stands in for the rendering DPI.
+                yield page_number, Image.new("L", (dpi, 8), page_number)
+
+        options = ConvertOptions(dpi=300, adaptive_dpi=100, render_chunk_size=4, min_confidence=80, min_words=3)
+        with mock.patch.object(core, "iter_page_range_images", _render), mock.patch.object(
+            core, "get_backend", lambda name, lang=None: backend
+        ), mock.patch.object(core, "ocr_image", lambda image, **kwargs: backend.image_to_string(image)):
+            results = list(_ocr_page_range_adaptive(Path("doc.pdf"), 1, 7, options))
+
+        self.assertEqual(rendered, [(1, 4, 100), (2, 3, 300), (5, 7, 100), (6, 6, 300)])
+        dpis = [300 if n in WEAK_PAGES else 100 for n in range(1, 8)]
+        self.assertEqual(
+            [(r.page_number, r.text, r.dpi) for r in results],
+            [(n, f"page {n} at {dpi}", dpi) for n, dpi in enumerate(dpis, start=1)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,245 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import threading
+import time
+import unittest
+
+from pdf_ocr_converter.async_correction import (
+    AsyncCorrector,
+    CompletionError,
+    RetryPolicy,
+    TokenBucket,
+    aiter_in_thread,
+    parse_retry_after,
+)
+
+FAST_RETRY = RetryPolicy(max_retries=5, base_delay=0.01, max_delay=0.05)
+
+
+class _StubState:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failures = {}  # prompt suffix -> list of status codes to return first
+        self.latency = (0.0, 0.0)
+        self.retry_after = "0"
+        self.max_output_chars = None  # longer corrections are cut off (finish_reason "length")
+
+
+def _make_server(state: _StubState) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            text = body["prompt"].rsplit("\n\n", 1)[-1]
+            with state.lock:
+                state.requests += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                queued = state.failures.get(text)
+                status = queued.pop(0) if queued else 200
+            time.sleep(random.uniform(*state.latency))
+            # Count the request as finished before responding: the client may
+            # send its next one as soon as it has the response.
+            with state.lock:
+                state.in_flight -= 1
+            if status != 200:
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", state.retry_after)
+                self.end_headers()
+                return
+            choice = {"text": " " + text.upper() + "\n", "finish_reason": "stop"}
+            if state.max_output_chars is not None and len(text) > state.max_output_chars:
+                choice = {"text": " " + text.upper()[:state.max_output_chars], "finish_reason": "length"}
+            payload = json.dumps({"choices": [choice]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(corrector, items):
+    return [item async for item in corrector.correct_stream(_aiter(items))]
+
+
+class TestAsyncCorrection(unittest.TestCase):
+    def setUp(self) -> None:
+        self.state = _StubState()
+        self.server = _make_server(self.state)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.api_base = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def _corrector(self, **kwargs) -> AsyncCorrector:
+        kwargs.setdefault("retry", FAST_RETRY)
+        return AsyncCorrector("test-key", api_base=self.api_base, **kwargs)
+
+    def test_results_are_in_order_with_bounded_concurrency(self) -> None:
+        self.state.latency = (0.0, 0.05)
+        items = [(n, f"page {n}") for n in range(1, 21)]
+
+        results = asyncio.run(_collect(self._corrector(max_in_flight=3), items))
+
+        self.assertEqual(results, [(n, f"PAGE {n}") for n in range(1, 21)])
+        self.assertLessEqual(self.state.max_in_flight, 3)
+        self.assertGreater(self.state.max_in_flight, 1)
+
+    def test_retries_throttling_and_server_errors(self) -> None:
+        self.state.failures = {"page 2": [429, 429], "page 3": [500, 503]}
+        items = [(n, f"page {n}") for n in range(1, 5)]
+
+        results = asyncio.run(_collect(self._corrector(), items))
+
+        self.assertEqual([text for _, text in results], ["PAGE 1", "PAGE 2", "PAGE 3", "PAGE 4"])
+        self.assertEqual(self.state.requests, 8)
+
+    def test_retry_after_may_be_an_http_date(self) -> None:
+        self.state.failures = {"page 1": [429]}
+        self.state.retry_after = "Wed, 21 Oct 2015 07:28:00 GMT"
+
+        results = asyncio.run(_collect(self._corrector(), [(1, "page 1")]))
+
+        self.assertEqual(results, [(1, "PAGE 1")])
+        self.assertEqual(self.state.requests, 2)
+
+    def test_truncated_corrections_are_redone_in_halves(self) -> None:
+        self.state.max_output_chars = 12
+        items = [(1, "alpha beta\ngamma delta"), (2, "unbrokenwordthatistoolong")]
+
+        results = asyncio.run(_collect(self._corrector(), items))
+
+        self.assertEqual(results, [(1, "ALPHA BETA\nGAMMA DELTA"), (2, "unbrokenwordthatistoolong")])
+        self.assertEqual(self.state.requests, 4)
+
+    def test_client_errors_are_not_retried(self) -> None:
+        self.state.failures = {"bad": [400]}
+
+        with self.assertRaises(CompletionError) as ctx:
+            asyncio.run(_collect(self._corrector(), [(1, "bad")]))
+
+        self.assertEqual(ctx.exception.status, 400)
+        self.assertEqual(self.state.requests, 1)
+
+    def test_gives_up_after_max_retries(self) -> None:
+        self.state.failures = {"busy": [429] * 10}
+        retry = RetryPolicy(max_retries=2, base_delay=0.01, max_delay=0.01)
+
+        with self.assertRaises(CompletionError):
+            asyncio.run(_collect(self._corrector(retry=retry), [(1, "busy")]))
+
+        self.assertEqual(self.state.requests, 3)
+
+    def test_request_rate_limit(self) -> None:
+        corrector = self._corrector(max_in_flight=8, requests_per_minute=600)
+        # 600 requests/minute with no burst allowance => one request per 0.1s.
+        corrector.request_bucket = TokenBucket(600, capacity=1)
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(*(corrector.correct(f"p{n}") for n in range(6)))
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.45)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_seconds_dates_and_garbage(self) -> None:
+        self.assertEqual(parse_retry_after("2.5"), 2.5)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertAlmostEqual(parse_retry_after("Fri, 01 Jan 2100 00:00:00 GMT"), 2_366_000_000, delta=1e8)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class TestAiterInThread(unittest.TestCase):
+    def test_cancel_during_next_closes_the_generator_after_it_returns(self) -> None:
+        events = []
+        started = threading.Event()
+
+        def _pages():
+            try:
+                for n in range(10):
+                    started.set()
+                    time.sleep(0.3)
+                    events.append(n)
+                    yield n
+            finally:
+                events.append("closed")
+
+        async def consume():
+            async for _ in aiter_in_thread(_pages()):
+                pass
+
+        async def run():
+            task = asyncio.ensure_future(consume())
+            await asyncio.to_thread(started.wait)
+            await asyncio.sleep(0.1)  # inside the first, slow next()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assertEqual(events, [0, "closed"])
+
+    def test_correct_stream_closes_its_source_when_closed_early(self) -> None:
+        events = []
+
+        def _pages():
+            try:
+                for n in range(100):
+                    yield n, f"page {n}"
+            finally:
+                events.append("closed")
+
+        async def _echo(text):
+            await asyncio.sleep(0.01)
+            return text
+
+        async def run():
+            corrector = AsyncCorrector("key", max_in_flight=2)
+            stream = corrector.correct_stream(aiter_in_thread(_pages()), correct=_echo)
+            self.assertEqual(await stream.__anext__(), (0, "page 0"))
+            await stream.aclose()
+            self.assertEqual(events, ["closed"])
+
+        asyncio.run(run())
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_waits_for_refill(self) -> None:
+        async def run():
+            bucket = TokenBucket(6000, capacity=10)  # 100 tokens/s
+            start = time.monotonic()
+            await bucket.acquire(10)
+            await bucket.acquire(10)
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.09)
+
+    def test_oversized_request_is_clamped(self) -> None:
+        async def run():
+            bucket = TokenBucket(60000, capacity=5)
+            await bucket.acquire(50)
+
+        asyncio.run(asyncio.wait_for(run(), timeout=1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from pdf_ocr_converter import cli
+from pdf_ocr_converter.batch import expand_inputs, run_batch
+
+
+class TestExpandInputs(unittest.TestCase):
+    def test_expands_directories_globs_and_drops_duplicates(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "sub").mkdir()
+            for name in ("a.pdf", "b.PDF", "notes.txt", "sub/c.pdf"):
+                (root / name).write_bytes(b"")
+
+            paths = expand_inputs([str(root / "a.pdf"), str(root), str(root / "sub" / "*.pdf")])
+
+        self.assertEqual(
+            [p.relative_to(root).as_posix() for p in paths],
+            ["a.pdf", "b.PDF", "sub/c.pdf"],
+        )
+
+    def test_plain_paths_are_kept_even_if_missing(self) -> None:
+        self.assertEqual(expand_inputs(["missing.pdf"]), [Path("missing.pdf")])
+
+
+class TestRunBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.paths = []
+        for name, size in (("large.pdf", 300), ("broken.pdf", 200), ("small.pdf", 100)):
+            path = self.root / name
+            path.write_bytes(b"x" * size)
+            self.paths.append(path)
+        self.paths.append(self.root / "missing.pdf")
+
+    def test_failures_are_isolated_and_documents_run_smallest_first(self) -> None:
+        started = []
+        lock = threading.Lock()
+
+        def _convert(path, executor):
+            with lock:
+                started.append(path.name)
+            if path.name == "broken.pdf":
+                raise RuntimeError("bad xref")
+
+        outcomes = run_batch(self.paths, _convert, concurrent_documents=1)
+
+        self.assertEqual(started, ["small.pdf", "broken.pdf", "large.pdf"])
+        by_name = {outcome.path.name: outcome for outcome in outcomes}
+        self.assertEqual(len(outcomes), 4)
+        self.assertTrue(by_name["small.pdf"].ok)
+        self.assertTrue(by_name["large.pdf"].ok)
+        self.assertEqual(by_name["large.pdf"].size, 300)
+        self.assertEqual(by_name["broken.pdf"].error, "bad xref")
+        self.assertFalse(by_name["missing.pdf"].ok)
+        self.assertIsNone(by_name["missing.pdf"].size)
+
+    def test_cli_exit_status_reflects_failures(self) -> None:
+        def _convert(pdf_path, args, **kwargs):
+            if pdf_path.name == "broken.pdf":
+                raise RuntimeError("bad xref")
+
+        argv = ["--output-dir", str(self.root / "out"), "--mode", "raw"]
+        with mock.patch.object(cli, "_convert_document", side_effect=_convert) as convert:
+            self.assertEqual(cli.main([str(self.root / "small.pdf"), str(self.root / "large.pdf")] + argv), 0)
+            self.assertEqual(convert.call_count, 2)
+            self.assertEqual(cli.main([str(p) for p in self.paths[:3]] + argv), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import multiprocessing
+from pathlib import Path
+import tempfile
+import unittest
+
+from pdf_ocr_converter.cache import DiskCache, make_key
+
+
+def _writer(path: str, worker: int, count: int) -> None:
+    with DiskCache(Path(path)) as cache:
+        for i in range(count):
+            cache.put(make_key(worker, i), f"value-{worker}-{i}")
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "cache.sqlite3"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_make_key_is_stable_and_unambiguous(self) -> None:
+        self.assertEqual(make_key("a", 1, None), make_key("a", 1, None))
+        self.assertNotEqual(make_key("ab", "c"), make_key("a", "bc"))
+        self.assertNotEqual(make_key(1), make_key("1"))
+
+    def test_get_put_roundtrip_and_persistence(self) -> None:
+        with DiskCache(self.path) as cache:
+            self.assertIsNone(cache.get("k"))
+            cache.put("k", "hello")
+            self.assertEqual(cache.get("k"), "hello")
+
+        with DiskCache(self.path) as cache:
+            self.assertEqual(cache.get("k"), "hello")
+
+    def test_evicts_least_recently_used(self) -> None:
+        with DiskCache(self.path, max_bytes=30) as cache:
+            cache.put("a", "x" * 10)
+            cache.put("b", "x" * 10)
+            cache.put("c", "x" * 10)
+            cache.get("a")  # "b" is now the least recently used entry
+            cache.put("d", "x" * 10)
+
+            self.assertIsNone(cache.get("b"))
+            self.assertEqual(cache.get("a"), "x" * 10)
+            self.assertEqual(cache.get("d"), "x" * 10)
+            self.assertLessEqual(cache.total_bytes(), 30)
+
+    def test_concurrent_writers(self) -> None:
+        procs = [
+            multiprocessing.Process(target=_writer, args=(str(self.path), worker, 50))
+            for worker in range(4)
+        ]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+            self.assertEqual(proc.exitcode, 0)
+
+        with DiskCache(self.path) as cache:
+            self.assertEqual(len(cache), 200)
+            self.assertEqual(cache.get(make_key(3, 49)), "value-3-49")
+
+
+if __name__ == "__main__":
+    unittest.main()
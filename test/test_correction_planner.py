@@ -0,0 +1,105 @@
+import unittest
+
+from pdf_ocr_converter.correction_planner import (
+    BATCH_PROMPT_TEMPLATE,
+    PageAssembler,
+    PlannerOptions,
+    correct_request,
+    input_token_budget,
+    parse_batched_response,
+    plan_requests,
+    split_text,
+)
+from pdf_ocr_converter.openai_corrector import PROMPT_TEMPLATE, OpenAICorrectOptions, estimate_tokens
+
+
+def _fake_model(text: str, template: str) -> str:
+    # Upper-cases the text but leaves the section markers intact, like a well-behaved model.
+    if template == BATCH_PROMPT_TEMPLATE:
+        return "\n".join(
+            line if line.startswith("<<<SECTION") else line.upper() for line in text.split("\n")
+        )
+    return text.upper()
+
+
+def _run(pages, **kwargs):
+    assembler = PageAssembler()
+    requests = list(plan_requests(pages, **kwargs))
+    out = []
+    for request in requests:
+        out.extend(assembler.add(request, correct_request(request, _fake_model)))
+    return requests, out
+
+
+class TestSplitText(unittest.TestCase):
+    def test_short_text_is_not_split(self) -> None:
+        self.assertEqual(split_text("hello", 10), [("hello", "")])
+
+    def test_splits_at_paragraphs_and_roundtrips(self) -> None:
+        text = "\n\n".join(f"Paragraph {i} " + "word " * 30 for i in range(10))
+        parts = split_text(text, 60)
+
+        self.assertGreater(len(parts), 1)
+        self.assertTrue(all(estimate_tokens(part) <= 60 for part, _ in parts))
+        self.assertEqual("".join(part + joiner for part, joiner in parts), text)
+        self.assertTrue(all(joiner in ("\n\n", "") for _, joiner in parts))
+
+    def test_falls_back_to_lines_and_hard_cuts(self) -> None:
+        text = "\n".join("x" * 30 for _ in range(10)) + "\n" + "y" * 200
+        parts = split_text(text, 20)
+
+        self.assertTrue(all(estimate_tokens(part) <= 20 for part, _ in parts))
+        self.assertEqual("".join(part + joiner for part, joiner in parts), text)
+
+
+class TestPlanRequests(unittest.TestCase):
+    def test_small_pages_are_packed(self) -> None:
+        pages = [(n, f"title page {n}") for n in range(1, 11)]
+
+        requests, out = _run(pages, planner_options=PlannerOptions(max_pages_per_request=4))
+
+        self.assertEqual([len(r.segments) for r in requests], [4, 4, 2])
+        self.assertEqual(out, [(n, f"TITLE PAGE {n}") for n in range(1, 11)])
+
+    def test_dense_page_is_split_and_reassembled(self) -> None:
+        options = OpenAICorrectOptions(max_tokens=100)
+        dense = "\n\n".join("sentence " * 20 for _ in range(12))
+        pages = [(1, "short"), (2, dense), (3, "tail")]
+
+        requests, out = _run(pages, correct_options=options)
+
+        budget = input_token_budget(options, PlannerOptions())
+        self.assertTrue(all(estimate_tokens(r.text) <= budget + 8 for r in requests))
+        self.assertEqual([key for key, _ in out], [1, 2, 3])
+        # Parts come back stripped, as any model response is.
+        self.assertEqual(out[1][1].split(), dense.upper().split())
+        self.assertEqual(out[1][1].count("\n\n"), dense.count("\n\n"))
+
+    def test_single_segment_uses_plain_prompt(self) -> None:
+        (request,) = plan_requests([(1, "only page")])
+        self.assertFalse(request.batched)
+        self.assertEqual(request.template, PROMPT_TEMPLATE)
+        self.assertEqual(request.text, "only page")
+
+
+class TestBatchedResponses(unittest.TestCase):
+    def test_parse_rejects_missing_or_reordered_markers(self) -> None:
+        ok = "<<<SECTION 1>>>\nA\n<<<SECTION 2>>>\nB\n"
+        self.assertEqual(parse_batched_response(ok, 2), ["A", "B"])
+        self.assertIsNone(parse_batched_response("<<<SECTION 1>>>\nA B", 2))
+        self.assertIsNone(parse_batched_response("<<<SECTION 2>>>\nB\n<<<SECTION 1>>>\nA", 2))
+
+    def test_falls_back_to_individual_requests(self) -> None:
+        calls = []
+
+        def sloppy_model(text: str, template: str) -> str:
+            calls.append(template)
+            return "merged everything" if template == BATCH_PROMPT_TEMPLATE else text.upper()
+
+        (request,) = plan_requests([(1, "a"), (2, "b")])
+        self.assertEqual(correct_request(request, sloppy_model), ["A", "B"])
+        self.assertEqual(calls, [BATCH_PROMPT_TEMPLATE, PROMPT_TEMPLATE, PROMPT_TEMPLATE])
+
+
+if __name__ == "__main__":
+    unittest.main()
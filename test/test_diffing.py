@@ -1,7 +1,11 @@
+import json
+from pathlib import Path
 import unittest
 
 from pdf_ocr_converter.diffing import changed_lines, format_page_header
 
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
 
 class TestDiffing(unittest.TestCase):
     def test_changed_lines_keeps_only_added_removed(self) -> None:
@@ -17,6 +21,41 @@ class TestDiffing(unittest.TestCase):
         self.assertFalse(any(line.startswith("? ") for line in lines))
         self.assertFalse(any(line.startswith("  ") for line in lines))
 
+    def test_ndiff_mode_matches_difflib_ndiff(self) -> None:
+        # Expected lines are frozen from Python 3.11's difflib.ndiff, so a
+        # later change to difflib's line pairing shows up as a diff against
+        # this fixture instead of silently changing what "ndiff" means.
+        fixture = json.loads((DATA_DIR / "ndiff_changed_lines.json").read_text(encoding="utf-8"))
+        for case in fixture["cases"]:
+            self.assertEqual(changed_lines(case["raw"], case["corrected"]), case["changed"])
+
+    def test_ndiff_mode_handles_long_replaced_blocks(self) -> None:
+        raw = "\n".join(f"line number {i} with sorne noise" for i in range(80))
+        corrected = "\n".join(f"line number {i} with some noise" for i in range(80))
+        lines = changed_lines(raw, corrected)
+        self.assertEqual(lines[:2], ["- line number 0 with sorne noise", "+ line number 0 with some noise"])
+        self.assertEqual(len(lines), 160)
+
+    def test_lines_mode_groups_removed_before_added(self) -> None:
+        raw = "keep\nold one\nold two\nkeep too"
+        corrected = "keep\nnew one\nnew two\nkeep too"
+        self.assertEqual(
+            changed_lines(raw, corrected, mode="lines"),
+            ["- old one", "- old two", "+ new one", "+ new two"],
+        )
+
+    def test_words_mode_reports_changed_word_runs(self) -> None:
+        raw = "the qulck brown fox\njumps over"
+        corrected = "the quick brown fox jumps over the dog"
+        self.assertEqual(
+            changed_lines(raw, corrected, mode="words"),
+            ["- qulck", "+ quick", "+ the dog"],
+        )
+
+    def test_unknown_mode(self) -> None:
+        with self.assertRaises(ValueError):
+            changed_lines("a", "b", mode="chars")
+
     def test_format_page_header(self) -> None:
         self.assertEqual(format_page_header(3), "*********** PAGE 3 ***********")
 
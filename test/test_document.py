@@ -0,0 +1,75 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+from pdf_ocr_converter.core import ConvertOptions, count_pdf_pages, iter_ocr_pages, iter_page_results, page_fingerprint
+from pdf_ocr_converter.document import PageInfo, PdfDocument
+
+
+class TestPdfDocument(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.pdf_path = write_pdf(CorpusSpec(pages=3, words_per_page=20, image_fraction=0.0), self.tmp / "doc.pdf")
+
+    def test_pages_and_metadata(self) -> None:
+        with PdfDocument(self.pdf_path) as document:
+            self.assertEqual(document.page_count, 3)
+            self.assertEqual(document.size, self.pdf_path.stat().st_size)
+            info = document.page_info(2)
+            self.assertEqual(info, PageInfo(2, 612.0, 792.0, 0))
+            self.assertEqual(info.pixels(144), 612 * 792 * 4)
+            self.assertIn(b"Tj", document.page_stream(1))
+            with self.assertRaises(IndexError):
+                document.page(4)
+        self.assertEqual(count_pdf_pages(self.pdf_path), 3)
+
+    def test_closed_and_empty_documents(self) -> None:
+        document = PdfDocument(self.pdf_path)
+        document.close()
+        document.close()
+        with self.assertRaises(ValueError):
+            document.page_count
+
+        empty = self.tmp / "empty.pdf"
+        empty.touch()
+        with self.assertRaises(ValueError):
+            PdfDocument(empty)
+
+    def test_conversion_shares_an_open_document(self) -> None:
+        options = ConvertOptions(text_layer="only")
+        expected = [result.text for result in iter_page_results(self.pdf_path, options)]
+        with PdfDocument(self.pdf_path) as document:
+            self.assertEqual(document.page_count, 3)
+            self.assertEqual([text for _, text in iter_ocr_pages(document, options)], expected)
+            # The caller's document stays open for the next stage.
+            self.assertEqual(document.page_info(1).page_number, 1)
+            last = list(iter_page_results(document, ConvertOptions(text_layer="only", first_page=3)))
+            self.assertEqual([result.text for result in last], expected[2:])
+
+
+    def test_page_fingerprint_covers_every_rendering_input(self) -> None:
+        from PyPDF2.generic import NameObject, RectangleObject
+
+        spec = CorpusSpec(pages=2, words_per_page=20)
+        copies = [PdfDocument(write_pdf(spec, self.tmp / f"{name}.pdf")) for name in ("a", "b")]
+        for document in copies:
+            self.addCleanup(document.close)
+        a, b = (document.page(1) for document in copies)
+        self.assertEqual(page_fingerprint(a), page_fingerprint(b))
+        self.assertNotEqual(page_fingerprint(a), page_fingerprint(copies[0].page(2)))
+
+        font = b["/Resources"]["/Font"]["/F1"].get_object()
+        font[NameObject("/Encoding")] = NameObject("/MacRomanEncoding")
+        self.assertNotEqual(page_fingerprint(a), page_fingerprint(b))
+
+        page = copies[0].page(2)
+        before = page_fingerprint(page)
+        page[NameObject("/CropBox")] = RectangleObject([0, 0, 100, 100])
+        self.assertNotEqual(page_fingerprint(page), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("PyPDF2", "pdf2image", "pytesseract", "PIL", "numpy", "openai", "tesserocr", "asyncio")
+
+
+def _loaded_after(code: str) -> list:
+    """Run `code` in a fresh interpreter and return the heavy modules it imported."""
+
+    script = code + f"\nimport sys\nprint(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    proc = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=REPO_ROOT,
+        env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return proc.stdout.splitlines()[-1].split()
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_cli_import_and_help_load_no_heavy_library(self) -> None:
+        self.assertEqual(_loaded_after("import pdf_ocr_converter.cli"), [])
+        code = textwrap.dedent(
+            """
+            from pdf_ocr_converter import cli
+            try:
+                cli.main(["--help"])
+            except SystemExit:
+                pass
+            """
+        )
+        self.assertEqual(_loaded_after(code), [])
+
+    def test_text_layer_only_never_loads_ocr_or_renderer(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = write_pdf(CorpusSpec(pages=2, words_per_page=40, image_fraction=0.0), Path(tmp) / "text.pdf")
+            code = textwrap.dedent(
+                f"""
+                from pathlib import Path
+                from pdf_ocr_converter.core import ConvertOptions, iter_page_results
+                results = list(iter_page_results(Path({str(pdf_path)!r}), ConvertOptions(text_layer="only")))
+                assert [r.source for r in results] == ["text-layer"] * 2, results
+                """
+            )
+            self.assertEqual(_loaded_after(code), ["PyPDF2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
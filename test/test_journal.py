@@ -0,0 +1,88 @@
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+from pdf_ocr_converter.journal import Journal, JournalMismatchError, PageRecord
+
+RUN = {"input": "/docs/a.pdf", "size": 123, "mode": "all", "last_page": None}
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "journal.jsonl"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write_pages(self, *page_numbers: int) -> None:
+        journal = Journal(self.path, RUN)
+        for n in page_numbers:
+            journal.record(PageRecord(n, raw=f"raw {n}", corrected=f"fixed {n}", diff=[f"- raw {n}"]))
+        journal.close()
+
+    def test_resume_returns_completed_pages(self) -> None:
+        self._write_pages(1, 2, 3)
+
+        journal = Journal(self.path, RUN, resume=True)
+        self.addCleanup(journal.close)
+
+        self.assertEqual([r.page_number for r in journal.records], [1, 2, 3])
+        self.assertEqual(journal.records[1], PageRecord(2, raw="raw 2", corrected="fixed 2", diff=["- raw 2"]))
+        self.assertEqual(journal.next_page, 4)
+
+    def test_torn_trailing_line_is_discarded_and_overwritten(self) -> None:
+        self._write_pages(1, 2)
+        with self.path.open("ab") as f:
+            f.write(b'{"page_number": 3, "raw": "trunc')
+
+        journal = Journal(self.path, RUN, resume=True)
+        self.assertEqual(journal.next_page, 3)
+        journal.record(PageRecord(3, raw="raw 3"))
+        journal.close()
+
+        journal = Journal(self.path, RUN, resume=True)
+        self.addCleanup(journal.close)
+        self.assertEqual([r.page_number for r in journal.records], [1, 2, 3])
+
+    def test_without_resume_starts_over(self) -> None:
+        self._write_pages(1, 2)
+
+        journal = Journal(self.path, RUN)
+        self.addCleanup(journal.close)
+
+        self.assertEqual(journal.records, [])
+        self.assertIsNone(journal.next_page)
+
+    def test_resume_rejects_different_run(self) -> None:
+        self._write_pages(1)
+
+        with self.assertRaises(JournalMismatchError):
+            Journal(self.path, {**RUN, "mode": "raw"}, resume=True)
+
+    def test_pages_are_synced_per_interval_not_per_page(self) -> None:
+        with mock.patch("os.fsync") as fsync:
+            journal = Journal(self.path, RUN, sync_interval=3600)
+            for n in range(1, 51):
+                journal.record(PageRecord(n, raw=f"page {n}"))
+            self.assertEqual(fsync.call_count, 0)
+            journal.close()
+            self.assertEqual(fsync.call_count, 1)
+
+            journal = Journal(self.path, RUN, resume=True, sync_interval=0)
+            journal.record(PageRecord(51, raw="page 51"))
+            self.assertEqual(fsync.call_count, 2)
+            journal.close()
+        journal = Journal(self.path, RUN, resume=True)
+        self.addCleanup(journal.close)
+        self.assertEqual(len(journal.records), 51)
+
+    def test_discard_removes_file(self) -> None:
+        journal = Journal(self.path, RUN)
+        journal.discard()
+        self.assertFalse(self.path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+from pdf_ocr_converter import cli
+from pdf_ocr_converter.core import ConvertOptions, iter_page_results
+from pdf_ocr_converter.journal import PageRecord
+from pdf_ocr_converter.jsonl_output import JsonlWriter, index_path, page_entry, read_index, read_page
+
+
+class TestJsonlOutput(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def test_pages_are_read_back_by_offset(self) -> None:
+        path = self.tmp / "out.jsonl"
+        with JsonlWriter(path) as writer:
+            for n in range(3, 8):
+                writer.write(page_entry(PageRecord(n, raw=f"page {n} ünïcode\n" * n), source="ocr", dpi=300))
+
+        self.assertEqual([entry[0] for entry in read_index(path)], [3, 4, 5, 6, 7])
+        page = read_page(path, 6)
+        self.assertEqual(
+            (page["page"], page["raw"], page["source"], page["corrected"]), (6, "page 6 ünïcode\n" * 6, "ocr", None)
+        )
+        self.assertEqual(len(path.read_text(encoding="utf-8").splitlines()), 5)
+        for missing in (2, 8):
+            with self.assertRaises(KeyError):
+                read_page(path, missing)
+
+        # A torn trailing index entry is ignored.
+        with index_path(path).open("ab") as f:
+            f.write(b"\x09\x00")
+        self.assertEqual(len(read_index(path)), 5)
+
+    def test_cli_writes_jsonl_instead_of_text_files(self) -> None:
+        pdf_path = write_pdf(CorpusSpec(pages=4, words_per_page=30, image_fraction=0.0), self.tmp / "doc.pdf")
+        out = self.tmp / "doc.jsonl"
+        cli.main(
+            [
+                str(pdf_path),
+                "--text-layer",
+                "only",
+                "--format",
+                "jsonl",
+                "--jsonl-out",
+                str(out),
+                "--raw-out",
+                str(self.tmp / "raw.txt"),
+                "--first-page",
+                "2",
+                "--no-progress",
+                "--journal",
+                str(self.tmp / "journal.jsonl"),
+            ]
+        )
+
+        self.assertFalse((self.tmp / "raw.txt").exists())
+        expected = list(iter_page_results(pdf_path, ConvertOptions(text_layer="only", first_page=2)))
+        for result in expected:
+            page = read_page(out, result.page_number)
+            self.assertEqual((page["raw"], page["source"], page["diff"]), (result.text, "text-layer", None))
+            self.assertIsInstance(page["timings"], dict)
+
+
+if __name__ == "__main__":
+    unittest.main()
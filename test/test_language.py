@@ -0,0 +1,66 @@
+import unittest
+
+from PIL import Image
+
+from pdf_ocr_converter.language import LanguageChooser, auto_candidates, upright
+from pdf_ocr_converter.ocr_backends import Osd, parse_osd
+
+
+def _osd(script: str, *, rotate: int = 0, orientation_confidence: float = 10.0, script_confidence: float = 5.0) -> Osd:
+    return Osd(rotate, orientation_confidence, script, script_confidence)
+
+
+class TestLanguage(unittest.TestCase):
+    def test_parse_osd(self) -> None:
+        text = (
+            "Page number: 0\nOrientation in degrees: 270\nRotate: 90\n"
+            "Orientation confidence: 12.5\nScript: Cyrillic\nScript confidence: 3.1\n"
+        )
+        self.assertEqual(parse_osd(text), Osd(90, 12.5, "Cyrillic", 3.1))
+        with self.assertRaises(ValueError):
+            parse_osd("Too few characters. Skipping this page")
+
+    def test_auto_candidates(self) -> None:
+        self.assertIsNone(auto_candidates(None))
+        self.assertIsNone(auto_candidates("eng+deu"))
+        self.assertEqual(auto_candidates("auto"), ())
+        self.assertEqual(auto_candidates("auto:eng+deu+rus"), ("eng", "deu", "rus"))
+        with self.assertRaises(ValueError):
+            auto_candidates("auto:")
+
+    def test_pages_get_the_candidates_of_their_script(self) -> None:
+        chooser = LanguageChooser(("eng", "rus", "deu", "ell"))
+        self.assertEqual(chooser.choose(_osd("Latin")).lang, "eng+deu")
+        self.assertEqual(chooser.choose(_osd("Cyrillic", rotate=90)), ("rus", 90))
+        self.assertEqual(chooser.choose(_osd("Greek", rotate=180, orientation_confidence=0.5)), ("ell", 0))
+        # No candidate in the script: the document's most frequent choice.
+        self.assertEqual(chooser.choose(_osd("Han")).lang, "eng+deu")
+
+        self.assertEqual(LanguageChooser().choose(_osd("Cyrillic")).lang, "rus")
+        self.assertEqual(LanguageChooser().choose(_osd("Unknown")).lang, "eng")
+
+    def test_undetected_pages_reuse_the_document_choice(self) -> None:
+        chooser = LanguageChooser(("eng", "rus"))
+        self.assertEqual(chooser.choose(None).lang, "eng+rus")
+        chooser.choose(_osd("Cyrillic"))
+        self.assertEqual(chooser.choose(_osd("Latin", script_confidence=0.2)).lang, "rus")
+        self.assertEqual(chooser.snapshot(), {"rus": 1})
+
+        # A pool chunk starts from the parent's snapshot and reports back.
+        chunk = LanguageChooser(("eng", "rus"), known=chooser.snapshot())
+        self.assertEqual(chunk.choose(None).lang, "rus")
+        chooser.merge({"eng": 3})
+        self.assertEqual(chooser.choose(None).lang, "eng")
+
+    def test_upright_turns_clockwise(self) -> None:
+        image = Image.new("L", (4, 2))
+        image.putpixel((0, 0), 255)
+        turned = upright(image, 90)
+        self.assertEqual(turned.size, (2, 4))
+        self.assertEqual(turned.getpixel((1, 0)), 255)
+        self.assertIs(upright(image, 0), image)
+        self.assertEqual(upright(image, 180).getpixel((3, 1)), 255)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+import pstats
+import tempfile
+import threading
+import time
+import unittest
+
+from pdf_ocr_converter import metrics
+
+
+class TestPercentile(unittest.TestCase):
+    def test_nearest_rank(self) -> None:
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(metrics.percentile(values, 50), 50.0)
+        self.assertEqual(metrics.percentile(values, 95), 95.0)
+        self.assertEqual(metrics.percentile(values, 100), 100.0)
+        self.assertEqual(metrics.percentile([3.0], 95), 3.0)
+
+    def test_empty(self) -> None:
+        with self.assertRaises(ValueError):
+            metrics.percentile([], 50)
+
+
+class TestRecorder(unittest.TestCase):
+    def test_timed_is_a_no_op_without_recorder(self) -> None:
+        with metrics.timed("ocr", 1, nbytes=10):
+            pass
+        self.assertFalse(metrics.current().enabled)
+        self.assertEqual(metrics.current().records, [])
+        self.assertEqual(metrics.text_nbytes("abc"), 0)
+
+    def test_records_from_all_threads(self) -> None:
+        recorder = metrics.MetricsRecorder()
+
+        def _page(page: int) -> None:
+            with metrics.timed("ocr", page) as span:
+                time.sleep(0.01)
+                span.nbytes = page
+
+        with metrics.use(recorder):
+            threads = [threading.Thread(target=_page, args=(page,)) for page in range(1, 5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(metrics.text_nbytes("é"), 2)
+
+        self.assertIsNot(metrics.current(), recorder)
+        self.assertEqual(sorted(r.page for r in recorder.records), [1, 2, 3, 4])
+        summary = recorder.summary()["ocr"]
+        self.assertEqual(summary["count"], 4)
+        self.assertEqual(summary["bytes"], 10)
+        self.assertGreaterEqual(summary["wall_s_p50"], 0.01)
+        self.assertLessEqual(summary["wall_s_p50"], summary["wall_s_p95"])
+        self.assertLessEqual(summary["wall_s_p95"], summary["wall_s_max"])
+        # Sleeping costs (almost) no CPU.
+        self.assertLess(summary["cpu_s_max"], summary["wall_s_max"])
+
+    def test_records_stage_that_raised(self) -> None:
+        recorder = metrics.MetricsRecorder()
+        with metrics.use(recorder), self.assertRaises(RuntimeError):
+            with metrics.timed("correct", 7):
+                raise RuntimeError("boom")
+        self.assertEqual([(r.stage, r.page) for r in recorder.records], [("correct", 7)])
+
+    def test_extend_with_worker_records(self) -> None:
+        worker = metrics.MetricsRecorder()
+        with metrics.use(worker):
+            with metrics.timed("render", 1, pages=4):
+                pass
+        worker.add(worker.elapsed_record("pool_task", 1, pages=4))
+
+        recorder = metrics.MetricsRecorder()
+        recorder.extend(worker.records)
+        self.assertEqual([r.stage for r in recorder.records], ["render", "pool_task"])
+        self.assertEqual(recorder.summary()["render"]["pages"], 4)
+
+    def test_page_times(self) -> None:
+        recorder = metrics.MetricsRecorder()
+        recorder.extend(
+            [
+                metrics.StageRecord("render", 1, 2.0, 0.0, pages=4),
+                metrics.StageRecord("ocr", 1, 0.5, 0.4),
+                metrics.StageRecord("ocr", 1, 1.5, 1.2),
+                metrics.StageRecord("ocr", 2, 0.7, 0.6),
+            ]
+        )
+        recorder.add(metrics.StageRecord("correct", 1, 0.25, 0.0))
+        self.assertEqual(recorder.page_times(1), {"ocr": 2.0, "correct": 0.25})
+        self.assertEqual(recorder.page_times(3), {})
+        self.assertEqual(metrics.current().page_times(1), {})
+
+    def test_write_report(self) -> None:
+        recorder = metrics.MetricsRecorder()
+        with metrics.use(recorder):
+            for page in (2, 1):
+                with metrics.timed("write", page, nbytes=5):
+                    pass
+            with metrics.timed("count_pages"):
+                pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "report.json"
+            recorder.write_report(path, mode="raw")
+            report = json.loads(path.read_text(encoding="utf-8"))
+
+        self.assertEqual(report["run"]["mode"], "raw")
+        self.assertGreater(report["run"]["wall_s"], 0)
+        self.assertEqual(set(report["stages"]), {"write", "count_pages"})
+        self.assertEqual([r["page"] for r in report["records"]], [1, 2, None])
+        self.assertEqual(report["stages"]["write"]["bytes"], 10)
+
+
+def _busy_in_thread() -> int:
+    return sum(range(10000))
+
+
+class TestProfile(unittest.TestCase):
+    def test_threads_started_in_the_block_are_profiled(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "run.prof"
+            with metrics.profile(path):
+                thread = threading.Thread(target=_busy_in_thread)
+                thread.start()
+                thread.join()
+
+            functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+
+        self.assertIn("_busy_in_thread", functions)
+        self.assertIn("join", functions)  # main thread
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import threading
+import types
+import unittest
+from unittest import mock
+
+import pytesseract
+
+from pdf_ocr_converter import ocr_backends
+from pdf_ocr_converter.ocr_backends import (
+    OcrBackend,
+    OcrLine,
+    SubprocessBackend,
+    TesserocrBackend,
+    backend_class,
+    get_backend,
+    tsv_lines,
+    tsv_word_confidences,
+)
+
+
+class TestOcrBackends(unittest.TestCase):
+    def test_engines_are_reused_per_thread(self) -> None:
+        engine = get_backend("subprocess", lang="eng")
+        self.assertIsInstance(engine, SubprocessBackend)
+        self.assertIs(get_backend("subprocess", lang="eng"), engine)
+        self.assertIsNot(get_backend("subprocess", lang="deu"), engine)
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(get_backend("subprocess", lang="eng")))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], engine)
+
+    def test_unknown_backend(self) -> None:
+        with self.assertRaises(ValueError):
+            backend_class("nope")
+        with self.assertRaises(ValueError):
+            get_backend("nope")
+
+    def test_backends_must_implement_the_interface(self) -> None:
+        class TextOnly(OcrBackend):
+            def image_to_string(self, image) -> str:
+                return ""
+
+        with self.assertRaisesRegex(TypeError, "abstract"):
+            TextOnly()
+
+    def test_missing_tesserocr_is_reported(self) -> None:
+        try:
+            import tesserocr  # noqa: F401
+        except ImportError:
+            with self.assertRaisesRegex(RuntimeError, "tesserocr"):
+                get_backend("tesserocr")
+        else:
+            self.skipTest("tesserocr is installed")
+
+    def test_tesserocr_osd_does_not_load_a_recognition_engine(self) -> None:
+        api = mock.MagicMock()
+        api.return_value.DetectOrientationScript.return_value = {
+            "orient_deg": 90,
+            "orient_conf": 5.0,
+            "script_name": "Latin",
+            "script_conf": 2.0,
+        }
+        tesserocr = types.SimpleNamespace(PyTessBaseAPI=api, PSM=types.SimpleNamespace(OSD_ONLY=0))
+        with mock.patch.dict("sys.modules", tesserocr=tesserocr):
+            backend = TesserocrBackend()
+            self.assertEqual(backend.orientation(object()).rotate, 270)
+            self.assertEqual([c.kwargs["lang"] for c in api.call_args_list], ["osd"])
+
+            backend.image_to_string(object())
+            backend.recognize(object())
+            self.assertEqual([c.kwargs["lang"] for c in api.call_args_list], ["osd", "eng"])
+            backend.close()
+
+    def test_tsv_word_confidences_skips_layout_rows_and_blanks(self) -> None:
+        tsv = (
+            "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+            "1\t1\t0\t0\t0\t0\t0\t0\t100\t100\t-1\t\n"
+            "5\t1\t1\t1\t1\t1\t0\t0\t10\t10\t96.5\tHello\n"
+            "5\t1\t1\t1\t1\t2\t12\t0\t10\t10\t95\t \n"
+            "5\t1\t1\t1\t1\t3\t24\t0\t10\t10\t41\twor1d\n"
+        )
+        self.assertEqual(tsv_word_confidences(tsv), [96.5, 41.0])
+        self.assertEqual(tsv_word_confidences(""), [])
+
+    def test_recognize_falls_back_to_the_public_api(self) -> None:
+        tsv = (
+            "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+            "5\t1\t1\t1\t1\t1\t0\t0\t10\t10\t88\tHello\n"
+        )
+        with mock.patch.object(pytesseract, "pytesseract", types.SimpleNamespace()), mock.patch.object(
+            pytesseract, "image_to_string", return_value="Hello\n"
+        ) as to_string, mock.patch.object(pytesseract, "image_to_data", return_value=tsv):
+            result = SubprocessBackend(lang="eng").recognize(object())
+
+        self.assertEqual(result, ("Hello\n", [88.0]))
+        self.assertEqual(to_string.call_args.kwargs, {"lang": "eng"})
+
+    def test_osd_failures_other_than_too_little_text_are_logged_once(self) -> None:
+        too_few = pytesseract.TesseractError(1, "Too few characters. Skipping this page Error during processing.")
+        no_data = pytesseract.TesseractError(1, "Failed loading language 'osd' Tesseract couldn't load any languages!")
+        backend = SubprocessBackend()
+        with mock.patch.object(ocr_backends, "_osd_failure_logged", False), mock.patch.object(
+            ocr_backends.logger, "warning"
+        ) as warning:
+            with mock.patch.object(pytesseract, "image_to_osd", side_effect=too_few):
+                self.assertIsNone(backend.orientation(object()))
+            warning.assert_not_called()
+            with mock.patch.object(pytesseract, "image_to_osd", side_effect=no_data):
+                self.assertIsNone(backend.orientation(object()))
+                self.assertIsNone(backend.orientation(object()))
+
+        warning.assert_called_once()
+        self.assertIn("Failed loading language 'osd'", warning.call_args.args[1])
+
+    def test_tsv_lines_groups_words_with_and_without_header(self) -> None:
+        rows = (
+            "1\t1\t0\t0\t0\t0\t0\t0\t100\t100\t-1\t\n"
+            "5\t1\t1\t1\t1\t1\t10\t20\t30\t12\t96\tHello\n"
+            "5\t1\t1\t1\t1\t2\t45\t18\t40\t14\t-1\tworld\n"
+            "5\t1\t2\t1\t1\t1\t10\t60\t20\t10\t80\tBye\n"
+        )
+        header = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+        expected = [
+            OcrLine("Hello world", 10, 18, 85, 32, block=1, paragraph=1),
+            OcrLine("Bye", 10, 60, 30, 70, block=2, paragraph=1),
+        ]
+        self.assertEqual(tsv_lines(header + rows), expected)
+        self.assertEqual(tsv_lines(rows), expected)
+        self.assertEqual(tsv_lines(header + rows)[0].confidences, (96.0,))
+        self.assertEqual(tsv_lines(""), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from pdf_ocr_converter.openai_corrector import (
+    CorrectionCache,
+    OpenAICorrectOptions,
+    correct_text_via_openai,
+)
+
+
+class TestCorrectionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = CorrectionCache(Path(self._tmp.name) / "corrections.sqlite3")
+
+    def tearDown(self) -> None:
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def test_key_covers_text_and_every_option(self) -> None:
+        base = OpenAICorrectOptions()
+        key = CorrectionCache.key("text", base)
+
+        self.assertEqual(key, CorrectionCache.key("text", OpenAICorrectOptions()))
+        self.assertNotEqual(key, CorrectionCache.key("text!", base))
+        self.assertNotEqual(key, CorrectionCache.key("text", OpenAICorrectOptions(engine="other")))
+        self.assertNotEqual(key, CorrectionCache.key("text", OpenAICorrectOptions(max_tokens=10)))
+        self.assertNotEqual(key, CorrectionCache.key("text", OpenAICorrectOptions(temperature=0.0)))
+
+    def test_hit_skips_request_and_counts_stats(self) -> None:
+        options = OpenAICorrectOptions()
+        self.assertIsNone(self.cache.get("helo wrld", options))
+        self.cache.put("helo wrld", options, "Hello world.")
+
+        # No API key: only a cache hit can succeed without raising.
+        self.assertEqual(correct_text_via_openai("helo wrld", api_key="", cache=self.cache), "Hello world.")
+
+        self.assertEqual(self.cache.stats.hits, 1)
+        self.assertEqual(self.cache.stats.misses, 1)
+        self.assertGreater(self.cache.stats.tokens_saved, 0)
+
+    def test_miss_without_api_key_still_raises(self) -> None:
+        with self.assertRaises(ValueError):
+            correct_text_via_openai("uncached", api_key="", cache=self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import io
+from pathlib import Path
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image, ImageDraw
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+from pdf_ocr_converter import core, page_filter
+from pdf_ocr_converter.core import ConvertOptions, _skip_page, iter_page_results
+from pdf_ocr_converter.page_filter import (
+    DuplicateIndex,
+    PageRef,
+    fingerprint,
+    ink_coverage,
+    is_blank,
+)
+
+_WORDS = "the quick brown fox jumps over lazy dog while seven wizards quietly judge boxing".split()
+
+
+def _page(seed, *, lines=40, paper=235, speckles=0):
+    rng = random.Random(seed)
+    image = Image.new("L", (850, 1100), paper)
+    draw = ImageDraw.Draw(image)
+    for i in range(lines):
+        draw.text((80, 80 + 22 * i), " ".join(rng.choice(_WORDS) for _ in range(12)), fill=20)
+    for _ in range(speckles):
+        x, y = rng.randrange(850), rng.randrange(1100)
+        image.putpixel((x, y), 0)
+    # A dark scanner border along the top edge.
+    draw.rectangle((0, 0, 849, 12), fill=30)
+    return image.convert("RGB")
+
+
+def _recompressed(image, seed):
+    rng = random.Random(seed)
+    grain = Image.frombytes("L", image.size, rng.randbytes(image.width * image.height))
+    noisy = Image.blend(image.convert("L"), grain, 0.08)
+    buffer = io.BytesIO()
+    noisy.save(buffer, format="JPEG", quality=60)
+    return Image.open(buffer)
+
+
+class TestBlank(unittest.TestCase):
+    def test_blank_page_with_speckles_and_border(self) -> None:
+        blank = _page(0, lines=0, speckles=300)
+        self.assertTrue(is_blank(blank))
+        self.assertEqual(ink_coverage(blank), 0.0)
+
+    def test_text_page_is_not_blank(self) -> None:
+        self.assertFalse(is_blank(_page(0)))
+        self.assertFalse(is_blank(_page(0, lines=1)))
+
+    def test_tinted_paper_is_not_ink(self) -> None:
+        self.assertTrue(is_blank(_page(0, lines=0, paper=170)))
+
+
+class TestDuplicates(unittest.TestCase):
+    def test_recompressed_copy_matches_and_other_pages_do_not(self) -> None:
+        pages = [fingerprint(_page(seed)) for seed in range(4)]
+        index = DuplicateIndex()
+        for number, fp in enumerate(pages, start=1):
+            self.assertIsNone(index.find(fp, "a.pdf"))
+            index.add(PageRef("a.pdf", number), fp)
+
+        copy = fingerprint(_recompressed(_page(2), seed=1))
+        self.assertEqual(index.find(copy, "a.pdf"), PageRef("a.pdf", 3))
+
+    def test_other_documents_match_only_once_their_text_is_known(self) -> None:
+        fp = fingerprint(_page(0))
+        index = DuplicateIndex()
+        index.add(PageRef("a.pdf", 1), fp)
+        self.assertIsNone(index.find(fp, "b.pdf"))
+        self.assertEqual(index.snapshot(), [])
+
+        index.set_text(PageRef("a.pdf", 1), "text", 300)
+        self.assertEqual(index.find(fp, "b.pdf"), PageRef("a.pdf", 1))
+        self.assertEqual(index.text(PageRef("a.pdf", 1)), ("text", 300))
+
+        seeded = DuplicateIndex(known=index.snapshot())
+        self.assertEqual(seeded.find(fp, "c.pdf"), PageRef("a.pdf", 1))
+
+
+    def test_pages_of_other_layouts_are_not_compared(self) -> None:
+        index = DuplicateIndex()
+        for number, lines in enumerate((40, 40, 10, 25), start=1):
+            index.add(PageRef("a.pdf", number), fingerprint(_page(number, lines=lines)))
+
+        copy = fingerprint(_recompressed(_page(3, lines=10), seed=1))
+        with mock.patch.object(page_filter, "find_duplicate", wraps=page_filter.find_duplicate) as find:
+            self.assertEqual(index.find(copy, "a.pdf"), PageRef("a.pdf", 3))
+        compared = [ref.page_number for ref, _ in find.call_args.args[1]]
+        self.assertIn(3, compared)
+        self.assertNotIn(1, compared)
+        self.assertNotIn(2, compared)
+
+    def test_hash_tree_finds_exactly_the_hashes_within_the_radius(self) -> None:
+        rng = random.Random(3)
+        base = rng.getrandbits(256)
+        hashes = {}
+        for n in range(300):
+            flips = {rng.randrange(256) for _ in range(rng.randint(0, 40))}
+            hashes[PageRef("a.pdf", n)] = base ^ sum(1 << bit for bit in flips)
+        tree = page_filter._HashTree()
+        for ref, dhash in hashes.items():
+            tree.add(dhash, ref)
+        for ref in list(hashes)[::3]:
+            tree.discard(hashes.pop(ref), ref)
+
+        for query in list(hashes.values())[:20] + [base, rng.getrandbits(256)]:
+            expected = {ref for ref, dhash in hashes.items() if bin(dhash ^ query).count("1") <= 12}
+            self.assertEqual(set(tree.search(query, 12)), expected)
+
+    def test_oldest_pages_age_out(self) -> None:
+        index = DuplicateIndex(max_entries=2)
+        for number in (1, 2, 3):
+            index.add(PageRef("a.pdf", number), fingerprint(_page(number)))
+            index.set_text(PageRef("a.pdf", number), f"text {number}", 300)
+
+        self.assertEqual([ref.page_number for ref, _ in index.entries()], [2, 3])
+        self.assertIsNone(index.find(fingerprint(_page(1)), "a.pdf"))
+        self.assertIsNone(index.text(PageRef("a.pdf", 1)))
+        self.assertEqual(index.find(fingerprint(_page(3)), "b.pdf"), PageRef("a.pdf", 3))
+        with self.assertRaises(ValueError):
+            DuplicateIndex(max_entries=0)
+
+
+class TestSkipPage(unittest.TestCase):
+    def test_blank_duplicate_and_new_pages(self) -> None:
+        options = ConvertOptions(skip_blank=True, skip_duplicates=True)
+        index = DuplicateIndex()
+
+        blank = _skip_page("a.pdf", 1, _page(0, lines=0), options, index, 300)
+        self.assertEqual((blank.source, blank.text, blank.dpi), ("blank", "", 300))
+
+        self.assertIsNone(_skip_page("a.pdf", 2, _page(5), options, index, 300))
+        duplicate = _skip_page("a.pdf", 3, _recompressed(_page(5), seed=2), options, index, 300)
+        self.assertEqual((duplicate.source, duplicate.duplicate_of), ("duplicate", PageRef("a.pdf", 2)))
+
+    def test_disabled(self) -> None:
+        self.assertIsNone(_skip_page("a.pdf", 1, _page(0, lines=0), ConvertOptions(), None, 300))
+
+    def test_duplicate_of_a_page_without_text_is_ocrd(self) -> None:
+        # Seeded entries have no text in this index (as if it aged out).
+        index = DuplicateIndex(known=[(PageRef("other.pdf", 7), fingerprint(_page(1)))])
+
+        def _render(pdf_path, *, first_page, last_page, dpi, poppler_path, chunk_size=16, memory=None):
+            for page_number in range(first_page, last_page + 1):
+                yield page_number, _page(page_number)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = write_pdf(CorpusSpec(pages=2, words_per_page=10), Path(tmp) / "doc.pdf")
+            with mock.patch.object(core, "iter_page_range_images", _render), mock.patch.object(
+                core, "ocr_image", lambda image, **kwargs: "ocr text"
+            ):
+                results = list(iter_page_results(pdf_path, ConvertOptions(skip_duplicates=True), duplicates=index))
+
+        self.assertEqual(
+            [(r.page_number, r.text, r.source) for r in results], [(1, "ocr text", "ocr"), (2, "ocr text", "ocr")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import random
+import threading
+import time
+import unittest
+
+from pdf_ocr_converter.pipeline import MemoryBudget, Stage, run_stages
+
+
+class TestRunStages(unittest.TestCase):
+    def test_results_keep_source_order_with_parallel_workers(self) -> None:
+        def _slow_double(x):
+            time.sleep(random.uniform(0, 0.005))
+            return x * 2
+
+        stages = [Stage("double", _slow_double, workers=4, queue_depth=2), Stage("inc", lambda x: x + 1)]
+        self.assertEqual(list(run_stages(range(50), stages)), [x * 2 + 1 for x in range(50)])
+
+    def test_source_is_throttled_by_slow_consumer(self) -> None:
+        produced = []
+
+        def _source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        results = run_stages(_source(), [Stage("id", lambda x: x, workers=1, queue_depth=2)])
+        self.assertEqual(next(results), 0)
+        time.sleep(0.2)
+        # At most queue_depth + workers items may be in flight.
+        self.assertLessEqual(len(produced), 1 + 2 + 1 + 1)
+        results.close()
+
+    def test_stage_error_is_raised_to_consumer(self) -> None:
+        def _fail_on_three(x):
+            if x == 3:
+                raise RuntimeError("boom")
+            return x
+
+        with self.assertRaisesRegex(RuntimeError, "boom"):
+            list(run_stages(range(10), [Stage("check", _fail_on_three, workers=2)]))
+
+    def test_source_error_is_raised_to_consumer(self) -> None:
+        def _source():
+            yield 1
+            raise ValueError("bad input")
+
+        with self.assertRaisesRegex(ValueError, "bad input"):
+            list(run_stages(_source(), [Stage("id", lambda x: x)]))
+
+    def test_early_close_closes_source(self) -> None:
+        closed = threading.Event()
+
+        def _source():
+            try:
+                for i in range(1000):
+                    yield i
+            finally:
+                closed.set()
+
+        results = run_stages(_source(), [Stage("id", lambda x: x)])
+        self.assertEqual(next(results), 0)
+        results.close()
+        self.assertTrue(closed.is_set())
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def test_acquire_blocks_until_released(self) -> None:
+        budget = MemoryBudget(100)
+        budget.acquire(60)
+        acquired = threading.Event()
+
+        def _acquire():
+            budget.acquire(60)
+            acquired.set()
+
+        thread = threading.Thread(target=_acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        budget.release(60)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+        self.assertEqual(budget.peak, 60)
+
+    def test_oversized_buffer_passes_when_budget_is_empty(self) -> None:
+        budget = MemoryBudget(10)
+        budget.acquire(50)
+        self.assertEqual(budget.in_use, 50)
+
+    def test_memory_bounds_pipeline(self) -> None:
+        budget = MemoryBudget(3)
+
+        def _source():
+            for i in range(20):
+                budget.acquire(1)
+                yield i
+
+        def _consume(x):
+            time.sleep(0.001)
+            budget.release(1)
+            return x
+
+        stages = [Stage("consume", _consume, workers=2, queue_depth=8)]
+        self.assertEqual(list(run_stages(_source(), stages, memory=budget)), list(range(20)))
+        self.assertLessEqual(budget.peak, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import random
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+from pdf_ocr_converter import core
+from pdf_ocr_converter.core import ConvertOptions, PageResult, _iter_pool_results, iter_page_results
+
+
+class TestPoolResults(unittest.TestCase):
+    """The `--workers` path, on a thread pool with stubbed rendering and OCR."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.pdf_path = write_pdf(CorpusSpec(pages=9, words_per_page=10), Path(tmp.name) / "doc.pdf")
+        self.rendered = []
+        self.lock = threading.Lock()
+
+    def _render(self, pdf_path, *, first_page, last_page, dpi, poppler_path, chunk_size=16, memory=None):
+        with self.lock:
+            self.rendered.append((first_page, last_page))
+        for page_number in range(first_page, last_page + 1):
+            yield page_number, Image.new("L", (8, 8), page_number)
+
+    @staticmethod
+    def _ocr(image, *, lang=None, backend="subprocess"):
+        time.sleep(random.uniform(0, 0.01))
+        return f"page {image.getpixel((0, 0))}"
+
+    def test_chunks_run_on_the_pool_and_come_back_in_page_order(self) -> None:
+        options = ConvertOptions(workers=2, render_chunk_size=2, first_page=2)
+        with mock.patch.object(core, "iter_page_range_images", self._render), mock.patch.object(
+            core, "ocr_image", self._ocr
+        ), ThreadPoolExecutor(2) as pool:
+            progress = []
+            results = list(
+                iter_page_results(
+                    self.pdf_path, options, executor=pool, progress_cb=lambda i, total: progress.append((i, total))
+                )
+            )
+
+        self.assertEqual(
+            [(r.page_number, r.text, r.source) for r in results], [(n, f"page {n}", "ocr") for n in range(2, 10)]
+        )
+        self.assertEqual(sorted(self.rendered), [(2, 3), (4, 5), (6, 7), (8, 9)])
+        self.assertEqual(progress, [(i, 8) for i in range(1, 9)])
+
+
+    def test_resolved_pages_are_pulled_lazily(self) -> None:
+        pulled = []
+
+        def _jobs():
+            for page_number in range(1, 101):
+                pulled.append(page_number)
+                yield PageResult(page_number, "text", source="text-layer")
+
+        with ThreadPoolExecutor(2) as pool:
+            results = _iter_pool_results(self.pdf_path, ConvertOptions(workers=2), _jobs(), pool)
+            self.assertEqual(next(results).page_number, 1)
+            self.assertLessEqual(len(pulled), 9)
+            self.assertEqual([r.page_number for r in results], list(range(2, 101)))
+            results.close()
+
+    def test_text_layer_only_needs_no_pool(self) -> None:
+        spec = CorpusSpec(pages=3, words_per_page=10, image_fraction=0.0)
+        pdf_path = write_pdf(spec, self.pdf_path.with_name("text.pdf"))
+        with mock.patch.object(core, "create_ocr_pool", side_effect=AssertionError("pool created")):
+            results = list(iter_page_results(pdf_path, ConvertOptions(workers=4, text_layer="only")))
+        self.assertEqual([r.source for r in results], ["text-layer"] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
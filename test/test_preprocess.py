@@ -0,0 +1,66 @@
+import unittest
+
+from PIL import Image, ImageDraw
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+if np is not None:
+    from pdf_ocr_converter.preprocess import (
+        binarize,
+        despeckle,
+        estimate_skew,
+        ink_bounding_box,
+        preprocess_image,
+        to_grayscale,
+    )
+
+
+def _lined_page(angle: float = 0.0) -> Image.Image:
+    """Tinted page with dark horizontal "text lines" and a dark scanner border."""
+
+    page = Image.new("RGB", (600, 800), (230, 220, 190))
+    draw = ImageDraw.Draw(page)
+    for y in range(150, 650, 40):
+        draw.rectangle((120, y, 480, y + 8), fill=(40, 40, 40))
+    return page.rotate(angle, expand=True, fillcolor=(20, 20, 20))
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestPreprocess(unittest.TestCase):
+    def test_binarize_finds_text_on_tinted_paper(self) -> None:
+        ink = binarize(to_grayscale(_lined_page()))
+        self.assertTrue(ink[154, 300])
+        self.assertFalse(ink[100, 300])
+
+    def test_despeckle_drops_isolated_pixels(self) -> None:
+        ink = np.zeros((20, 20), dtype=bool)
+        ink[3, 3] = True
+        ink[10:13, 10:13] = True
+        cleaned = despeckle(ink)
+        self.assertFalse(cleaned[3, 3])
+        self.assertTrue(cleaned[11, 11])
+
+    def test_estimate_skew(self) -> None:
+        for angle in (-2.0, 0.0, 1.5):
+            ink = binarize(to_grayscale(_lined_page(angle)))
+            self.assertAlmostEqual(estimate_skew(ink), angle, delta=0.3)
+
+    def test_bounding_box_ignores_scanner_border(self) -> None:
+        ink = np.zeros((200, 100), dtype=bool)
+        ink[:, :5] = True  # border on the left edge
+        ink[50:60, 30:70] = True
+        self.assertEqual(ink_bounding_box(ink), (30, 50, 70, 60))
+        self.assertIsNone(ink_bounding_box(np.zeros((10, 10), dtype=bool)))
+
+    def test_preprocess_image_returns_cropped_bilevel_image(self) -> None:
+        result = preprocess_image(_lined_page(1.0), margin=10)
+        self.assertEqual(result.mode, "1")
+        self.assertLess(result.width, 420)
+        self.assertLess(result.height, 540)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from pdf_ocr_converter.core import iter_page_range_images
+
+
+class TestIterPageRangeImages(unittest.TestCase):
+    def test_missing_pages_from_poppler_are_an_error(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        def _convert(pdf_path, *, first_page, last_page, output_folder, **kwargs):
+            # One page short, as when poppler stops early on a damaged page.
+            paths = []
+            for page_number in range(first_page, last_page):
+                path = str(Path(output_folder) / f"page-{page_number:03d}.png")
+                Image.new("L", (4, 4)).save(path)
+                paths.append(path)
+            return paths
+
+        with mock.patch("pdf2image.convert_from_path", _convert):
+            with self.assertRaisesRegex(RuntimeError, "2 images for pages 1-3"):
+                list(
+                    iter_page_range_images(
+                        Path(tmp.name) / "doc.pdf", first_page=1, last_page=3, dpi=72, poppler_path=None
+                    )
+                )
+
+    def test_pages_above_pillows_pixel_limit_are_loaded(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        def _convert(pdf_path, *, first_page, last_page, output_folder, **kwargs):
+            path = str(Path(output_folder) / "page-1.ppm")
+            Image.new("RGB", (100, 80), "white").save(path)
+            return [path]
+
+        # 8000 pixels is more than twice the limit: Image.open raises DecompressionBombError.
+        with mock.patch("pdf2image.convert_from_path", _convert), mock.patch.object(Image, "MAX_IMAGE_PIXELS", 3000):
+            pages = list(
+                iter_page_range_images(
+                    Path(tmp.name) / "doc.pdf", first_page=1, last_page=1, dpi=72, poppler_path=None
+                )
+            )
+
+        self.assertEqual([(number, image.size) for number, image in pages], [(1, (100, 80))])
+        self.assertEqual(pages[0][1].getpixel((0, 0)), (255, 255, 255))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+from pdf_ocr_converter import cli
+from pdf_ocr_converter.core import ConvertOptions, iter_page_results
+from pdf_ocr_converter.search_index import SearchIndex
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def _index(self, **kwargs) -> SearchIndex:
+        index = SearchIndex(self.tmp / "index.sqlite3", **kwargs)
+        self.addCleanup(index.close)
+        return index
+
+    def test_ranked_hits_and_incremental_replacement(self) -> None:
+        index = self._index(batch_size=2)
+        a, b = self.tmp / "a.pdf", self.tmp / "b.pdf"
+        with index.document(a) as doc:
+            doc.add(1, "The quick brown fox")
+            doc.add(2, "fox fox fox jumps over the lazy dog")
+            doc.add(3, "nothing to see here")
+        with index.document(b) as doc:
+            doc.add(1, "a lone fox")
+
+        hits = index.search("fox")
+        self.assertEqual((hits[0].path, hits[0].page), (str(a.resolve()), 2))
+        self.assertEqual(
+            {(hit.path, hit.page) for hit in hits},
+            {(str(a.resolve()), 1), (str(a.resolve()), 2), (str(b.resolve()), 1)},
+        )
+        self.assertIn("[fox]", hits[0].snippet)
+        self.assertEqual([hit.page for hit in index.search("fox dog")], [2])
+        self.assertEqual(index.search("fox", document=b)[0].page, 1)
+        # Operators are literal terms unless FTS5 syntax is asked for.
+        self.assertEqual(index.search("fox OR nothing"), [])
+        self.assertEqual(len(index.search("fox OR nothing", syntax=True)), 4)
+        with self.assertRaises(ValueError):
+            index.search('"unbalanced', syntax=True)
+
+        # Re-converting pages 2.. of `a` replaces only those rows.
+        with index.document(a, first_page=2) as doc:
+            doc.add(2, "a page about cats")
+        self.assertEqual(
+            sorted((hit.path, hit.page) for hit in index.search("fox")),
+            sorted([(str(a.resolve()), 1), (str(b.resolve()), 1)]),
+        )
+        self.assertEqual(index.search("nothing"), [])
+        self.assertEqual([hit.page for hit in index.search("cats")], [2])
+
+        index.remove(a)
+        self.assertEqual([hit.path for hit in index.search("fox")], [str(b.resolve())])
+
+    def test_cli_indexes_pages_and_searches(self) -> None:
+        pdf_path = write_pdf(CorpusSpec(pages=5, words_per_page=30, image_fraction=0.0), self.tmp / "doc.pdf")
+        db = self.tmp / "index.sqlite3"
+        cli.main(
+            [
+                str(pdf_path),
+                "--text-layer",
+                "only",
+                "--index",
+                str(db),
+                "--raw-out",
+                str(self.tmp / "raw.txt"),
+                "--no-progress",
+                "--journal",
+                str(self.tmp / "journal.jsonl"),
+            ]
+        )
+
+        pages = list(iter_page_results(pdf_path, ConvertOptions(text_layer="only")))
+        word = pages[3].text.split()[0]
+        index = self._index()
+        hits = index.search(word, limit=100)
+        self.assertIn(4, [hit.page for hit in hits])
+        self.assertEqual({hit.path for hit in hits}, {str(pdf_path.resolve())})
+        self.assertEqual(cli.main(["search", str(db), word]), 0)
+        self.assertEqual(cli.main(["search", str(db), "zzzznotaword"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
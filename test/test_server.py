@@ -0,0 +1,276 @@
+import asyncio
+import http.client
+import io
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+from pdf_ocr_converter.async_correction import AsyncCorrector
+from pdf_ocr_converter.core import ConvertOptions, PageResult, iter_page_results
+from pdf_ocr_converter import server as server_module
+from pdf_ocr_converter.server import ConversionServer
+
+
+class _UpperCaseCompletions(BaseHTTPRequestHandler):
+    """Completion stub: the corrected text is the page text in upper case."""
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        text = body["prompt"].rsplit("\n\n", 1)[-1]
+        payload = json.dumps({"choices": [{"text": text.upper()}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def _gated_completions(answer_now: str, gate: threading.Event) -> type:
+    """A completion stub that answers prompts containing `answer_now` at once and holds the rest until `gate` is set."""
+
+    class _Gated(_UpperCaseCompletions):
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            if answer_now not in json.loads(body)["prompt"]:
+                gate.wait(10)
+            self.rfile = io.BytesIO(body)
+            super().do_POST()
+
+    return _Gated
+
+
+class TestConversionServer(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.pdf_path = write_pdf(CorpusSpec(pages=3, words_per_page=30, image_fraction=0.0), self.tmp / "doc.pdf")
+        self.expected = [r.text for r in iter_page_results(self.pdf_path, ConvertOptions(text_layer="only"))]
+
+        self.stub = ThreadingHTTPServer(("127.0.0.1", 0), _UpperCaseCompletions)
+        threading.Thread(target=self.stub.serve_forever, daemon=True).start()
+        self.addCleanup(self.stub.server_close)
+        self.addCleanup(self.stub.shutdown)
+
+    def _start(self, **kwargs) -> ConversionServer:
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        corrector = AsyncCorrector("test-key", api_base=f"http://127.0.0.1:{self.stub.server_address[1]}/v1")
+        kwargs.setdefault("corrector", corrector)
+        server = ConversionServer(
+            ConvertOptions(text_layer="only"), path_roots=[self.tmp], upload_dir=self.tmp, **kwargs
+        )
+        listener = asyncio.run_coroutine_threadsafe(server.start("127.0.0.1", 0), loop).result()
+        self.port = listener.sockets[0].getsockname()[1]
+
+        async def _shutdown() -> None:
+            listener.close()
+            connections = asyncio.all_tasks() - {asyncio.current_task()}
+            if connections:
+                await asyncio.wait(connections, timeout=5)
+
+        def _stop() -> None:
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+        self.addCleanup(_stop)
+        return server
+
+    def _request(self, method: str, path: str, body: bytes = b"", content_type: str = "") -> http.client.HTTPResponse:
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        self.addCleanup(conn.close)
+        headers = {"Content-Type": content_type} if content_type else {}
+        conn.request(method, path, body=body if method == "POST" else None, headers=headers)
+        return conn.getresponse()
+
+    def _open_job(self, body: dict, until_event: str) -> socket.socket:
+        """POST a path job on a raw socket and read its stream up to the first `until_event` event."""
+
+        data = json.dumps(body).encode()
+        client = socket.create_connection(("127.0.0.1", self.port), timeout=10)
+        self.addCleanup(client.close)
+        client.sendall(
+            b"POST /jobs HTTP/1.1\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s"
+            % (len(data), data)
+        )
+        received = b""
+        while b'"event": "%s"' % until_event.encode() not in received:
+            chunk = client.recv(65536)
+            self.assertTrue(chunk, received)
+            received += chunk
+        return client
+
+    def _wait_for(self, condition) -> None:
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def _gated_pages(self, gate: threading.Event):
+        """Patch the server's pages with 50 fake ones, held after the first until `gate` is set.
+
+        Returns the list of page numbers produced so far.
+        """
+
+        produced = []
+
+        def _pages(pdf_path, options, executor=None):
+            for number in range(1, 51):
+                if number == 2:
+                    gate.wait(10)
+                produced.append(number)
+                yield PageResult(number, f"page {number}", source="text-layer")
+
+        patcher = mock.patch.object(server_module, "iter_page_results", _pages)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return produced
+
+    def _wait_idle(self, server: ConversionServer) -> None:
+        deadline = time.monotonic() + 5
+        while server.admitted and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(server.admitted, 0)
+
+    def _events(self, response: http.client.HTTPResponse) -> list:
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "application/x-ndjson")
+        return [json.loads(line) for line in response.read().splitlines()]
+
+    def test_upload_streams_pages_in_order(self) -> None:
+        server = self._start()
+        response = self._request("POST", "/jobs", self.pdf_path.read_bytes(), "application/pdf")
+        job_id = response.getheader("X-Job-Id")
+        events = self._events(response)
+
+        self.assertEqual([e["event"] for e in events], ["queued", "started", "page", "page", "page", "done"])
+        pages = [e for e in events if e["event"] == "page"]
+        self.assertEqual([p["page_number"] for p in pages], [1, 2, 3])
+        self.assertEqual([p["raw"] for p in pages], self.expected)
+        self.assertEqual({p["source"] for p in pages}, {"text-layer"})
+
+        self._wait_idle(server)
+        self.assertEqual(list(self.tmp.glob("upload-*")), [])
+        status = json.loads(self._request("GET", f"/jobs/{job_id}").read())
+        self.assertEqual((status["state"], status["pages_done"], status["source"]), ("done", 3, "upload"))
+        health = json.loads(self._request("GET", "/health").read())
+        self.assertEqual((health["admitted"], health["running"]), (0, 0))
+
+    def test_path_job_with_correction_and_diff(self) -> None:
+        self._start()
+        body = json.dumps({"path": str(self.pdf_path), "mode": "all", "diff_mode": "lines", "last_page": 2})
+        events = self._events(self._request("POST", "/jobs", body.encode(), "application/json"))
+
+        pages = [e for e in events if e["event"] == "page"]
+        self.assertEqual([p["page_number"] for p in pages], [1, 2])
+        for page, raw in zip(pages, self.expected):
+            self.assertEqual(page["raw"], raw)
+            self.assertEqual(page["corrected"], raw.strip().upper())
+            self.assertTrue(page["diff"])
+        self.assertEqual(events[-1], {"event": "done", "job": events[0]["job"], "pages": 2})
+
+    def test_rejected_requests(self) -> None:
+        self._start(corrector=None, max_upload_bytes=100)
+
+        def _status(method: str, path: str, body: bytes = b"", content_type: str = "") -> int:
+            return self._request(method, path, body, content_type).status
+
+        self.assertEqual(_status("GET", "/jobs/nope"), 404)
+        self.assertEqual(_status("DELETE", "/health"), 405)
+        self.assertEqual(_status("POST", "/jobs", self.pdf_path.read_bytes(), "application/pdf"), 413)
+        self.assertEqual(_status("POST", "/jobs", b"x", "text/plain"), 415)
+        for body in (
+            {"path": "/etc/passwd"},
+            {"path": str(self.tmp / "missing.pdf")},
+            {"path": str(self.pdf_path), "dpi": "high"},
+            {"path": str(self.pdf_path), "poppler_path": "/tmp"},
+            {"path": str(self.pdf_path), "mode": "corrected"},
+        ):
+            self.assertEqual(_status("POST", "/jobs", json.dumps(body).encode(), "application/json"), 400, body)
+
+    def test_admission_is_bounded(self) -> None:
+        server = self._start(max_jobs=1, max_queued=0)
+        # An upload that has not finished holds the only admission slot.
+        held = socket.create_connection(("127.0.0.1", self.port))
+        self.addCleanup(held.close)
+        held.sendall(b"POST /jobs HTTP/1.1\r\nContent-Type: application/pdf\r\nContent-Length: 1000\r\n\r\n%PDF")
+        deadline = time.monotonic() + 5
+        while server.admitted == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        response = self._request("POST", "/jobs", self.pdf_path.read_bytes(), "application/pdf")
+        self.assertEqual(response.status, 503)
+        self.assertEqual(response.getheader("Retry-After"), "1")
+
+        held.close()
+        self._wait_idle(server)
+        self.assertEqual(list(self.tmp.glob("upload-*")), [])
+
+    def test_disconnect_cancels_a_raw_job(self) -> None:
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+        produced = self._gated_pages(gate)
+        server = self._start()
+
+        self._open_job({"path": str(self.pdf_path)}, "page").close()
+        # Page 2 is held, so nothing is written: only reading notices the disconnect.
+        time.sleep(0.2)
+        gate.set()
+        self._wait_idle(server)
+
+        (job,) = server.jobs.values()
+        self.assertEqual((job.state, job.pages_done), ("cancelled", 1))
+        # The page being OCR'd when the client left is the last one.
+        self.assertEqual(produced, [1, 2])
+
+    def test_disconnect_cancels_a_corrected_job(self) -> None:
+        gate = threading.Event()
+        stub = ThreadingHTTPServer(("127.0.0.1", 0), _gated_completions(self.expected[0].strip(), gate))
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        self.addCleanup(stub.server_close)
+        self.addCleanup(stub.shutdown)
+        self.addCleanup(gate.set)
+        corrector = AsyncCorrector("test-key", api_base=f"http://127.0.0.1:{stub.server_address[1]}/v1")
+        server = self._start(corrector=corrector)
+
+        self._open_job({"path": str(self.pdf_path), "mode": "corrected"}, "page").close()
+        # The other pages' corrections are still held by the stub.
+        self._wait_idle(server)
+
+        (job,) = server.jobs.values()
+        self.assertEqual((job.state, job.pages_done), ("cancelled", 1))
+
+    def test_disconnect_while_queued_frees_the_admission(self) -> None:
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+        self._gated_pages(gate)
+        server = self._start(max_jobs=1, max_queued=1)
+
+        running = self._open_job({"path": str(self.pdf_path)}, "page")
+        self._open_job({"path": str(self.pdf_path)}, "queued").close()
+        self._wait_for(lambda: server.admitted == 1)
+
+        first, second = server.jobs.values()
+        self.assertEqual((first.state, second.state), ("running", "cancelled"))
+        self.assertIsNone(second.started)
+
+        gate.set()
+        running.settimeout(10)
+        while running.recv(65536):
+            pass
+        self._wait_idle(server)
+        self.assertEqual((first.state, first.pages_done), ("done", 50))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+import PyPDF2
+
+from benchmarks.synthetic_pdf import CorpusSpec, image_pages, write_pdf
+from pdf_ocr_converter.textlayer import is_usable_text
+
+
+class TestSyntheticPdf(unittest.TestCase):
+    def test_image_pages_are_spread_evenly(self) -> None:
+        self.assertEqual(image_pages(CorpusSpec(pages=4, image_fraction=0.5)), [False, True, False, True])
+        self.assertEqual(sum(image_pages(CorpusSpec(pages=10, image_fraction=0.3))), 3)
+        self.assertFalse(any(image_pages(CorpusSpec(pages=5, image_fraction=0.0))))
+        self.assertTrue(all(image_pages(CorpusSpec(pages=5, image_fraction=1.0))))
+
+    def test_text_and_image_pages(self) -> None:
+        spec = CorpusSpec(pages=4, words_per_page=120, noise=0.5, image_fraction=0.5, dpi=50)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_pdf(spec, Path(tmp) / "corpus.pdf")
+            reader = PyPDF2.PdfReader(str(path))
+            texts = [page.extract_text() for page in reader.pages]
+
+        self.assertEqual(len(texts), 4)
+        for text, is_image in zip(texts, image_pages(spec)):
+            if is_image:
+                self.assertEqual(text.strip(), "")
+            else:
+                self.assertEqual(len(text.split()), 120)
+                self.assertTrue(is_usable_text(text))
+
+    def test_same_spec_same_file(self) -> None:
+        spec = CorpusSpec(pages=2, words_per_page=30, image_fraction=0.5, dpi=40, seed=3)
+        with tempfile.TemporaryDirectory() as tmp:
+            first = write_pdf(spec, Path(tmp) / "a.pdf").read_bytes()
+            second = write_pdf(spec, Path(tmp) / "b.pdf").read_bytes()
+        self.assertEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from pdf_ocr_converter.textlayer import extract_page_text, is_usable_text
+
+
+class _Page:
+    def __init__(self, text=None, error=None):
+        self._text = text
+        self._error = error
+
+    def extract_text(self):
+        if self._error is not None:
+            raise self._error
+        return self._text
+
+
+class TestTextLayer(unittest.TestCase):
+    def test_accepts_normal_prose(self) -> None:
+        text = "It was the best of times, it was the worst of times.\nIt was the age of wisdom."
+        self.assertTrue(is_usable_text(text))
+
+    def test_rejects_empty_and_short_text(self) -> None:
+        self.assertFalse(is_usable_text(None))
+        self.assertFalse(is_usable_text(""))
+        self.assertFalse(is_usable_text("  \n 12 \n"))
+
+    def test_rejects_replacement_characters(self) -> None:
+        text = "Some words ��� with broken glyphs �� in the font map"
+        self.assertFalse(is_usable_text(text))
+
+    def test_rejects_symbol_soup(self) -> None:
+        self.assertFalse(is_usable_text("#$%& *+-/ <=>@ [\\]^ {|}~ #$%& *+-/ <=>@"))
+
+    def test_rejects_missing_word_spacing(self) -> None:
+        self.assertFalse(is_usable_text("Thisisalinewhereeverywordhasbeenrunntogetherbythetextextractor"))
+
+    def test_extract_page_text_swallows_errors(self) -> None:
+        self.assertEqual(extract_page_text(_Page("hello")), "hello")
+        self.assertEqual(extract_page_text(_Page(None)), "")
+        self.assertEqual(extract_page_text(_Page(error=KeyError("/Font"))), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
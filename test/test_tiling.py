@@ -0,0 +1,106 @@
+import dataclasses
+import random
+import threading
+import unittest
+
+from PIL import Image, ImageDraw
+
+from pdf_ocr_converter.ocr_backends import OcrLine
+from pdf_ocr_converter.tiling import ocr_tiled, plan_strips, stitch
+
+
+def _bars_page(bars, *, width=40, height=3000):
+    """A page of full-width bars; bar i is drawn in gray level i + 1."""
+
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    for level, (top, bar_height) in enumerate(bars, start=1):
+        draw.rectangle((0, top, width - 1, top + bar_height - 1), fill=level)
+    return image
+
+
+def _read_bars(image):
+    """Stand-in OCR engine: one line per run of equal dark rows, named by its gray level.
+
+    Like tesseract, it also reads bars cut off at the image edge.
+    """
+
+    column = image.crop((0, 0, 1, image.height)).tobytes()
+    lines, top = [], 0
+    for y in range(1, image.height + 1):
+        if y == image.height or column[y] != column[top]:
+            if column[top] != 255:
+                lines.append(OcrLine(f"line {column[top]}", 0, top, image.width, y, 1, 1, (90.0,)))
+            top = y
+    return lines
+
+
+class TestPlanStrips(unittest.TestCase):
+    def test_owned_bands_cover_the_page_and_strips_overlap(self) -> None:
+        strips = plan_strips(1000, 10_000, overlap=100, strip_pixels=1_000_000)
+        self.assertEqual(len(strips), 10)
+        self.assertEqual(strips[0].own_top, 0)
+        self.assertEqual(strips[-1].own_bottom, 10_000)
+        for strip, following in zip(strips, strips[1:]):
+            self.assertEqual(strip.own_bottom, following.own_top)
+            self.assertEqual(strip.bottom - following.top, 100)
+        self.assertEqual((strips[0].top, strips[-1].bottom), (0, 10_000))
+
+    def test_strips_stay_several_overlaps_tall(self) -> None:
+        strips = plan_strips(10_000, 1_200, overlap=100, strip_pixels=1_000_000)
+        self.assertEqual(len(strips), 4)
+        self.assertEqual(len(plan_strips(10, 10, overlap=100)), 1)
+
+
+class TestOcrTiled(unittest.TestCase):
+    def test_every_line_once_and_in_order(self) -> None:
+        rng = random.Random(3)
+        bars, top = [], 5
+        while top < 2900 and len(bars) < 200:
+            bar_height = rng.randint(5, 60)
+            bars.append((top, bar_height))
+            top += bar_height + rng.randint(1, 30)
+        page = _bars_page(bars)
+        expected = [f"line {level}" for level in range(1, len(bars) + 1)]
+
+        for strip_pixels, threads in ((40 * 300, 4), (40 * 700, 1), (40 * 3000, 2)):
+            text, confidences = ocr_tiled(page, _read_bars, overlap=60, strip_pixels=strip_pixels, threads=threads)
+            self.assertEqual([line for line in text.splitlines() if line], expected)
+            self.assertEqual(len(confidences), len(bars))
+
+    def test_strip_threads_are_reused_across_pages(self) -> None:
+        page = _bars_page([(100 * i + 5, 20) for i in range(29)])
+        seen = set()
+
+        def _read(image):
+            seen.add(threading.get_ident())
+            return _read_bars(image)
+
+        for _ in range(3):
+            ocr_tiled(page, _read, overlap=60, strip_pixels=40 * 300, threads=3)
+        # Engines are cached per thread, so new threads would mean new engines.
+        self.assertLessEqual(len(seen), 3)
+
+    def test_paragraph_breaks(self) -> None:
+        strips = plan_strips(100, 400, overlap=40, strip_pixels=100 * 200)
+        first = [
+            OcrLine("a", 0, 10, 100, 30, block=1, paragraph=1),
+            OcrLine("b", 0, 35, 100, 55, block=1, paragraph=2),
+            OcrLine("c", 0, 170, 100, 190, block=1, paragraph=2),
+        ]
+        # Strip coordinates: "d" continues "c" on the next strip, "e" starts a new block.
+        second_top = strips[1].top
+        second = [
+            OcrLine("d", 0, 195 - second_top, 100, 215 - second_top, block=1, paragraph=1),
+            OcrLine("e", 0, 300 - second_top, 100, 320 - second_top, block=2, paragraph=1),
+        ]
+        text, lines = stitch(strips, [first, second])
+        self.assertEqual(text, "a\n\nb\nc\nd\n\ne\n")
+
+        far_below = [dataclasses.replace(second[0], top=second[0].top + 60, bottom=second[0].bottom + 60)]
+        self.assertEqual(stitch(strips, [first, far_below])[0], "a\n\nb\nc\n\nd\n")
+        self.assertEqual([(line.top, line.bottom) for line in lines][-1], (300, 320))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from benchmarks.synthetic_pdf import CorpusSpec, write_pdf
+from pdf_ocr_converter import cli, work_queue
+from pdf_ocr_converter.core import ConvertOptions
+from pdf_ocr_converter.diffing import changed_lines
+from pdf_ocr_converter.journal import PageRecord
+from pdf_ocr_converter.work_queue import LeaseLostError, WorkQueue, assemble, run_worker
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.pdf_path = write_pdf(CorpusSpec(pages=7, words_per_page=30, image_fraction=0.0), self.tmp / "doc.pdf")
+        self.db = self.tmp / "jobs.sqlite3"
+
+    def _queue(self, **kwargs) -> WorkQueue:
+        queue = WorkQueue(self.db, **kwargs)
+        self.addCleanup(queue.close)
+        return queue
+
+    def _outputs(self, prefix: str) -> dict:
+        return {name: self.tmp / f"{prefix}_{name}.txt" for name in ("raw", "corrected", "diff")}
+
+    def test_workers_split_the_document_and_assembly_matches_the_cli(self) -> None:
+        queue = self._queue()
+        queue.add_document(self.pdf_path, options={"text_layer": "only"}, pages_per_item=2)
+
+        counts = {}
+
+        def _work(name: str) -> None:
+            with WorkQueue(self.db) as own:
+                counts[name] = run_worker(own, ConvertOptions(), worker=name, poll_interval=0.01, until_empty=True)
+
+        threads = [threading.Thread(target=_work, args=(f"w{n}",)) for n in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(counts.values()), 4)
+        self.assertEqual(queue.status()[0]["items"], {"done": 4})
+        self.assertEqual(queue.status()[0]["pages_done"], 7)
+
+        out = self._outputs("queue")
+        assemble(queue, self.pdf_path, raw_out=out["raw"], corrected_out=out["corrected"], diff_out=out["diff"])
+        expected = self._outputs("cli")
+        cli.main(
+            [
+                str(self.pdf_path),
+                "--text-layer",
+                "only",
+                "--no-progress",
+                "--raw-out",
+                str(expected["raw"]),
+                "--journal",
+                str(self.tmp / "journal.jsonl"),
+            ]
+        )
+        self.assertEqual(out["raw"].read_bytes(), expected["raw"].read_bytes())
+        self.assertFalse(out["corrected"].exists())
+
+    def test_correction_modes_store_corrected_text_and_diff(self) -> None:
+        queue = self._queue()
+        queue.add_document(
+            self.pdf_path, mode="all", diff_mode="lines", options={"text_layer": "only"}, first_page=2, last_page=4
+        )
+        run_worker(queue, ConvertOptions(), correct=str.upper, until_empty=True)
+
+        records = list(queue.page_records(queue.find_document(self.pdf_path)))
+        self.assertEqual([r.page_number for r in records], [2, 3, 4])
+        for record in records:
+            self.assertEqual(record.corrected, record.raw.upper())
+            self.assertEqual(record.diff, changed_lines(record.raw, record.corrected, mode="lines"))
+
+    def test_expired_lease_is_reclaimed_and_fences_the_old_holder(self) -> None:
+        queue = self._queue(lease_seconds=0.05)
+        queue.add_document(self.pdf_path, pages_per_item=7)
+
+        stale = queue.claim("a")
+        self.assertIsNone(queue.claim("b"))
+        time.sleep(0.1)
+        fresh = queue.claim("b")
+        self.assertEqual((fresh.id, fresh.attempt), (stale.id, 2))
+
+        with self.assertRaises(LeaseLostError):
+            queue.record_page(stale, PageRecord(1, raw="late"), source="ocr", dpi=300)
+        self.assertFalse(queue.heartbeat(stale))
+        self.assertTrue(queue.heartbeat(fresh))
+        queue.record_page(fresh, PageRecord(1, raw="page 1"), source="ocr", dpi=300)
+
+    def test_failing_items_are_retried_then_failed(self) -> None:
+        queue = self._queue(max_attempts=2)
+        # Pages 1-2 are queued; the file then becomes unreadable for the workers.
+        queue.add_document(self.pdf_path, options={"text_layer": "only"}, last_page=2)
+        os.truncate(self.pdf_path, 10)
+
+        self.assertEqual(run_worker(queue, ConvertOptions(), poll_interval=0.01, until_empty=True), 0)
+        status = queue.status()[0]
+        self.assertEqual(status["items"], {"failed": 1})
+        self.assertEqual(len(status["errors"]), 1)
+        out = self._outputs("failed")
+        with self.assertRaises(ValueError):
+            assemble(queue, self.pdf_path, raw_out=out["raw"], corrected_out=out["corrected"], diff_out=out["diff"])
+        self.assertFalse(out["raw"].exists())
+
+    def test_item_with_missing_pages_is_not_completed(self) -> None:
+        queue = self._queue()
+        queue.add_document(self.pdf_path, pages_per_item=2, last_page=2)
+        item = queue.claim("a")
+        queue.record_page(item, PageRecord(1, raw="page 1"), source="ocr", dpi=300)
+        with self.assertRaisesRegex(ValueError, "1 of pages 1-2"):
+            queue.complete(item)
+        self.assertEqual(queue.status()[0]["items"], {"leased": 1})
+
+    def test_adding_a_document_again_starts_over(self) -> None:
+        queue = self._queue()
+        queue.add_document(self.pdf_path, pages_per_item=4)
+        item = queue.claim("a")
+        queue.add_document(self.pdf_path, pages_per_item=7)
+
+        with self.assertRaises(LeaseLostError):
+            queue.record_page(item, PageRecord(1, raw="old"), source="ocr", dpi=300)
+        self.assertEqual(queue.status()[0]["items"], {"pending": 1})
+        with self.assertRaises(ValueError):
+            queue.add_document(self.pdf_path, options={"poppler_path": "/tmp"})
+
+    def test_one_ocr_pool_serves_every_item(self) -> None:
+        queue = self._queue()
+        queue.add_document(self.pdf_path, options={"text_layer": "only"}, pages_per_item=2)
+        executors = []
+        real_iter_page_results = work_queue.iter_page_results
+
+        def _iter_page_results(pdf_path, options, *, executor=None):
+            executors.append(executor)
+            return real_iter_page_results(pdf_path, options, executor=executor)
+
+        with mock.patch.object(
+            work_queue, "create_ocr_pool", wraps=work_queue.create_ocr_pool
+        ) as create_pool, mock.patch.object(work_queue, "warm_ocr_pool") as warm_pool, mock.patch.object(
+            work_queue, "iter_page_results", _iter_page_results
+        ):
+            work_queue.main(["work", str(self.db), "--workers", "2", "--until-empty", "--poll-interval", "0.01"])
+
+        create_pool.assert_called_once()
+        (pool,) = {id(executor): executor for executor in executors}.values()
+        self.assertIs(warm_pool.call_args.args[0], pool)
+        self.assertEqual(len(executors), 4)
+        self.assertEqual(queue.status()[0]["items"], {"done": 4})
+        # The pool was shut down when the worker exited.
+        with self.assertRaises(RuntimeError):
+            pool.submit(int)
+
+
+if __name__ == "__main__":
+    unittest.main()